@@ -0,0 +1,86 @@
+/*
+ * Copyright 2019 NVIDIA Corporation
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#pragma once
+
+#include "TC_CORE.hpp"
+#include <string>
+#include <vector>
+
+namespace VPF {
+
+/* Allocation counters of one token type or one task;
+ */
+struct AllocStats {
+  std::string name;
+  // Number of allocations and deallocations;
+  uint64_t allocations;
+  uint64_t deallocations;
+  // Total bytes allocated;
+  uint64_t bytes_allocated;
+  // Bytes allocated and not yet deallocated and highest value of that;
+  uint64_t live_bytes;
+  uint64_t peak_bytes;
+};
+
+/* Runtime counters of memory allocated by tokens;
+ * Tokens report every allocation of memory they own, tracker accounts it
+ * to the token type and to the task which was executed on calling thread
+ * at that moment (see Task::Execute());
+ * Allocations made outside of any task go to "none" task;
+ *
+ * Tracking is off by default, in that case reporting costs a single
+ * atomic load;
+ */
+class DllExport AllocTracker {
+public:
+  AllocTracker() = delete;
+
+  static void SetEnabled(bool enabled);
+
+  static bool IsEnabled();
+
+  /* Call this after token allocated memory;
+   * Returns id to be passed to OnFree(), 0 if tracking is off;
+   */
+  static uint32_t OnAlloc(const char *token_type, uint64_t bytes);
+
+  /* Call this before token frees memory; Does nothing if id is 0, so
+   * memory allocated while tracking was off isn't accounted;
+   */
+  static void OnFree(const char *token_type, uint64_t bytes, uint32_t id);
+
+  static std::vector<AllocStats> GetTokenStats();
+
+  static std::vector<AllocStats> GetTaskStats();
+
+  /* Zeroes counters, live bytes are kept and become new peak;
+   */
+  static void Reset();
+};
+
+/* Sets name of the task executed on calling thread for the lifetime of the
+ * object, previous name is restored afterwards;
+ */
+class DllExport AllocTaskScope {
+public:
+  AllocTaskScope(const AllocTaskScope &other) = delete;
+  AllocTaskScope &operator=(const AllocTaskScope &other) = delete;
+
+  explicit AllocTaskScope(const char *task_name);
+  ~AllocTaskScope();
+
+private:
+  const char *prev_name;
+};
+} // namespace VPF
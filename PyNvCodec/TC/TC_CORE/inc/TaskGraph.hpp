@@ -0,0 +1,108 @@
+/*
+ * Copyright 2019 NVIDIA Corporation
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#pragma once
+
+#include "TC_CORE.hpp"
+#include <vector>
+
+namespace VPF {
+
+/* Copies task output token so that copy outlives next task execution;
+ * Copy is owned by the caller and is released with delete;
+ */
+typedef Token *(*p_clone_call)(Token *p_token, void *p_args);
+
+/* Per-stage counters;
+ */
+struct TaskGraphStats {
+  const char *name;
+  // Number of Execute() calls;
+  uint64_t executions;
+  // Time spent within Execute(), nanoseconds;
+  uint64_t busy_ns;
+  // Tokens waiting in stage input queues, summed over all inputs;
+  uint64_t queue_depth;
+  // Highest number of tokens seen in any of stage input queues;
+  uint64_t max_queue_depth;
+};
+
+/* Runs every task on its own worker thread; Task outputs are wired to
+ * other tasks inputs through bounded queues, so stages run concurrently and
+ * producer blocks when consumer falls behind;
+ *
+ * Stage without connected inputs is a source, it's executed until it fails;
+ * Other stages are executed once per set of input tokens; When upstream is
+ * done, stage is executed with empty inputs while it produces output (this
+ * is how decoders get flushed), then it's done as well;
+ * Outputs of an execution are passed downstream only if every connected
+ * output is set, so consumer of several outputs gets them in step;
+ *
+ * Doesn't take ownership of tasks, they shall outlive the graph;
+ */
+class DllExport TaskGraph {
+public:
+  TaskGraph(const TaskGraph &other) = delete;
+  TaskGraph &operator=(const TaskGraph &other) = delete;
+
+  /* queue_size is the capacity of every queue within graph;
+   */
+  explicit TaskGraph(uint32_t queue_size = 4U);
+
+  /* Stops the graph if it's running;
+   */
+  ~TaskGraph();
+
+  /* Adds task to graph, returns its stage number;
+   */
+  uint32_t AddTask(Task *p_task);
+
+  /* Sets token as stage input before every execution;
+   * Token isn't copied and shall outlive the graph;
+   */
+  bool SetConstInput(uint32_t stage, Token *p_input, uint32_t input_num);
+
+  /* Passes copies of src_stage output to dst_stage input;
+   * Returns false if stage, input or output number is invalid;
+   */
+  bool Connect(uint32_t src_stage, uint32_t output_num, uint32_t dst_stage,
+               uint32_t input_num, p_clone_call clone,
+               void *p_args = nullptr);
+
+  /* Passes copies of stage output to caller through Pop();
+   * Returns graph output number;
+   */
+  uint32_t AddOutput(uint32_t stage, uint32_t output_num, p_clone_call clone,
+                     void *p_args = nullptr);
+
+  /* Starts worker threads; Graph can't be changed after that;
+   */
+  void Start();
+
+  /* Blocks until graph output token is available; Caller takes ownership
+   * of returned token; Returns nullptr once stage which produces it is done;
+   */
+  Token *Pop(uint32_t graph_output = 0U);
+
+  /* Stops worker threads and releases tokens which are still queued;
+   */
+  void Stop();
+
+  /* Returns counters of every stage, in stage number order;
+   */
+  std::vector<TaskGraphStats> GetStats() const;
+
+private:
+  struct TaskGraphImpl *p_impl = nullptr;
+};
+} // namespace VPF
@@ -0,0 +1,150 @@
+/*
+ * Copyright 2019 NVIDIA Corporation
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <algorithm>
+#include <atomic>
+#include <map>
+#include <mutex>
+
+#include "AllocTracker.hpp"
+
+using namespace std;
+using namespace VPF;
+
+namespace VPF {
+static const char *no_task_name = "none";
+
+// Name of the task executed on this thread;
+static thread_local const char *current_task = nullptr;
+
+/* Counters grouped by name; Slots are never removed, so slot index stays
+ * valid as allocation id;
+ */
+struct AllocTable {
+  map<string, size_t> slots;
+  vector<AllocStats> stats;
+
+  size_t GetSlot(const char *name) {
+    auto it = slots.find(name);
+    if (it != slots.end()) {
+      return it->second;
+    }
+
+    AllocStats slot_stats = {name, 0U, 0U, 0U, 0U, 0U};
+    stats.push_back(slot_stats);
+    slots[name] = stats.size() - 1U;
+    return stats.size() - 1U;
+  }
+
+  void OnAlloc(size_t slot, uint64_t bytes) {
+    auto &slot_stats = stats[slot];
+    slot_stats.allocations++;
+    slot_stats.bytes_allocated += bytes;
+    slot_stats.live_bytes += bytes;
+    slot_stats.peak_bytes = max(slot_stats.peak_bytes, slot_stats.live_bytes);
+  }
+
+  void OnFree(size_t slot, uint64_t bytes) {
+    auto &slot_stats = stats[slot];
+    slot_stats.deallocations++;
+    slot_stats.live_bytes -= min(slot_stats.live_bytes, bytes);
+  }
+
+  void Reset() {
+    for (auto &slot_stats : stats) {
+      slot_stats.allocations = 0U;
+      slot_stats.deallocations = 0U;
+      slot_stats.bytes_allocated = 0U;
+      slot_stats.peak_bytes = slot_stats.live_bytes;
+    }
+  }
+};
+
+struct AllocTrackerImpl {
+  atomic<bool> enabled;
+  mutex guard;
+  AllocTable tokens;
+  AllocTable tasks;
+
+  AllocTrackerImpl() : enabled(false) {}
+
+  /* Never destroyed, so tokens released during static destruction still
+   * have the tracker to report to;
+   */
+  static AllocTrackerImpl &Instance() {
+    static auto *p_impl = new AllocTrackerImpl;
+    return *p_impl;
+  }
+};
+} // namespace VPF
+
+void AllocTracker::SetEnabled(bool enabled) {
+  AllocTrackerImpl::Instance().enabled = enabled;
+}
+
+bool AllocTracker::IsEnabled() { return AllocTrackerImpl::Instance().enabled; }
+
+uint32_t AllocTracker::OnAlloc(const char *token_type, uint64_t bytes) {
+  auto &impl = AllocTrackerImpl::Instance();
+  if (!impl.enabled) {
+    return 0U;
+  }
+
+  auto const task_name = current_task ? current_task : no_task_name;
+
+  lock_guard<mutex> lock(impl.guard);
+  impl.tokens.OnAlloc(impl.tokens.GetSlot(token_type), bytes);
+
+  auto const task_slot = impl.tasks.GetSlot(task_name);
+  impl.tasks.OnAlloc(task_slot, bytes);
+  return task_slot + 1U;
+}
+
+void AllocTracker::OnFree(const char *token_type, uint64_t bytes,
+                          uint32_t id) {
+  if (!id) {
+    return;
+  }
+
+  auto &impl = AllocTrackerImpl::Instance();
+  lock_guard<mutex> lock(impl.guard);
+  impl.tokens.OnFree(impl.tokens.GetSlot(token_type), bytes);
+  // Memory is accounted to the task which allocated it;
+  impl.tasks.OnFree(id - 1U, bytes);
+}
+
+vector<AllocStats> AllocTracker::GetTokenStats() {
+  auto &impl = AllocTrackerImpl::Instance();
+  lock_guard<mutex> lock(impl.guard);
+  return impl.tokens.stats;
+}
+
+vector<AllocStats> AllocTracker::GetTaskStats() {
+  auto &impl = AllocTrackerImpl::Instance();
+  lock_guard<mutex> lock(impl.guard);
+  return impl.tasks.stats;
+}
+
+void AllocTracker::Reset() {
+  auto &impl = AllocTrackerImpl::Instance();
+  lock_guard<mutex> lock(impl.guard);
+  impl.tokens.Reset();
+  impl.tasks.Reset();
+}
+
+AllocTaskScope::AllocTaskScope(const char *task_name)
+    : prev_name(current_task) {
+  current_task = task_name;
+}
+
+AllocTaskScope::~AllocTaskScope() { current_task = prev_name; }
@@ -16,6 +16,7 @@
 #include <vector>
 #include <string>
 
+#include "AllocTracker.hpp"
 #include "TC_CORE.hpp"
 
 using namespace std;
@@ -48,6 +49,8 @@ Task::Task(const char *str_name, uint32_t num_inputs, uint32_t num_outputs,
 TaskExecStatus Task::Run() { return TaskExecStatus::TASK_EXEC_SUCCESS; }
 
 TaskExecStatus Task::Execute() {
+  // Tokens allocated within Run() are accounted to this task;
+  AllocTaskScope alloc_scope(GetName());
   auto const ret = Run();
   if (p_impl->call && p_impl->args) {
     p_impl->call(p_impl->args);
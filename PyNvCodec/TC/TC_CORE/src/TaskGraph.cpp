@@ -0,0 +1,434 @@
+/*
+ * Copyright 2019 NVIDIA Corporation
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <algorithm>
+#include <atomic>
+#include <chrono>
+#include <condition_variable>
+#include <deque>
+#include <exception>
+#include <memory>
+#include <mutex>
+#include <stdexcept>
+#include <thread>
+#include <utility>
+#include <vector>
+
+#include "AllocTracker.hpp"
+#include "TaskGraph.hpp"
+
+using namespace std;
+using namespace VPF;
+
+namespace VPF {
+/* Bounded FIFO between two stages; Owns tokens while they're queued;
+ */
+class TokenQueue {
+public:
+  explicit TokenQueue(size_t queue_size)
+      : capacity(max<size_t>(queue_size, 1U)) {}
+
+  ~TokenQueue() { Clear(); }
+
+  /* Blocks while queue is full; Returns false if queue was aborted, token
+   * isn't taken in that case;
+   */
+  bool Push(Token *p_token) {
+    unique_lock<mutex> lock(mtx);
+    not_full.wait(lock, [&] { return aborted || tokens.size() < capacity; });
+    if (aborted) {
+      return false;
+    }
+
+    tokens.push_back(p_token);
+    max_depth = max(max_depth, tokens.size());
+    not_empty.notify_one();
+    return true;
+  }
+
+  /* Blocks while queue is empty; Returns nullptr when producer is done and
+   * all tokens are popped or when queue was aborted;
+   */
+  Token *Pop() {
+    unique_lock<mutex> lock(mtx);
+    not_empty.wait(lock,
+                   [&] { return aborted || closed || !tokens.empty(); });
+    if (aborted || tokens.empty()) {
+      return nullptr;
+    }
+
+    auto p_token = tokens.front();
+    tokens.pop_front();
+    not_full.notify_one();
+    return p_token;
+  }
+
+  /* Producer is done, no more tokens will be pushed;
+   */
+  void Close() {
+    lock_guard<mutex> lock(mtx);
+    closed = true;
+    not_empty.notify_all();
+  }
+
+  /* Wakes up both producer and consumer, nothing can be pushed or popped
+   * after that;
+   */
+  void Abort() {
+    lock_guard<mutex> lock(mtx);
+    aborted = true;
+    not_empty.notify_all();
+    not_full.notify_all();
+  }
+
+  void Clear() {
+    lock_guard<mutex> lock(mtx);
+    for (auto p_token : tokens) {
+      delete p_token;
+    }
+    tokens.clear();
+  }
+
+  size_t Depth() {
+    lock_guard<mutex> lock(mtx);
+    return tokens.size();
+  }
+
+  size_t MaxDepth() {
+    lock_guard<mutex> lock(mtx);
+    return max_depth;
+  }
+
+private:
+  mutex mtx;
+  condition_variable not_empty;
+  condition_variable not_full;
+  deque<Token *> tokens;
+  size_t capacity;
+  size_t max_depth = 0U;
+  bool closed = false;
+  bool aborted = false;
+};
+
+struct StageInput {
+  uint32_t input_num;
+  TokenQueue *p_queue;
+};
+
+struct StageOutput {
+  uint32_t output_num;
+  p_clone_call clone;
+  void *p_args;
+  TokenQueue *p_queue;
+};
+
+struct Stage {
+  Task *p_task;
+  vector<pair<uint32_t, Token *>> const_inputs;
+  vector<StageInput> inputs;
+  vector<StageOutput> outputs;
+  thread worker;
+
+  atomic<uint64_t> executions;
+  atomic<uint64_t> busy_ns;
+
+  explicit Stage(Task *task) : p_task(task), executions(0U), busy_ns(0U) {}
+};
+
+struct TaskGraphImpl {
+  uint32_t queue_size;
+  vector<unique_ptr<Stage>> stages;
+  vector<unique_ptr<TokenQueue>> queues;
+  vector<TokenQueue *> graph_outputs;
+
+  bool started = false;
+  atomic<bool> stopping;
+
+  // First exception thrown by any of the tasks, rethrown by Pop();
+  mutex error_mtx;
+  exception_ptr error;
+
+  explicit TaskGraphImpl(uint32_t size) : queue_size(size), stopping(false) {}
+
+  TokenQueue *MakeQueue() {
+    queues.emplace_back(new TokenQueue(queue_size));
+    return queues.back().get();
+  }
+
+  void AbortQueues() {
+    for (auto &queue : queues) {
+      queue->Abort();
+    }
+  }
+
+  void SetInputs(Stage &stage) {
+    stage.p_task->ClearInputs();
+    for (auto &input : stage.const_inputs) {
+      stage.p_task->SetInput(input.second, input.first);
+    }
+  }
+
+  /* Runs the task and passes copies of its outputs downstream;
+   * Returns false if graph is being stopped;
+   */
+  bool Execute(Stage &stage, TaskExecStatus &status, bool &has_output) {
+    auto const start = chrono::steady_clock::now();
+    status = stage.p_task->Execute();
+    auto const end = chrono::steady_clock::now();
+
+    stage.busy_ns +=
+        chrono::duration_cast<chrono::nanoseconds>(end - start).count();
+    stage.executions++;
+
+    has_output = false;
+    if (TaskExecStatus::TASK_EXEC_FAIL == status) {
+      return !stopping;
+    }
+
+    /* Outputs are passed only if all connected ones are set, so consumer
+     * with several inputs from one stage gets them in step;
+     */
+    // Copies are made on behalf of the stage, so they're accounted to it;
+    AllocTaskScope alloc_scope(stage.p_task->GetName());
+    bool all_outputs = true;
+    for (auto &output : stage.outputs) {
+      auto const is_set =
+          nullptr != stage.p_task->GetOutput(output.output_num);
+      has_output |= is_set;
+      all_outputs &= is_set;
+    }
+
+    for (auto &output : stage.outputs) {
+      if (!all_outputs) {
+        break;
+      }
+
+      auto p_token = stage.p_task->GetOutput(output.output_num);
+      auto p_copy = output.clone(p_token, output.p_args);
+      if (p_copy && !output.p_queue->Push(p_copy)) {
+        delete p_copy;
+        return false;
+      }
+    }
+
+    return !stopping;
+  }
+
+  void Work(Stage &stage) {
+    auto const is_source = stage.inputs.empty();
+    vector<Token *> consumed;
+    auto status = TaskExecStatus::TASK_EXEC_FAIL;
+    bool has_output = false;
+
+    try {
+      while (!stopping) {
+        SetInputs(stage);
+
+        bool upstream_done = false;
+        for (auto &input : stage.inputs) {
+          auto p_token = input.p_queue->Pop();
+          if (!p_token) {
+            upstream_done = true;
+            break;
+          }
+          consumed.push_back(p_token);
+          stage.p_task->SetInput(p_token, input.input_num);
+        }
+
+        if (!upstream_done && !Execute(stage, status, has_output)) {
+          break;
+        }
+
+        /* Task only stores input pointers, so inputs are released after
+         * they're reset;
+         */
+        stage.p_task->ClearInputs();
+        for (auto p_token : consumed) {
+          delete p_token;
+        }
+        consumed.clear();
+
+        if (upstream_done ||
+            (is_source && TaskExecStatus::TASK_EXEC_FAIL == status)) {
+          break;
+        }
+      }
+
+      /* Flush the stage: execute it without inputs while it produces
+       * something;
+       */
+      bool flush = !is_source && !stage.outputs.empty();
+      while (flush && !stopping) {
+        SetInputs(stage);
+        flush = Execute(stage, status, has_output) &&
+                TaskExecStatus::TASK_EXEC_SUCCESS == status && has_output;
+      }
+    } catch (...) {
+      {
+        lock_guard<mutex> lock(error_mtx);
+        if (!error) {
+          error = current_exception();
+        }
+      }
+      stopping = true;
+      AbortQueues();
+    }
+
+    stage.p_task->ClearInputs();
+    for (auto p_token : consumed) {
+      delete p_token;
+    }
+
+    for (auto &output : stage.outputs) {
+      output.p_queue->Close();
+    }
+  }
+};
+} // namespace VPF
+
+TaskGraph::TaskGraph(uint32_t queue_size)
+    : p_impl(new TaskGraphImpl(queue_size)) {}
+
+TaskGraph::~TaskGraph() {
+  Stop();
+  delete p_impl;
+}
+
+uint32_t TaskGraph::AddTask(Task *p_task) {
+  if (!p_task) {
+    throw invalid_argument("Can't add empty task to graph");
+  }
+
+  if (p_impl->started) {
+    throw runtime_error("Can't add task to running graph");
+  }
+
+  p_impl->stages.emplace_back(new Stage(p_task));
+  return p_impl->stages.size() - 1U;
+}
+
+bool TaskGraph::SetConstInput(uint32_t stage, Token *p_input,
+                              uint32_t input_num) {
+  if (p_impl->started || stage >= p_impl->stages.size()) {
+    return false;
+  }
+
+  auto &dst = *p_impl->stages[stage];
+  if (input_num >= dst.p_task->GetNumInputs()) {
+    return false;
+  }
+
+  dst.const_inputs.emplace_back(input_num, p_input);
+  return true;
+}
+
+bool TaskGraph::Connect(uint32_t src_stage, uint32_t output_num,
+                        uint32_t dst_stage, uint32_t input_num,
+                        p_clone_call clone, void *p_args) {
+  auto const num_stages = p_impl->stages.size();
+  if (p_impl->started || !clone || src_stage >= num_stages ||
+      dst_stage >= num_stages || src_stage == dst_stage) {
+    return false;
+  }
+
+  auto &src = *p_impl->stages[src_stage];
+  auto &dst = *p_impl->stages[dst_stage];
+  if (output_num >= src.p_task->GetNumOutputs() ||
+      input_num >= dst.p_task->GetNumInputs()) {
+    return false;
+  }
+
+  auto p_queue = p_impl->MakeQueue();
+  src.outputs.push_back({output_num, clone, p_args, p_queue});
+  dst.inputs.push_back({input_num, p_queue});
+  return true;
+}
+
+uint32_t TaskGraph::AddOutput(uint32_t stage, uint32_t output_num,
+                              p_clone_call clone, void *p_args) {
+  if (p_impl->started) {
+    throw runtime_error("Can't add output to running graph");
+  }
+
+  if (!clone || stage >= p_impl->stages.size() ||
+      output_num >= p_impl->stages[stage]->p_task->GetNumOutputs()) {
+    throw invalid_argument("Invalid graph output");
+  }
+
+  auto p_queue = p_impl->MakeQueue();
+  p_impl->stages[stage]->outputs.push_back(
+      {output_num, clone, p_args, p_queue});
+  p_impl->graph_outputs.push_back(p_queue);
+  return p_impl->graph_outputs.size() - 1U;
+}
+
+void TaskGraph::Start() {
+  if (p_impl->started) {
+    throw runtime_error("Task graph is already started");
+  }
+
+  p_impl->started = true;
+  for (auto &stage : p_impl->stages) {
+    auto p_stage = stage.get();
+    stage->worker = thread([this, p_stage] { p_impl->Work(*p_stage); });
+  }
+}
+
+Token *TaskGraph::Pop(uint32_t graph_output) {
+  if (graph_output >= p_impl->graph_outputs.size()) {
+    throw invalid_argument("Invalid graph output");
+  }
+
+  auto p_token = p_impl->graph_outputs[graph_output]->Pop();
+
+  lock_guard<mutex> lock(p_impl->error_mtx);
+  if (p_impl->error) {
+    delete p_token;
+    rethrow_exception(p_impl->error);
+  }
+
+  return p_token;
+}
+
+void TaskGraph::Stop() {
+  p_impl->stopping = true;
+  p_impl->AbortQueues();
+
+  for (auto &stage : p_impl->stages) {
+    if (stage->worker.joinable()) {
+      stage->worker.join();
+    }
+  }
+
+  for (auto &queue : p_impl->queues) {
+    queue->Clear();
+  }
+}
+
+vector<TaskGraphStats> TaskGraph::GetStats() const {
+  vector<TaskGraphStats> stats;
+  for (auto &stage : p_impl->stages) {
+    TaskGraphStats stage_stats = {0};
+    stage_stats.name = stage->p_task->GetName();
+    stage_stats.executions = stage->executions;
+    stage_stats.busy_ns = stage->busy_ns;
+    for (auto &input : stage->inputs) {
+      stage_stats.queue_depth += input.p_queue->Depth();
+      stage_stats.max_queue_depth = max<uint64_t>(
+          stage_stats.max_queue_depth, input.p_queue->MaxDepth());
+    }
+    stats.push_back(stage_stats);
+  }
+
+  return stats;
+}
@@ -13,15 +13,46 @@
 
 #pragma once
 #include "MemoryInterfaces.hpp"
-#include "cuviddec.h"
 #include <stdint.h>
 
+#ifdef TC_CPU_ONLY
+/* Demuxer reports codec the same way without Video Codec SDK headers, names
+ * and values are the ones of cuviddec.h;
+ */
+typedef enum cudaVideoCodec_enum {
+  cudaVideoCodec_MPEG1 = 0,
+  cudaVideoCodec_MPEG2,
+  cudaVideoCodec_MPEG4,
+  cudaVideoCodec_VC1,
+  cudaVideoCodec_H264,
+  cudaVideoCodec_JPEG,
+  cudaVideoCodec_H264_SVC,
+  cudaVideoCodec_H264_MVC,
+  cudaVideoCodec_HEVC,
+  cudaVideoCodec_VP8,
+  cudaVideoCodec_VP9,
+  cudaVideoCodec_NumCodecs
+} cudaVideoCodec;
+#else
+#include "cuviddec.h"
+#endif
+
 struct PacketData {
   int64_t pts;
   int64_t dts;
   uint64_t pos;
   uint64_t bsl;
   uint64_t duration;
+  uint64_t key;
+};
+
+/* One video packet of the demuxer's packet index, in decode order;
+ */
+struct PacketIndexEntry {
+  int64_t pts;
+  int64_t dts;
+  int64_t pos;
+  uint64_t key;
 };
 
 struct VideoContext {
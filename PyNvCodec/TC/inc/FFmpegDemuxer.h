@@ -27,8 +27,10 @@ extern "C" {
 
 #include "CodecsSupport.hpp"
 #include "NvCodecUtils.h"
+#ifndef TC_CPU_ONLY
 #include "cuviddec.h"
 #include "nvcuvid.h"
+#endif
 #include <map>
 #include <stdexcept>
 #include <string>
@@ -185,6 +187,17 @@ class DllExport FFmpegDemuxer
   std::vector<uint8_t> annexbBytes;
   std::vector<uint8_t> seiBytes;
 
+  /* Every video packet in decode order and positions of those packets
+   * sorted by pts, so frame number maps straight to its packet. Empty
+   * until index is built or loaded;
+   */
+  std::vector<PacketIndexEntry> packet_index;
+  std::vector<uint32_t> frame_order;
+
+  bool Rewind();
+
+  void SetIndex(std::vector<PacketIndexEntry>& entries);
+
   explicit FFmpegDemuxer(AVFormatContext* fmtcx);
 
   AVFormatContext*
@@ -239,6 +252,22 @@ public:
 
   void Flush();
 
+  /* Reads whole video stream once and indexes every packet. Seek then
+   * jumps straight to the GOP of requested frame. Demuxer is rewound to the
+   * beginning afterwards;
+   */
+  bool BuildIndex();
+
+  bool SaveIndex(const std::string& path) const;
+
+  /* Loads index saved by SaveIndex(). Sidecar is only used if input size,
+   * video stream duration and hash of first and last 64 KiB of input match
+   * the ones it was saved with;
+   */
+  bool LoadIndex(const std::string& path);
+
+  const std::vector<PacketIndexEntry>& GetIndex() const;
+
   static int ReadPacket(void* opaque, uint8_t* pBuf, int nBuf);
 };
 
@@ -15,9 +15,17 @@
 
 #pragma once
 
+#include "AllocTracker.hpp"
 #include "TC_CORE.hpp"
+#ifdef TC_CPU_ONLY
+/* CPU-only build has no CUDA headers; Buffer keeps its context argument, so
+ * the handle is declared the way cuda.h does it;
+ */
+typedef struct CUctx_st *CUcontext;
+#else
 #include "nvEncodeAPI.h"
 #include <cuda.h>
+#endif
 
 using namespace VPF;
 
@@ -73,7 +81,12 @@ public:
   void *GetRawMemPtr();
   const void *GetRawMemPtr() const;
   size_t GetRawMemSize() const;
+  /* Content of owned memory is undefined after Update() without newPtr
+   * and after allocation, pooled blocks keep their old data;
+   */
   void Update(size_t newSize, void *newPtr = nullptr);
+  // Zero-fills the buffer, for callers which need cleared memory;
+  void Clear();
   bool CopyFrom(size_t size, void const *ptr);
   template <typename T> T *GetDataAs() { return (T *)GetRawMemPtr(); }
   template <typename T> T const *GetDataAs() const {
@@ -98,13 +111,82 @@ private:
 
   bool own_memory = true;
   size_t mem_size = 0UL;
+  // Size of owned allocation, mem_size never exceeds it;
+  size_t capacity = 0UL;
   void *pRawData = nullptr;
   CUcontext context = nullptr;
+  // Allocation id given by AllocTracker;
+  uint32_t alloc_id = 0U;
 #ifdef TRACK_TOKEN_ALLOCATIONS
   uint32_t id;
 #endif
 };
 
+/* Counters of the pool which backs Buffer memory;
+ */
+struct BufferPoolStats {
+  // Blocks handed out and how many of them were reused;
+  uint64_t acquires;
+  uint64_t hits;
+  // Blocks allocated from the system and given back to it;
+  uint64_t system_allocs;
+  uint64_t system_frees;
+  // Bytes held by buffers and bytes cached for reuse;
+  uint64_t bytes_in_use;
+  uint64_t bytes_cached;
+};
+
+/* Size-class pool of pageable host memory; Buffer draws owned memory from
+ * it and returns it there, so tasks which re-make their buffers don't go
+ * to the system allocator every time;
+ * Released blocks are cached per size class up to max_cached_bytes;
+ * Page-locked memory (Buffer with CUDA context) isn't pooled;
+ */
+class DllExport BufferPool {
+public:
+  BufferPool(const BufferPool &other) = delete;
+  BufferPool &operator=(const BufferPool &other) = delete;
+
+  static const size_t default_max_cached_bytes = 256U * 1024U * 1024U;
+
+  static BufferPool &Instance();
+
+  /* Returns block of at least size bytes, capacity is set to its actual
+   * size; Block content is undefined;
+   */
+  void *Acquire(size_t size, size_t &capacity);
+
+  /* Takes back block returned by Acquire();
+   */
+  void Release(void *ptr, size_t capacity);
+
+  /* With enabled = false blocks go straight to and from the system;
+   * page_aligned aligns blocks to memory pages, huge_pages aligns blocks of
+   * 2 MiB and bigger to 2 MiB and asks kernel to back them with huge pages
+   * (Linux only); Cached blocks are freed;
+   */
+  void Configure(bool enabled, bool page_aligned, bool huge_pages,
+                 size_t max_cached_bytes);
+
+  /* Frees all cached blocks;
+   */
+  void Trim();
+
+  BufferPoolStats GetStats();
+
+private:
+  BufferPool();
+  struct BufferPoolImpl *pImpl = nullptr;
+};
+
+#ifdef TRACK_TOKEN_ALLOCATIONS
+/* Returns true if allocation counters are equal to zero, false otherwise;
+ * If you want to check for dangling pointers, call this function at exit;
+ */
+bool DllExport CheckAllocationCounters();
+#endif
+
+#ifndef TC_CPU_ONLY
 class DllExport CudaBuffer final : public Token {
 public:
   CudaBuffer() = delete;
@@ -129,6 +211,7 @@ private:
   CUcontext ctx = nullptr;
   size_t elem_size = 0U;
   size_t num_elems = 0U;
+  uint32_t alloc_id = 0U;
 
 #ifdef TRACK_TOKEN_ALLOCATIONS
   uint64_t id = 0U;
@@ -168,6 +251,8 @@ struct DllExport SurfacePlane {
   uint32_t elemSize = 0U;
 
   bool ownMem = false;
+  // Allocation id given by AllocTracker;
+  uint32_t allocId = 0U;
 
   /* Blank plane, zero size;
    */
@@ -601,13 +686,6 @@ public:
   Surface *Create() override;
 };
 
-#ifdef TRACK_TOKEN_ALLOCATIONS
-/* Returns true if allocation counters are equal to zero, false otherwise;
- * If you want to check for dangling pointers, call this function at exit;
- */
-bool DllExport CheckAllocationCounters();
-#endif
-
 /* 32-bit float RGB image;
  */
 class DllExport SurfaceRGB32F : public Surface {
@@ -676,4 +754,5 @@ protected:
   SurfacePlane plane;
 };
 
+#endif
 } // namespace VPF
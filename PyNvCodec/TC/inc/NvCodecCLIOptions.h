@@ -13,19 +13,23 @@
 
 #pragma once
 #include "TC_CORE.hpp"
-#include "nvEncodeAPI.h"
 #include <map>
 #include <string>
 
+#ifndef TC_CPU_ONLY
+#include "nvEncodeAPI.h"
+
 #define CHECK_API_VERSION(major, minor)                                        \
   ((major < NVENCAPI_MAJOR_VERSION) ||                                         \
    (major == NVENCAPI_MAJOR_VERSION) && (minor <= NVENCAPI_MINOR_VERSION))
+#endif
 
 extern "C" {
 struct AVDictionary;
 }
 
 namespace VPF {
+#ifndef TC_CPU_ONLY
 class DllExport NvEncoderClInterface {
 public:
   explicit NvEncoderClInterface(const std::map<std::string, std::string> &);
@@ -57,6 +61,7 @@ private:
 
   std::map<std::string, std::string> options;
 };
+#endif
 
 class DllExport NvDecoderClInterface {
 public:
@@ -14,18 +14,23 @@
 #pragma once
 #include <assert.h>
 #include <chrono>
-#include <cuda_runtime.h>
 #include <iomanip>
 #include <stdint.h>
 #include <string.h>
 #include <sys/stat.h>
 #include <thread>
 
+#ifndef TC_CPU_ONLY
+#include <cuda_runtime.h>
+#endif
+
 #ifndef _WIN32
 #define _stricmp strcasecmp
 #endif
 
+#ifndef TC_CPU_ONLY
 void ResizeNv12(unsigned char *dpDstNv12, int nDstPitch, int nDstWidth,
                 int nDstHeight, unsigned char *dpSrcNv12, int nSrcPitch,
                 int nSrcWidth, int nSrcHeight,
-                unsigned char *dpDstNv12UV = nullptr, cudaStream_t S = 0);
\ No newline at end of file
+                unsigned char *dpDstNv12UV = nullptr, cudaStream_t S = 0);
+#endif
\ No newline at end of file
@@ -16,8 +16,13 @@
 #include "MemoryInterfaces.hpp"
 #include "NvCodecCLIOptions.h"
 #include "TC_CORE.hpp"
+#include <string>
+#include <vector>
+
+#ifndef TC_CPU_ONLY
 #include "cuviddec.h"
 #include "nvcuvid.h"
+#endif
 
 extern "C" {
 #include <libavutil/frame.h>
@@ -50,6 +55,8 @@ public:
   ~NvtxMark() { NVTX_POP }
 };
 
+// CPU-only build has FFmpeg demuxer and decoder tasks only;
+#ifndef TC_CPU_ONLY
 class DllExport NvencEncodeFrame final : public Task
 {
 public:
@@ -105,6 +112,7 @@ private:
                    uint32_t coded_width, uint32_t coded_height,
                    Pixel_Format format);
 };
+#endif
 
 class DllExport FfmpegDecodeFrame final : public Task
 {
@@ -115,6 +123,11 @@ public:
 
   TaskExecStatus Run() final;
   TaskExecStatus GetSideData(AVFrameSideDataType);
+  // Size of decoded frame as stored in output buffer, 0 if unknown;
+  size_t GetFrameSize() const;
+  // Decoded frame dimensions as known to codec context;
+  uint32_t GetWidth() const;
+  uint32_t GetHeight() const;
 
   ~FfmpegDecodeFrame() final;
   static FfmpegDecodeFrame* Make(const char* URL,
@@ -129,6 +142,7 @@ private:
   FfmpegDecodeFrame(const char* URL, NvDecoderClInterface& cli_iface);
 };
 
+#ifndef TC_CPU_ONLY
 class DllExport CudaUploadFrame final : public Task
 {
 public:
@@ -212,6 +226,7 @@ private:
   static const uint32_t numOutputs = 1U;
   struct DownloadCudaBuffer_Impl* pImpl = nullptr;
 };
+#endif
 
 class DllExport DemuxFrame final : public Task
 {
@@ -222,6 +237,10 @@ public:
 
   void GetParams(struct MuxingParams& params) const;
   void Flush();
+  bool BuildIndex();
+  bool SaveIndex(const std::string& path) const;
+  bool LoadIndex(const std::string& path);
+  const std::vector<PacketIndexEntry>& GetIndex() const;
   TaskExecStatus Run() final;
   ~DemuxFrame() final;
   static DemuxFrame* Make(std::istream& i_str, const char** ffmpeg_options,
@@ -238,6 +257,7 @@ private:
   struct DemuxFrame_Impl* pImpl = nullptr;
 };
 
+#ifndef TC_CPU_ONLY
 class DllExport ConvertSurface final : public Task
 {
 public:
@@ -285,4 +305,5 @@ private:
   ResizeSurface(uint32_t width, uint32_t height, Pixel_Format format,
                 CUcontext ctx, CUstream str);
 };
+#endif
 } // namespace VPF
\ No newline at end of file
@@ -0,0 +1,213 @@
+/*
+ * Copyright 2019 NVIDIA Corporation
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "MemoryInterfaces.hpp"
+#include <cstdlib>
+#include <map>
+#include <mutex>
+#include <new>
+#include <vector>
+
+#if defined(_WIN32)
+#include <malloc.h>
+#elif defined(__linux__)
+#include <sys/mman.h>
+#endif
+
+using namespace VPF;
+using namespace std;
+
+namespace VPF {
+// Smallest block and smallest size class above which classes get denser;
+static const size_t min_block_size = 64U;
+static const size_t min_dense_class = 64U * 1024U;
+
+static const size_t page_size = 4096U;
+static const size_t huge_page_size = 2U * 1024U * 1024U;
+
+/* Up to 64 KiB size classes are powers of two; Above that every power of
+ * two range is split into 4 classes, so big frames waste 25% at most;
+ */
+static size_t SizeClass(size_t size)
+{
+  size_t pow2 = min_block_size;
+  while (pow2 < size) {
+    pow2 <<= 1;
+  }
+
+  if (pow2 <= min_dense_class) {
+    return pow2;
+  }
+
+  auto const step = pow2 / 8U;
+  return (size + step - 1U) / step * step;
+}
+
+static void* AlignedAlloc(size_t size, size_t alignment)
+{
+#if defined(_WIN32)
+  return _aligned_malloc(size, alignment);
+#else
+  void* ptr = nullptr;
+  return posix_memalign(&ptr, alignment, size) ? nullptr : ptr;
+#endif
+}
+
+static void AlignedFree(void* ptr)
+{
+#if defined(_WIN32)
+  _aligned_free(ptr);
+#else
+  free(ptr);
+#endif
+}
+
+struct BufferPoolImpl {
+  mutex guard;
+  BufferPoolStats stats = {0};
+  // Size class -> cached blocks of that size;
+  map<size_t, vector<void*>> free_blocks;
+
+  bool enabled = true;
+  bool page_aligned = false;
+  bool huge_pages = false;
+  size_t max_cached_bytes = BufferPool::default_max_cached_bytes;
+
+  size_t BlockSize(size_t size) const
+  {
+    if (huge_pages && size >= huge_page_size) {
+      return (size + huge_page_size - 1U) / huge_page_size * huge_page_size;
+    }
+    return enabled ? SizeClass(size) : size;
+  }
+
+  void* SystemAlloc(size_t size)
+  {
+    auto alignment = page_aligned ? page_size : min_block_size;
+    if (huge_pages && size >= huge_page_size) {
+      alignment = huge_page_size;
+    }
+
+    auto ptr = AlignedAlloc(size, alignment);
+    if (!ptr) {
+      throw bad_alloc();
+    }
+
+#if defined(__linux__) && defined(MADV_HUGEPAGE)
+    if (huge_pages && size >= huge_page_size) {
+      // Only a hint, blocks still work with regular pages;
+      madvise(ptr, size, MADV_HUGEPAGE);
+    }
+#endif
+
+    stats.system_allocs++;
+    return ptr;
+  }
+
+  void SystemFree(void* ptr)
+  {
+    AlignedFree(ptr);
+    stats.system_frees++;
+  }
+
+  void Trim()
+  {
+    for (auto& size_class : free_blocks) {
+      for (auto ptr : size_class.second) {
+        SystemFree(ptr);
+      }
+    }
+    free_blocks.clear();
+    stats.bytes_cached = 0U;
+  }
+};
+} // namespace VPF
+
+const size_t BufferPool::default_max_cached_bytes;
+
+BufferPool::BufferPool() : pImpl(new BufferPoolImpl) {}
+
+BufferPool& BufferPool::Instance()
+{
+  /* Never destroyed, so buffers released during static destruction still
+   * have the pool to go to;
+   */
+  static auto* pool = new BufferPool;
+  return *pool;
+}
+
+void* BufferPool::Acquire(size_t size, size_t& capacity)
+{
+  lock_guard<mutex> lock(pImpl->guard);
+  capacity = pImpl->BlockSize(size);
+  pImpl->stats.acquires++;
+  pImpl->stats.bytes_in_use += capacity;
+
+  auto it = pImpl->free_blocks.find(capacity);
+  if (it != pImpl->free_blocks.end() && !it->second.empty()) {
+    auto ptr = it->second.back();
+    it->second.pop_back();
+    pImpl->stats.hits++;
+    pImpl->stats.bytes_cached -= capacity;
+    return ptr;
+  }
+
+  try {
+    return pImpl->SystemAlloc(capacity);
+  } catch (bad_alloc&) {
+    pImpl->stats.bytes_in_use -= capacity;
+    throw;
+  }
+}
+
+void BufferPool::Release(void* ptr, size_t capacity)
+{
+  if (!ptr) {
+    return;
+  }
+
+  lock_guard<mutex> lock(pImpl->guard);
+  pImpl->stats.bytes_in_use -= capacity;
+
+  auto const cached = pImpl->stats.bytes_cached + capacity;
+  if (!pImpl->enabled || cached > pImpl->max_cached_bytes) {
+    pImpl->SystemFree(ptr);
+    return;
+  }
+
+  pImpl->free_blocks[capacity].push_back(ptr);
+  pImpl->stats.bytes_cached = cached;
+}
+
+void BufferPool::Configure(bool enabled, bool page_aligned, bool huge_pages,
+                           size_t max_cached_bytes)
+{
+  lock_guard<mutex> lock(pImpl->guard);
+  pImpl->Trim();
+  pImpl->enabled = enabled;
+  pImpl->page_aligned = page_aligned;
+  pImpl->huge_pages = huge_pages;
+  pImpl->max_cached_bytes = max_cached_bytes;
+}
+
+void BufferPool::Trim()
+{
+  lock_guard<mutex> lock(pImpl->guard);
+  pImpl->Trim();
+}
+
+BufferPoolStats BufferPool::GetStats()
+{
+  lock_guard<mutex> lock(pImpl->guard);
+  return pImpl->stats;
+}
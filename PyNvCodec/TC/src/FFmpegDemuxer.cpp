@@ -15,8 +15,12 @@
 #include "NvCodecUtils.h"
 #include "libavutil/avstring.h"
 #include "libavutil/avutil.h"
+#include <algorithm>
+#include <cstring>
+#include <fstream>
 #include <iostream>
 #include <limits>
+#include <numeric>
 #include <sstream>
 
 using namespace std;
@@ -220,6 +224,7 @@ bool FFmpegDemuxer::Demux(uint8_t *&pVideo, size_t &rVideoBytes,
   last_packet_data.dts = pktDst.dts;
   last_packet_data.pos = pktDst.pos;
   last_packet_data.duration = pktDst.duration;
+  last_packet_data.key = (pktDst.flags & AV_PKT_FLAG_KEY) ? 1U : 0U;
 
   pktData = last_packet_data;
 
@@ -312,6 +317,78 @@ bool FFmpegDemuxer::Seek(SeekContext &seekCtx, uint8_t *&pVideo,
     };
   };
 
+  // Jump straight to the key frame that starts target frame's GOP;
+  auto seek_by_index = [&](PacketData &pkt_data, SeekContext &seek_ctx) {
+    size_t target = 0U;
+    switch (seek_ctx.crit) {
+    case BY_NUMBER:
+      if (seek_ctx.seek_frame >= frame_order.size()) {
+        cerr << "Frame " << seek_ctx.seek_frame << " is past the end of "
+             << frame_order.size() << " indexed frames." << endl;
+        return false;
+      }
+      target = frame_order[seek_ctx.seek_frame];
+      break;
+    case BY_TIMESTAMP: {
+      // Last frame with pts not past requested timestamp;
+      auto const ts = ts_from_time(seek_ctx.seek_frame);
+      auto it = upper_bound(frame_order.begin(), frame_order.end(), ts,
+                            [&](int64_t value, uint32_t i) {
+                              return value < packet_index[i].pts;
+                            });
+      target = (frame_order.begin() == it) ? frame_order.front() : *(it - 1);
+      break;
+    }
+    default:
+      throw runtime_error("Invalid seek criteria");
+      break;
+    }
+
+    size_t key = target;
+    while (key > 0U && !packet_index[key].key) {
+      key--;
+    }
+
+    /* Seek never lands past the key frame but may land on earlier one,
+     * packets before the one we need are skipped;
+     */
+    auto const stop =
+        packet_index[(EXACT_FRAME == seek_ctx.mode) ? target : key].dts;
+    auto ret = avformat_seek_file(fmtc, GetVideoStreamIndex(), INT64_MIN,
+                                  packet_index[key].dts,
+                                  packet_index[key].dts, 0);
+    if (ret < 0) {
+      throw runtime_error("Error seeking for frame: " + AvErrorToString(ret));
+    }
+
+    bool rewound = false;
+    while (true) {
+      if (!Demux(pVideo, rVideoBytes, pkt_data, ppSEI, pSEIBytes)) {
+        return false;
+      }
+
+      if (pkt_data.dts == stop) {
+        break;
+      }
+
+      // Container index disagrees with ours, scan from the start;
+      if (pkt_data.dts > stop) {
+        if (rewound || !Rewind()) {
+          return false;
+        }
+        rewound = true;
+      }
+    }
+
+    seek_ctx.out_frame_pts = pkt_data.pts;
+    seek_ctx.out_frame_duration = pkt_data.duration;
+    return true;
+  };
+
+  if (!packet_index.empty()) {
+    return seek_by_index(pktData, seekCtx);
+  }
+
   // This will seek for exact frame number;
   // Note that decoder may not be able to decode such frame;
   auto seek_for_exact_frame = [&](PacketData &pkt_data,
@@ -367,6 +444,203 @@ bool FFmpegDemuxer::Seek(SeekContext &seekCtx, uint8_t *&pVideo,
   return true;
 }
 
+bool FFmpegDemuxer::Rewind()
+{
+  auto const stream = fmtc->streams[videoStream];
+  auto const start_ts =
+      (AV_NOPTS_VALUE != stream->start_time) ? stream->start_time : 0;
+
+  auto ret = av_seek_frame(fmtc, videoStream, start_ts, AVSEEK_FLAG_BACKWARD);
+  if (ret < 0) {
+    cerr << "Failed to rewind: " << AvErrorToString(ret) << endl;
+    return false;
+  }
+
+  memset(&last_packet_data, 0, sizeof(last_packet_data));
+  return true;
+}
+
+void FFmpegDemuxer::SetIndex(vector<PacketIndexEntry>& entries)
+{
+  packet_index.swap(entries);
+
+  frame_order.resize(packet_index.size());
+  iota(frame_order.begin(), frame_order.end(), 0U);
+  stable_sort(frame_order.begin(), frame_order.end(),
+              [&](uint32_t a, uint32_t b) {
+                return packet_index[a].pts < packet_index[b].pts;
+              });
+}
+
+bool FFmpegDemuxer::BuildIndex()
+{
+  if (!is_seekable) {
+    cerr << "Index can't be built for input that doesn't support seek."
+         << endl;
+    return false;
+  }
+
+  if (!Rewind()) {
+    return false;
+  }
+
+  vector<PacketIndexEntry> entries;
+  AVPacket pkt;
+  av_init_packet(&pkt);
+  pkt.data = nullptr;
+  pkt.size = 0;
+
+  bool has_timestamps = true;
+  while (av_read_frame(fmtc, &pkt) >= 0) {
+    if (pkt.stream_index == videoStream && pkt.size) {
+      PacketIndexEntry entry;
+      entry.dts = pkt.dts;
+      entry.pts = (AV_NOPTS_VALUE != pkt.pts) ? pkt.pts : pkt.dts;
+      entry.pos = pkt.pos;
+      entry.key = (pkt.flags & AV_PKT_FLAG_KEY) ? 1U : 0U;
+      has_timestamps = has_timestamps && (AV_NOPTS_VALUE != pkt.dts);
+      entries.push_back(entry);
+    }
+    av_packet_unref(&pkt);
+  }
+
+  if (!Rewind()) {
+    return false;
+  }
+
+  if (!has_timestamps) {
+    cerr << "Index needs dts on every video packet." << endl;
+    return false;
+  }
+
+  SetIndex(entries);
+  return true;
+}
+
+/* Sidecar layout: header followed by raw PacketIndexEntry array. Input
+ * size, video stream duration and hash of input head and tail are kept to
+ * tell stale sidecars apart;
+ */
+struct PacketIndexHeader {
+  char magic[8];
+  uint64_t num_entries;
+  int64_t input_size;
+  int64_t duration;
+  uint64_t input_hash;
+};
+
+static const char packet_index_magic[8] = "VPFIDX2";
+
+// Bytes hashed at the beginning and at the end of input;
+static const int64_t input_hash_span = 64 * 1024;
+
+/* FNV-1a hash of first and last input_hash_span bytes of input; Input
+ * position is restored afterwards, so demuxing carries on where it was;
+ */
+static bool HashInput(AVIOContext* pb, uint64_t& hash)
+{
+  auto const input_size = avio_size(pb);
+  auto const position = avio_tell(pb);
+  if (input_size < 0 || position < 0) {
+    return false;
+  }
+
+  hash = 14695981039346656037ULL;
+  vector<uint8_t> span(input_hash_span);
+  const int64_t offsets[] = {0,
+                             max<int64_t>(0, input_size - input_hash_span)};
+  bool read_ok = true;
+  for (auto offset : offsets) {
+    if (avio_seek(pb, offset, SEEK_SET) < 0) {
+      read_ok = false;
+      break;
+    }
+
+    auto const num_read = avio_read(pb, span.data(), (int)span.size());
+    for (int i = 0; i < num_read; i++) {
+      hash = (hash ^ span[i]) * 1099511628211ULL;
+    }
+  }
+
+  return avio_seek(pb, position, SEEK_SET) >= 0 && read_ok;
+}
+
+bool FFmpegDemuxer::SaveIndex(const string& path) const
+{
+  if (packet_index.empty()) {
+    cerr << "No index to save." << endl;
+    return false;
+  }
+
+  PacketIndexHeader header;
+  memcpy(header.magic, packet_index_magic, sizeof(header.magic));
+  header.num_entries = packet_index.size();
+  header.input_size = avio_size(fmtc->pb);
+  header.duration = fmtc->streams[videoStream]->duration;
+  if (!HashInput(fmtc->pb, header.input_hash)) {
+    cerr << "Failed to hash input, index isn't saved." << endl;
+    return false;
+  }
+
+  ofstream out(path, ios::binary);
+  out.write((const char*)&header, sizeof(header));
+  out.write((const char*)packet_index.data(),
+            packet_index.size() * sizeof(PacketIndexEntry));
+  return out.good();
+}
+
+bool FFmpegDemuxer::LoadIndex(const string& path)
+{
+  if (!is_seekable) {
+    cerr << "Index can't be used for input that doesn't support seek."
+         << endl;
+    return false;
+  }
+
+  ifstream in(path, ios::binary | ios::ate);
+  auto const sidecar_size = (int64_t)in.tellg();
+  in.seekg(0, ios::beg);
+
+  PacketIndexHeader header;
+  if (!in.read((char*)&header, sizeof(header))) {
+    return false;
+  }
+
+  uint64_t input_hash = 0U;
+  if (0 != memcmp(header.magic, packet_index_magic, sizeof(header.magic)) ||
+      header.input_size != avio_size(fmtc->pb) ||
+      header.duration != fmtc->streams[videoStream]->duration ||
+      !HashInput(fmtc->pb, input_hash) || header.input_hash != input_hash) {
+    cerr << path << " doesn't match the input, index isn't loaded." << endl;
+    return false;
+  }
+
+  /* Entry count comes from the file, check it against what the file holds
+   * before allocating for it;
+   */
+  auto const entries_size = (uint64_t)(sidecar_size - sizeof(header));
+  if (header.num_entries != entries_size / sizeof(PacketIndexEntry) ||
+      0U != entries_size % sizeof(PacketIndexEntry)) {
+    cerr << path << " is truncated or corrupted, index isn't loaded."
+         << endl;
+    return false;
+  }
+
+  vector<PacketIndexEntry> entries(header.num_entries);
+  if (!in.read((char*)entries.data(),
+               entries.size() * sizeof(PacketIndexEntry))) {
+    return false;
+  }
+
+  SetIndex(entries);
+  return true;
+}
+
+const vector<PacketIndexEntry>& FFmpegDemuxer::GetIndex() const
+{
+  return packet_index;
+}
+
 int FFmpegDemuxer::ReadPacket(void* opaque, uint8_t* pBuf, int nBuf)
 {
   return 0;
@@ -12,6 +12,7 @@
  */
 
 #include "Tasks.hpp"
+#include <deque>
 #include <iostream>
 #include <sstream>
 #include <stdexcept>
@@ -63,14 +64,58 @@ struct FfmpegDecodeFrame_Impl {
   Buffer* dec_frame = nullptr;
   map<AVFrameSideDataType, Buffer*> side_data;
 
+  // Decoded frames not handed out yet, in output order;
+  deque<AVFrame*> ready_frames;
+  vector<AVFrame*> free_frames;
+
   int video_stream_idx = -1;
+  // Demuxer reached EOF, decoder was flushed;
   bool end_encode = false;
+  // Decoder has no more frames to output;
+  bool end_decode = false;
+
+  // Threading options go to the codec context, not to avformat;
+  int thread_count = -1;
+  int thread_type = -1;
+
+  // Take "threads" and "thread_type" out of options dictionary;
+  void TakeThreadingOptions(AVDictionary** pOptions)
+  {
+    auto entry = av_dict_get(*pOptions, "threads", nullptr, 0);
+    if (entry) {
+      // 0 lets libavcodec pick thread count;
+      thread_count = stoi(entry->value);
+      av_dict_set(pOptions, "threads", nullptr, 0);
+    }
+
+    entry = av_dict_get(*pOptions, "thread_type", nullptr, 0);
+    if (entry) {
+      string value(entry->value);
+      if ("frame" == value) {
+        thread_type = FF_THREAD_FRAME;
+      } else if ("slice" == value) {
+        thread_type = FF_THREAD_SLICE;
+      } else if ("auto" == value) {
+        thread_type = FF_THREAD_FRAME | FF_THREAD_SLICE;
+      } else if ("none" == value) {
+        thread_type = 0;
+      } else {
+        stringstream ss;
+        ss << "Unsupported thread_type " << value
+           << ", use frame, slice, auto or none" << endl;
+        throw invalid_argument(ss.str());
+      }
+      av_dict_set(pOptions, "thread_type", nullptr, 0);
+    }
+  }
 
   FfmpegDecodeFrame_Impl(const char* URL, AVDictionary* pOptions)
   {
 
     av_register_all();
 
+    TakeThreadingOptions(&pOptions);
+
     auto res = avformat_open_input(&fmt_ctx, URL, NULL, &pOptions);
     if (res < 0) {
       stringstream ss;
@@ -117,6 +162,13 @@ struct FfmpegDecodeFrame_Impl {
       throw runtime_error(ss.str());
     }
 
+    if (thread_count >= 0) {
+      avctx->thread_count = thread_count;
+    }
+    if (thread_type >= 0) {
+      avctx->thread_type = thread_type;
+    }
+
     res = avcodec_open2(avctx, p_codec, &pOptions);
     if (res < 0) {
       stringstream ss;
@@ -134,30 +186,62 @@ struct FfmpegDecodeFrame_Impl {
     }
   }
 
+  // Copy plane to packed destination, return pointer past copied data;
+  // Planes without row padding are copied at once;
+  static uint8_t* CopyPlane(uint8_t* dst, const uint8_t* src, int width,
+                            int height, int linesize)
+  {
+    if (width == linesize) {
+      auto const plane_size = (size_t)width * height;
+      memcpy(dst, src, plane_size);
+      return dst + plane_size;
+    }
+
+    for (int i = 0; i < height; i++) {
+      memcpy(dst, src, width);
+      dst += width;
+      src += linesize;
+    }
+
+    return dst;
+  }
+
+  /* Size of frame packed by SaveYUV420(), SaveYUV422() or SaveYUV444();
+   * 0 for pixel formats which aren't supported;
+   */
+  static size_t GetFrameSize(int format, int width, int height)
+  {
+    auto const luma_size = (size_t)width * height;
+    switch (format) {
+    case AV_PIX_FMT_YUV420P:
+      return luma_size * 3 / 2;
+    case AV_PIX_FMT_YUV422P:
+      return luma_size * 2;
+    case AV_PIX_FMT_YUV444P:
+      return luma_size * 3;
+    default:
+      return 0U;
+    }
+  }
+
   bool SaveYUV420(AVFrame* pframe)
   {
-    size_t size = frame->width * frame->height * 3 / 2;
+    size_t size = pframe->width * pframe->height * 3 / 2;
 
     if (!dec_frame) {
       dec_frame = Buffer::MakeOwnMem(size);
     } else if (size != dec_frame->GetRawMemSize()) {
-      delete dec_frame;
-      dec_frame = Buffer::MakeOwnMem(size);
+      dec_frame->Update(size);
     }
 
     auto plane = 0U;
     auto* dst = dec_frame->GetDataAs<uint8_t>();
 
     for (plane = 0; plane < 3; plane++) {
-      auto* src = frame->data[plane];
-      auto width = (0 == plane) ? frame->width : frame->width / 2;
-      auto height = (0 == plane) ? frame->height : frame->height / 2;
-
-      for (int i = 0; i < height; i++) {
-        memcpy(dst, src, width);
-        dst += width;
-        src += frame->linesize[plane];
-      }
+      auto width = (0 == plane) ? pframe->width : pframe->width / 2;
+      auto height = (0 == plane) ? pframe->height : pframe->height / 2;
+      dst = CopyPlane(dst, pframe->data[plane], width, height,
+                      pframe->linesize[plane]);
     }
 
     return true;
@@ -165,28 +249,22 @@ struct FfmpegDecodeFrame_Impl {
 
   bool SaveYUV422(AVFrame* pframe)
   {
-    size_t size = frame->width * frame->height * 2;
+    size_t size = pframe->width * pframe->height * 2;
 
     if (!dec_frame) {
       dec_frame = Buffer::MakeOwnMem(size);
     } else if (size != dec_frame->GetRawMemSize()) {
-      delete dec_frame;
-      dec_frame = Buffer::MakeOwnMem(size);
+      dec_frame->Update(size);
     }
 
     auto plane = 0U;
     auto* dst = dec_frame->GetDataAs<uint8_t>();
 
     for (plane = 0; plane < 3; plane++) {
-      auto* src = frame->data[plane];
-      auto width = (0 == plane) ? frame->width : frame->width / 2;
-      auto height = frame->height;
-
-      for (int i = 0; i < height; i++) {
-        memcpy(dst, src, width);
-        dst += width;
-        src += frame->linesize[plane];
-      }
+      auto width = (0 == plane) ? pframe->width : pframe->width / 2;
+      auto height = pframe->height;
+      dst = CopyPlane(dst, pframe->data[plane], width, height,
+                      pframe->linesize[plane]);
     }
 
     return true;
@@ -194,68 +272,88 @@ struct FfmpegDecodeFrame_Impl {
 
   bool SaveYUV444(AVFrame* pframe)
   {
-    size_t size = frame->width * frame->height * 3;
+    size_t size = pframe->width * pframe->height * 3;
 
     if (!dec_frame) {
       dec_frame = Buffer::MakeOwnMem(size);
     } else if (size != dec_frame->GetRawMemSize()) {
-      delete dec_frame;
-      dec_frame = Buffer::MakeOwnMem(size);
+      dec_frame->Update(size);
     }
 
     auto plane = 0U;
     auto* dst = dec_frame->GetDataAs<uint8_t>();
 
     for (plane = 0; plane < 3; plane++) {
-      auto* src = frame->data[plane];
-      auto width = frame->width;
-      auto height = frame->height;
-
-      for (int i = 0; i < height; i++) {
-        memcpy(dst, src, width);
-        dst += width;
-        src += frame->linesize[plane];
-      }
+      dst = CopyPlane(dst, pframe->data[plane], pframe->width, pframe->height,
+                      pframe->linesize[plane]);
     }
 
     return true;
   }
 
+  /* Returns exactly one frame per call. Packets are only sent once every
+   * frame produced by previous ones was handed out, so no frames pile up
+   * inside the decoder;
+   */
   bool DecodeSingleFrame()
   {
-    if (end_encode) {
-      return false;
-    }
-
-    // Send packets to decoder until it outputs frame;
-    do {
-      // Read packets from stream until we find a video packet;
-      do {
-        auto ret = av_read_frame(fmt_ctx, &pktSrc);
-        if (ret < 0) {
-          // Flush decoder;
-          end_encode = true;
-          return DecodeSinglePacket(nullptr);
-        }
-      } while (pktSrc.stream_index != video_stream_idx);
+    while (ready_frames.empty()) {
+      if (end_decode) {
+        return false;
+      }
 
-      auto status = DecodeSinglePacket(&pktSrc);
+      DECODE_STATUS status = DEC_MORE;
+      if (ReadVideoPacket()) {
+        status = DecodeSinglePacket(&pktSrc);
+        av_packet_unref(&pktSrc);
+      } else if (!end_encode) {
+        // Flush decoder;
+        end_encode = true;
+        status = DecodeSinglePacket(nullptr);
+      } else {
+        status = DEC_EOS;
+      }
 
       switch (status) {
-      case DEC_SUCCESS:
-        return true;
       case DEC_ERROR:
         return false;
       case DEC_EOS:
-        return false;
+        end_decode = true;
+        break;
+      case DEC_SUCCESS:
       case DEC_MORE:
-        continue;
+        break;
       }
-    } while (true);
+    }
 
+    auto ready_frame = ready_frames.front();
+    ready_frames.pop_front();
+
+    SaveVideoFrame(ready_frame);
+    SaveSideData(ready_frame);
+
+    av_frame_unref(ready_frame);
+    free_frames.push_back(ready_frame);
     return true;
   }
 
+  // Read packets from stream until we find a video packet;
+  bool ReadVideoPacket()
+  {
+    if (end_encode) {
+      return false;
+    }
+
+    while (av_read_frame(fmt_ctx, &pktSrc) >= 0) {
+      if (pktSrc.stream_index == video_stream_idx) {
+        return true;
+      }
+      av_packet_unref(&pktSrc);
+    }
+
+    return false;
+  }
+
   bool SaveVideoFrame(AVFrame* frame)
   {
     switch (frame->format) {
@@ -281,13 +379,20 @@ struct FfmpegDecodeFrame_Impl {
       auto it = side_data.find(AV_FRAME_DATA_MOTION_VECTORS);
       if (it == side_data.end()) {
         // Add entry if not found (usually upon first call);
-        side_data[AV_FRAME_DATA_MOTION_VECTORS] = Buffer::MakeOwnMem(sd->size);
-        it = side_data.find(AV_FRAME_DATA_MOTION_VECTORS);
-        memcpy(it->second->GetRawMemPtr(), sd->data, sd->size);
-      } else if (it->second->GetRawMemSize() != sd->size) {
-        // Update entry size if changed (e. g. on video resolution change);
+        side_data[AV_FRAME_DATA_MOTION_VECTORS] =
+            Buffer::MakeOwnMem(sd->size, sd->data);
+      } else {
+        /* Buffer only reallocates when side data outgrows it, otherwise
+         * it's copied in place;
+         */
         it->second->Update(sd->size, sd->data);
       }
+    } else {
+      // Frames without vectors (e. g. intra ones) mustn't show stale ones;
+      auto it = side_data.find(AV_FRAME_DATA_MOTION_VECTORS);
+      if (it != side_data.end()) {
+        it->second->Update(0U);
+      }
     }
   }
 
@@ -297,6 +402,9 @@ struct FfmpegDecodeFrame_Impl {
     return true;
   }
 
+  /* Sends packet (nullptr to flush) and moves every frame decoder can
+   * output so far to ready frames queue;
+   */
   DECODE_STATUS DecodeSinglePacket(const AVPacket* pktSrc)
   {
     auto res = avcodec_send_packet(avctx, pktSrc);
@@ -306,25 +414,39 @@ struct FfmpegDecodeFrame_Impl {
       return DEC_ERROR;
     }
 
-    while (res >= 0) {
+    auto const num_ready = ready_frames.size();
+    while (true) {
       res = avcodec_receive_frame(avctx, frame);
       if (res == AVERROR_EOF) {
-        cerr << "Input file is over" << endl;
         return DEC_EOS;
       } else if (res == AVERROR(EAGAIN)) {
-        return DEC_MORE;
+        return ready_frames.size() > num_ready ? DEC_SUCCESS : DEC_MORE;
       } else if (res < 0) {
         cerr << "Error while receiving a frame from the decoder" << endl;
         cerr << "Error description: " << AvErrorToString(res) << endl;
         return DEC_ERROR;
       }
 
-      SaveVideoFrame(frame);
-      SaveSideData(frame);
-      return DEC_SUCCESS;
+      auto ready_frame = AllocFrame();
+      av_frame_move_ref(ready_frame, frame);
+      ready_frames.push_back(ready_frame);
+    }
+  }
+
+  // Reuse frames which were handed out already;
+  AVFrame* AllocFrame()
+  {
+    if (free_frames.empty()) {
+      auto new_frame = av_frame_alloc();
+      if (!new_frame) {
+        throw runtime_error("Could not allocate frame");
+      }
+      return new_frame;
     }
 
-    return DEC_SUCCESS;
+    auto free_frame = free_frames.back();
+    free_frames.pop_back();
+    return free_frame;
   }
 
   ~FfmpegDecodeFrame_Impl()
@@ -332,6 +454,14 @@ struct FfmpegDecodeFrame_Impl {
     avformat_close_input(&fmt_ctx);
     av_frame_free(&frame);
 
+    for (auto& ready_frame : ready_frames) {
+      av_frame_free(&ready_frame);
+    }
+
+    for (auto& free_frame : free_frames) {
+      av_frame_free(&free_frame);
+    }
+
     for (auto& output : side_data) {
       if (output.second) {
         delete output.second;
@@ -358,6 +488,17 @@ TaskExecStatus FfmpegDecodeFrame::Run()
   return TaskExecStatus::TASK_EXEC_FAIL;
 }
 
+size_t FfmpegDecodeFrame::GetFrameSize() const
+{
+  auto const avctx = pImpl->avctx;
+  return FfmpegDecodeFrame_Impl::GetFrameSize(avctx->pix_fmt, avctx->width,
+                                              avctx->height);
+}
+
+uint32_t FfmpegDecodeFrame::GetWidth() const { return pImpl->avctx->width; }
+
+uint32_t FfmpegDecodeFrame::GetHeight() const { return pImpl->avctx->height; }
+
 TaskExecStatus FfmpegDecodeFrame::GetSideData(AVFrameSideDataType data_type)
 {
   SetOutput(nullptr, 1U);
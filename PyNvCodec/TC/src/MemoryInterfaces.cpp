@@ -15,7 +15,9 @@
 
 #include "MemoryInterfaces.hpp"
 #include <cstring>
+#ifndef TC_CPU_ONLY
 #include <cuda_runtime.h>
+#endif
 #include <iostream>
 #include <new>
 #include <sstream>
@@ -191,6 +193,7 @@ Buffer::~Buffer()
 
 size_t Buffer::GetRawMemSize() const { return mem_size; }
 
+#ifndef TC_CPU_ONLY
 static void ThrowOnCudaError(CUresult res, int lineNum = -1)
 {
   if (CUDA_SUCCESS != res) {
@@ -220,18 +223,27 @@ static void ThrowOnCudaError(CUresult res, int lineNum = -1)
     throw runtime_error(ss.str());
   }
 };
+#endif
 
 bool Buffer::Allocate()
 {
   if (GetRawMemSize()) {
     if (context) {
+#ifdef TC_CPU_ONLY
+      throw runtime_error("Page-locked host memory needs CUDA, it isn't "
+                          "available in CPU-only build");
+#else
       CudaCtxPush lock(context);
       auto res = cuMemAllocHost(&pRawData, GetRawMemSize());
       ThrowOnCudaError(res, __LINE__);
+#endif
+      capacity = GetRawMemSize();
     } else {
-      pRawData = calloc(GetRawMemSize(), sizeof(uint8_t));
+      pRawData = BufferPool::Instance().Acquire(GetRawMemSize(), capacity);
     }
 
+    alloc_id = AllocTracker::OnAlloc(context ? "PinnedBuffer" : "Buffer",
+                                     capacity);
     return (nullptr != pRawData);
   }
   return true;
@@ -240,14 +252,22 @@ bool Buffer::Allocate()
 void Buffer::Deallocate()
 {
   if (own_memory) {
+    AllocTracker::OnFree(context ? "PinnedBuffer" : "Buffer", capacity,
+                         alloc_id);
+#ifndef TC_CPU_ONLY
     if (context) {
       auto const res = cuMemFreeHost(pRawData);
       ThrowOnCudaError(res, __LINE__);
     } else {
-      free(pRawData);
+      BufferPool::Instance().Release(pRawData, capacity);
     }
+#else
+    BufferPool::Instance().Release(pRawData, capacity);
+#endif
   }
   pRawData = nullptr;
+  capacity = 0UL;
+  alloc_id = 0U;
 }
 
 void* Buffer::GetRawMemPtr() { return pRawData; }
@@ -256,16 +276,33 @@ const void* Buffer::GetRawMemPtr() const { return pRawData; }
 
 void Buffer::Update(size_t newSize, void* newPtr)
 {
-  Deallocate();
+  if (!own_memory) {
+    mem_size = newSize;
+    pRawData = newPtr;
+    return;
+  }
 
-  mem_size = newSize;
-  if (own_memory) {
-    Allocate();
-    if (newPtr) {
-      memcpy(GetRawMemPtr(), newPtr, newSize);
+  /* Owned memory only grows. Tasks update their output buffers once per
+   * call, so same or smaller sizes must not go to the allocator;
+   */
+  if (newSize > capacity) {
+    Deallocate();
+    mem_size = newSize;
+    if (!Allocate()) {
+      throw bad_alloc();
     }
-  } else {
-    pRawData = newPtr;
+  }
+
+  mem_size = newSize;
+  if (newSize && newPtr) {
+    memcpy(GetRawMemPtr(), newPtr, newSize);
+  }
+}
+
+void Buffer::Clear()
+{
+  if (pRawData && mem_size) {
+    memset(pRawData, 0, mem_size);
   }
 }
 
@@ -295,6 +332,10 @@ Buffer* Buffer::MakeOwnMem(size_t bufferSize, const void* pCopyFrom,
   return new Buffer(bufferSize, pCopyFrom, ctx);
 }
 
+/* Everything below works with video memory and isn't built in CPU-only
+ * build;
+ */
+#ifndef TC_CPU_ONLY
 CudaBuffer* CudaBuffer::Make(size_t elemSize, size_t numElems,
                              CUcontext context)
 {
@@ -335,6 +376,7 @@ bool CudaBuffer::Allocate()
     ThrowOnCudaError(res, __LINE__);
 
     if (0U != gpuMem) {
+      alloc_id = AllocTracker::OnAlloc("CudaBuffer", GetRawMemSize());
 #ifdef TRACK_TOKEN_ALLOCATIONS
       id = CudaBuffersRegister.AddNote(GetRawMemSize());
 #endif
@@ -346,6 +388,8 @@ bool CudaBuffer::Allocate()
 
 void CudaBuffer::Deallocate()
 {
+  AllocTracker::OnFree("CudaBuffer", GetRawMemSize(), alloc_id);
+  alloc_id = 0U;
   ThrowOnCudaError(cuMemFree(gpuMem), __LINE__);
   gpuMem = 0U;
 
@@ -498,6 +542,7 @@ void SurfacePlane::Allocate()
   auto res = cuMemAllocPitch(&gpuMem, &newPitch, width * elemSize, height, 16);
   ThrowOnCudaError(res, __LINE__);
   pitch = newPitch;
+  allocId = AllocTracker::OnAlloc("SurfacePlane", (uint64_t)pitch * height);
 
 #ifdef TRACK_TOKEN_ALLOCATIONS
   id = HWSurfaceRegister.AddNote(GpuMem());
@@ -515,6 +560,9 @@ void SurfacePlane::Deallocate()
   HWSurfaceRegister.DeleteNote(info);
 #endif
 
+  AllocTracker::OnFree("SurfacePlane", (uint64_t)pitch * height, allocId);
+  allocId = 0U;
+
   CudaCtxPush ctxPush(ctx);
   cuMemFree(gpuMem);
 }
@@ -1530,3 +1578,4 @@ SurfacePlane* SurfaceRGB32FPlanar::GetSurfacePlane(uint32_t planeNumber)
 {
   return planeNumber ? nullptr : &plane;
 }
+#endif
@@ -27,6 +27,8 @@ extern "C" {
 using namespace std;
 using namespace VPF;
 
+// Encoder options need Video Codec SDK, decoder options only need FFmpeg;
+#ifndef TC_CPU_ONLY
 namespace VPF {
 /* Some encoding parameters shall be passed from upper level
  * configure functions;
@@ -1230,6 +1232,7 @@ void NvEncoderClInterface::SetupVuiConfig(
     PrintNvEncVuiParameters(params);
   }
 }
+#endif
 
 namespace VPF {
 struct NvDecoderClInterface_Impl {
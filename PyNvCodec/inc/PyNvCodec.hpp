@@ -16,22 +16,27 @@
 
 #pragma once
 
+#include "AllocTracker.hpp"
 #include "MemoryInterfaces.hpp"
 #include "NvCodecCLIOptions.h"
 #include "FFmpegDemuxer.h"
-#include "NvDecoder.h"
 #include "TC_CORE.hpp"
+#include "TaskGraph.hpp"
 #include "Tasks.hpp"
 
 #include <chrono>
-#include <cuda.h>
-#include <cuda_runtime.h>
 #include <mutex>
 #include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <sstream>
 
+#ifndef TC_CPU_ONLY
+#include "NvDecoder.h"
+#include <cuda.h>
+#include <cuda_runtime.h>
+#endif
+
 extern "C" {
 #include <libavutil/frame.h>
 #include <libavutil/motion_vector.h>
@@ -40,13 +45,22 @@ extern "C" {
 using namespace VPF;
 namespace py = pybind11;
 
-struct MotionVector {
-  int source;
-  int w, h;
-  int src_x, src_y;
-  int dst_x, dst_y;
-  int motion_x, motion_y;
-  int motion_scale;
+/* Side data is handed out as is, so NumPy dtype mirrors AVMotionVector
+ * field by field, padding included;
+ */
+typedef AVMotionVector MotionVector;
+
+/* Position of one packet in the byte array returned by
+ * PyFFmpegDemuxer::DemuxPackets() plus its PacketData;
+ */
+struct DemuxedPacket {
+  uint64_t offset;
+  uint64_t size;
+  int64_t pts;
+  int64_t dts;
+  uint64_t pos;
+  uint64_t duration;
+  uint64_t key;
 };
 
 class HwResetException : public std::runtime_error {
@@ -61,6 +75,8 @@ public:
   CuvidParserException() : std::runtime_error("HW reset") {}
 };
 
+// GPU classes, CPU-only build has the FFmpeg demuxer and decoder only;
+#ifndef TC_CPU_ONLY
 class CudaResMgr
 {
   private:
@@ -205,9 +221,12 @@ public:
 
   std::shared_ptr<Surface> Execute(std::shared_ptr<Surface> surface);
 };
+#endif
 
 class PyFFmpegDemuxer {
   std::unique_ptr<DemuxFrame> upDemuxer;
+  // Average packet size of last DemuxPackets() batch, sizes the next one;
+  size_t avgPacketSize = 0U;
 public:
   PyFFmpegDemuxer(const std::string &pathToFile);
 
@@ -216,6 +235,20 @@ public:
 
   bool DemuxSinglePacket(py::array_t<uint8_t> &packet, py::array_t<uint8_t>* sei);
 
+  size_t DemuxSinglePacketInto(py::array_t<uint8_t, py::array::c_style> &packet);
+
+  Buffer *DemuxSinglePacketBuffer(bool need_sei);
+
+  py::tuple DemuxPackets(size_t num_packets);
+
+  bool BuildIndex();
+
+  bool SaveIndex(const std::string &path) const;
+
+  bool LoadIndex(const std::string &path);
+
+  py::array_t<PacketIndexEntry> GetIndex() const;
+
   void GetLastPacketData(PacketData &pkt_data);
 
   bool Seek(SeekContext &ctx, py::array_t<uint8_t> &packet);
@@ -245,8 +278,7 @@ public:
 
 class PyFfmpegDecoder {
   std::unique_ptr<FfmpegDecodeFrame> upDecoder = nullptr;
-
-  void *GetSideData(AVFrameSideDataType data_type, size_t &raw_size);
+  Buffer *pPendingFrame = nullptr;
 
 public:
   PyFfmpegDecoder(const std::string &pathToFile,
@@ -254,9 +286,40 @@ public:
 
   bool DecodeSingleFrame(py::array_t<uint8_t> &frame);
 
+  /* Decodes single frame and returns decoder-owned buffer with it.
+   * Buffer is overwritten (or reallocated on resolution change) by the next
+   * decode call, nullptr is returned on EOF or error;
+   */
+  Buffer *DecodeSingleFrameBuffer();
+
+  /* Decodes up to batch.shape(0) frames into preallocated C-contiguous
+   * array, one frame per first dimension slot. GIL is released for the
+   * whole batch. Returns number of decoded frames, less than batch size
+   * on EOF or error;
+   * Slot size is checked against the stream's frame size before decoding
+   * starts. On resolution change batch stops at the boundary, first frame
+   * of new size is returned by the next decode call;
+   */
+  size_t DecodeBatch(py::array_t<uint8_t, py::array::c_style> &batch);
+
+  /* Frame dimensions, known once the stream is opened and updated on
+   * resolution change, so no separate demuxer is needed for them;
+   */
+  uint32_t Width() const;
+  uint32_t Height() const;
+
+  /* Returns decoder-owned buffer with side data of the last decoded frame.
+   * Like the frame buffer it's overwritten by the next decode call, nullptr
+   * is returned if frame has no such side data;
+   */
+  Buffer *GetSideData(AVFrameSideDataType data_type);
+
+  /* Copies motion vectors of the last decoded frame in one go;
+   */
   py::array_t<MotionVector> GetMotionVectors();
 };
 
+#ifndef TC_CPU_ONLY
 class PyNvDecoder {
   std::unique_ptr<DemuxFrame> upDemuxer;
   std::unique_ptr<NvdecDecodeFrame> upDecoder;
@@ -335,6 +398,48 @@ public:
   void DownloaderLazyInit();
 };
 
+/* Same demux -> decode -> (convert) -> download chain as PyNvDecoder, but
+ * every stage runs on its own thread within TaskGraph, so stages overlap;
+ */
+class PyNvPipelineDecoder {
+  std::unique_ptr<DemuxFrame> upDemuxer;
+  std::unique_ptr<NvdecDecodeFrame> upDecoder;
+  std::unique_ptr<ConvertSurface> upConverter;
+  std::unique_ptr<Buffer> upCtxBuffer;
+  std::unique_ptr<CudaDownloadSurface> upDownloader;
+  static uint32_t const poolFrameSize = 4U;
+  uint32_t width, height;
+  Pixel_Format format;
+
+  struct SurfaceCloneArgs {
+    CUcontext ctx;
+    CUstream str;
+  } cloneArgs;
+
+  static Token *CloneSurface(Token *p_token, void *p_args);
+
+  // Declared last so that worker threads are stopped before tasks are gone;
+  std::unique_ptr<TaskGraph> upGraph;
+
+public:
+  /* outFormat is the downloaded frame format, UNDEFINED keeps decoder
+   * output format; queueSize is the number of frames buffered between
+   * stages;
+   */
+  PyNvPipelineDecoder(const std::string &pathToFile, int gpuOrdinal,
+                      Pixel_Format outFormat, uint32_t queueSize);
+
+  uint32_t Width() const;
+
+  uint32_t Height() const;
+
+  Pixel_Format GetPixelFormat() const;
+
+  bool DecodeSingleFrame(py::array_t<uint8_t> &frame);
+
+  std::vector<TaskGraphStats> GetStats() const;
+};
+
 class PyNvEncoder {
   std::unique_ptr<PyFrameUploader> uploader;
   std::unique_ptr<NvencEncodeFrame> upEncoder;
@@ -411,3 +516,4 @@ public:
 private:
   bool EncodeSingleSurface(struct EncodeContext &ctx);
 };
+#endif
@@ -32,64 +32,174 @@ PyFfmpegDecoder::PyFfmpegDecoder(const string& pathToFile,
   upDecoder.reset(FfmpegDecodeFrame::Make(pathToFile.c_str(), cli_iface));
 }
 
-bool PyFfmpegDecoder::DecodeSingleFrame(py::array_t<uint8_t>& frame)
+Buffer* PyFfmpegDecoder::DecodeSingleFrameBuffer()
 {
+  // Frame held back by DecodeBatch on resolution change goes first;
+  if (pPendingFrame) {
+    auto pRawFrame = pPendingFrame;
+    pPendingFrame = nullptr;
+    return pRawFrame;
+  }
+
   if (TASK_EXEC_SUCCESS == upDecoder->Execute()) {
-    auto pRawFrame = (Buffer*)upDecoder->GetOutput(0U);
-    if (pRawFrame) {
-      auto const frame_size = pRawFrame->GetRawMemSize();
-      if (frame_size != frame.size()) {
-        frame.resize({frame_size}, false);
-      }
+    return (Buffer*)upDecoder->GetOutput(0U);
+  }
+  return nullptr;
+}
 
-      memcpy(frame.mutable_data(), pRawFrame->GetRawMemPtr(), frame_size);
-      return true;
+bool PyFfmpegDecoder::DecodeSingleFrame(py::array_t<uint8_t>& frame)
+{
+  Buffer* pRawFrame = nullptr;
+  {
+    // Decoding doesn't touch Python objects, let other threads run;
+    py::gil_scoped_release gil_release;
+    pRawFrame = DecodeSingleFrameBuffer();
+  }
+
+  if (pRawFrame) {
+    auto const frame_size = pRawFrame->GetRawMemSize();
+    if (frame_size != frame.size()) {
+      frame.resize({frame_size}, false);
     }
+
+    memcpy(frame.mutable_data(), pRawFrame->GetRawMemPtr(), frame_size);
+    return true;
   }
   return false;
 }
 
-void* PyFfmpegDecoder::GetSideData(AVFrameSideDataType data_type,
-                                   size_t& raw_size)
+size_t
+PyFfmpegDecoder::DecodeBatch(py::array_t<uint8_t, py::array::c_style>& batch)
 {
-  if (TASK_EXEC_SUCCESS == upDecoder->GetSideData(data_type)) {
-    auto pSideData = (Buffer*)upDecoder->GetOutput(1U);
-    if (pSideData) {
-      raw_size = pSideData->GetRawMemSize();
-      return pSideData->GetDataAs<void>();
+  if (batch.ndim() < 1 || 0 == batch.shape(0)) {
+    return 0U;
+  }
+
+  auto const batch_size = (size_t)batch.shape(0);
+  auto const slot_size = (size_t)batch.size() / batch_size;
+  /* Checked before anything is decoded, so a wrong batch shape doesn't
+   * throw away frames already decoded into earlier slots;
+   */
+  auto const frame_size = upDecoder->GetFrameSize();
+  if (frame_size != slot_size) {
+    stringstream ss;
+    ss << __FUNCTION__ << ": decoded frames have " << frame_size
+       << " bytes, batch slot has " << slot_size << endl;
+    throw invalid_argument(ss.str());
+  }
+
+  auto dst = batch.mutable_data();
+  size_t num_decoded = 0U;
+
+  py::gil_scoped_release gil_release;
+  for (; num_decoded < batch_size; num_decoded++) {
+    auto pRawFrame = DecodeSingleFrameBuffer();
+    if (!pRawFrame) {
+      break;
+    }
+
+    /* Resolution or pixel format changed mid-stream. Frame is kept for the
+     * next call and batch is cut short at the boundary, like on EOF;
+     */
+    if (pRawFrame->GetRawMemSize() != slot_size) {
+      pPendingFrame = pRawFrame;
+      if (num_decoded) {
+        break;
+      }
+
+      // Nothing decoded yet, 0 would be mistaken for EOF;
+      stringstream ss;
+      ss << __FUNCTION__ << ": decoded frames have "
+         << pRawFrame->GetRawMemSize() << " bytes, batch slot has "
+         << slot_size << endl;
+      throw invalid_argument(ss.str());
     }
+
+    memcpy(dst + num_decoded * slot_size, pRawFrame->GetRawMemPtr(),
+           slot_size);
+  }
+
+  return num_decoded;
+}
+
+uint32_t PyFfmpegDecoder::Width() const { return upDecoder->GetWidth(); }
+
+uint32_t PyFfmpegDecoder::Height() const { return upDecoder->GetHeight(); }
+
+/* Returns read-only view of the decoder's frame buffer, no copy is made.
+ * View holds a reference to the decoder so it never outlives it, but its
+ * content is only valid until the next decode call. Copy the view to keep
+ * the frame. Empty array is returned on EOF or error;
+ */
+static py::array_t<uint8_t> DecodeSingleFrameView(py::object self)
+{
+  auto& decoder = self.cast<PyFfmpegDecoder&>();
+  Buffer* pRawFrame = nullptr;
+  {
+    py::gil_scoped_release gil_release;
+    pRawFrame = decoder.DecodeSingleFrameBuffer();
+  }
+
+  if (!pRawFrame) {
+    return py::array_t<uint8_t>({0});
+  }
+
+  py::array_t<uint8_t> frame({(py::ssize_t)pRawFrame->GetRawMemSize()},
+                             {(py::ssize_t)sizeof(uint8_t)},
+                             pRawFrame->GetDataAs<uint8_t>(), self);
+  py::detail::array_proxy(frame.ptr())->flags &=
+      ~py::detail::npy_api::NPY_ARRAY_WRITEABLE_;
+  return frame;
+}
+
+Buffer* PyFfmpegDecoder::GetSideData(AVFrameSideDataType data_type)
+{
+  if (TASK_EXEC_SUCCESS == upDecoder->GetSideData(data_type)) {
+    return (Buffer*)upDecoder->GetOutput(1U);
   }
   return nullptr;
 }
 
+static size_t NumMotionVectors(Buffer* pSideData)
+{
+  return pSideData ? pSideData->GetRawMemSize() / sizeof(MotionVector) : 0U;
+}
+
 py::array_t<MotionVector> PyFfmpegDecoder::GetMotionVectors()
 {
-  size_t size = 0U;
-  auto ptr = (AVMotionVector*)GetSideData(AV_FRAME_DATA_MOTION_VECTORS, size);
-  size /= sizeof(*ptr);
-
-  if (ptr && size) {
-    py::array_t<MotionVector> mv({size});
-    auto req = mv.request(true);
-    auto mvc = static_cast<MotionVector*>(req.ptr);
-
-    for (auto i = 0; i < req.shape[0]; i++) {
-      mvc[i].source = ptr[i].source;
-      mvc[i].w = ptr[i].w;
-      mvc[i].h = ptr[i].h;
-      mvc[i].src_x = ptr[i].src_x;
-      mvc[i].src_y = ptr[i].src_y;
-      mvc[i].dst_x = ptr[i].dst_x;
-      mvc[i].dst_y = ptr[i].dst_y;
-      mvc[i].motion_x = ptr[i].motion_x;
-      mvc[i].motion_y = ptr[i].motion_y;
-      mvc[i].motion_scale = ptr[i].motion_scale;
-    }
+  auto pSideData = GetSideData(AV_FRAME_DATA_MOTION_VECTORS);
+  auto const num_vectors = NumMotionVectors(pSideData);
+
+  py::array_t<MotionVector> mv({(py::ssize_t)num_vectors},
+                               {(py::ssize_t)sizeof(MotionVector)});
+  if (num_vectors) {
+    memcpy(mv.mutable_data(), pSideData->GetRawMemPtr(),
+           num_vectors * sizeof(MotionVector));
+  }
+
+  return mv;
+}
+
+/* Returns read-only view of the decoder's motion vectors side data, no copy
+ * is made. Same as with DecodeSingleFrameView, content is only valid until
+ * the next decode call. Empty array is returned if frame has no vectors;
+ */
+static py::array_t<MotionVector> GetMotionVectorsView(py::object self)
+{
+  auto& decoder = self.cast<PyFfmpegDecoder&>();
+  auto pSideData = decoder.GetSideData(AV_FRAME_DATA_MOTION_VECTORS);
+  auto const num_vectors = NumMotionVectors(pSideData);
 
-    return move(mv);
+  if (!num_vectors) {
+    return py::array_t<MotionVector>({0});
   }
 
-  return move(py::array_t<MotionVector>({0}));
+  py::array_t<MotionVector> mv({(py::ssize_t)num_vectors},
+                               {(py::ssize_t)sizeof(MotionVector)},
+                               pSideData->GetDataAs<MotionVector>(), self);
+  py::detail::array_proxy(mv.ptr())->flags &=
+      ~py::detail::npy_api::NPY_ARRAY_WRITEABLE_;
+  return mv;
 }
 
 void Init_PyFFMpegDecoder(py::module& m)
@@ -97,6 +207,12 @@ void Init_PyFFMpegDecoder(py::module& m)
   py::class_<PyFfmpegDecoder>(m, "PyFfmpegDecoder")
       .def(py::init<const string&, const map<string, string>&>())
       .def("DecodeSingleFrame", &PyFfmpegDecoder::DecodeSingleFrame)
+      .def("DecodeSingleFrameView", &DecodeSingleFrameView)
+      .def("DecodeBatch", &PyFfmpegDecoder::DecodeBatch,
+           py::arg("batch").noconvert(true))
+      .def("Width", &PyFfmpegDecoder::Width)
+      .def("Height", &PyFfmpegDecoder::Height)
       .def("GetMotionVectors", &PyFfmpegDecoder::GetMotionVectors,
-           py::return_value_policy::move);
+           py::return_value_policy::move)
+      .def("GetMotionVectorsView", &GetMotionVectorsView);
 }
\ No newline at end of file
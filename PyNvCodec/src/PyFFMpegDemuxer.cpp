@@ -43,25 +43,42 @@ PyFFmpegDemuxer::PyFFmpegDemuxer(const string& pathToFile,
       DemuxFrame::Make(pathToFile.c_str(), options.data(), options.size()));
 }
 
-bool PyFFmpegDemuxer::DemuxSinglePacket(py::array_t<uint8_t>& packet,
-                                        py::array_t<uint8_t>* sei)
+Buffer* PyFFmpegDemuxer::DemuxSinglePacketBuffer(bool need_sei)
 {
   upDemuxer->ClearInputs();
   upDemuxer->ClearOutputs();
 
   Buffer* elementaryVideo = nullptr;
   do {
-    if (nullptr != sei) {
+    if (need_sei) {
       upDemuxer->SetInput((Token*)0xdeadbeef, 0U);
     }
 
     if (TASK_EXEC_FAIL == upDemuxer->Execute()) {
       upDemuxer->ClearInputs();
-      return false;
+      return nullptr;
     }
     elementaryVideo = (Buffer*)upDemuxer->GetOutput(0U);
   } while (!elementaryVideo);
 
+  upDemuxer->ClearInputs();
+  return elementaryVideo;
+}
+
+bool PyFFmpegDemuxer::DemuxSinglePacket(py::array_t<uint8_t>& packet,
+                                        py::array_t<uint8_t>* sei)
+{
+  Buffer* elementaryVideo = nullptr;
+  {
+    // Demuxing doesn't touch Python objects, let other threads run;
+    py::gil_scoped_release gil_release;
+    elementaryVideo = DemuxSinglePacketBuffer(nullptr != sei);
+  }
+
+  if (!elementaryVideo) {
+    return false;
+  }
+
   packet.resize({elementaryVideo->GetRawMemSize()}, false);
   memcpy(packet.mutable_data(), elementaryVideo->GetDataAs<void>(),
          elementaryVideo->GetRawMemSize());
@@ -73,10 +90,128 @@ bool PyFFmpegDemuxer::DemuxSinglePacket(py::array_t<uint8_t>& packet,
            seiBuffer->GetRawMemSize());
   }
 
-  upDemuxer->ClearInputs();
   return true;
 }
 
+size_t PyFFmpegDemuxer::DemuxSinglePacketInto(
+    py::array_t<uint8_t, py::array::c_style>& packet)
+{
+  Buffer* elementaryVideo = nullptr;
+  {
+    py::gil_scoped_release gil_release;
+    elementaryVideo = DemuxSinglePacketBuffer(false);
+  }
+
+  if (!elementaryVideo) {
+    return 0U;
+  }
+
+  /* Caller's buffer only grows, so once it fits the largest packet seen
+   * so far demuxing doesn't allocate. Bytes past the returned size are
+   * left over from earlier packets;
+   */
+  auto const packet_size = elementaryVideo->GetRawMemSize();
+  if ((size_t)packet.size() < packet_size) {
+    packet.resize({packet_size}, false);
+  }
+  memcpy(packet.mutable_data(), elementaryVideo->GetDataAs<void>(),
+         packet_size);
+
+  return packet_size;
+}
+
+/* Demuxes up to num_packets packets with one call. Returns tuple of packed
+ * uint8 array with all packets back to back and DemuxedPacket array telling
+ * where each one starts. Fewer packets are returned at EOF, none after it;
+ *
+ * Both arrays are allocated before demuxing and packets are copied straight
+ * into them. Packed array is sized after the average packet size of the
+ * previous batch and grows in place if packets don't fit, both arrays are
+ * shrunk to what was demuxed at the end;
+ */
+py::tuple PyFFmpegDemuxer::DemuxPackets(size_t num_packets)
+{
+  py::array_t<DemuxedPacket> packets({(py::ssize_t)num_packets},
+                                     {(py::ssize_t)sizeof(DemuxedPacket)});
+  py::array_t<uint8_t> data({(py::ssize_t)(num_packets * avgPacketSize)},
+                            {(py::ssize_t)sizeof(uint8_t)});
+
+  auto pPackets = packets.mutable_data();
+  size_t num_demuxed = 0U, num_bytes = 0U;
+  {
+    py::gil_scoped_release gil_release;
+    for (; num_demuxed < num_packets; num_demuxed++) {
+      auto elementaryVideo = DemuxSinglePacketBuffer(false);
+      if (!elementaryVideo) {
+        break;
+      }
+
+      DemuxedPacket packet = {0};
+      packet.offset = num_bytes;
+      packet.size = elementaryVideo->GetRawMemSize();
+
+      auto pktDataBuf = (Buffer*)upDemuxer->GetOutput(3U);
+      if (pktDataBuf) {
+        auto pPktData = pktDataBuf->GetDataAs<PacketData>();
+        packet.pts = pPktData->pts;
+        packet.dts = pPktData->dts;
+        packet.pos = pPktData->pos;
+        packet.duration = pPktData->duration;
+        packet.key = pPktData->key;
+      }
+
+      auto const capacity = (size_t)data.size();
+      if (num_bytes + packet.size > capacity) {
+        // NumPy reallocates the array, that needs the GIL;
+        py::gil_scoped_acquire gil_acquire;
+        data.resize({(py::ssize_t)max<size_t>(2U * capacity,
+                                              num_bytes + packet.size)},
+                    false);
+      }
+
+      memcpy(data.mutable_data() + num_bytes,
+             elementaryVideo->GetDataAs<uint8_t>(), packet.size);
+      num_bytes += packet.size;
+      pPackets[num_demuxed] = packet;
+    }
+  }
+
+  if (num_demuxed) {
+    avgPacketSize = (num_bytes + num_demuxed - 1U) / num_demuxed;
+  }
+  data.resize({(py::ssize_t)num_bytes}, false);
+  packets.resize({(py::ssize_t)num_demuxed}, false);
+
+  return py::make_tuple(data, packets);
+}
+
+/* Returns read-only view of the demuxer's packet buffer, no copy is made.
+ * View holds a reference to the demuxer so it never outlives it, but its
+ * content is only valid until the next demux or seek call. Empty array is
+ * returned on EOF or error;
+ */
+static py::array_t<uint8_t> DemuxSinglePacketView(py::object self)
+{
+  auto& demuxer = self.cast<PyFFmpegDemuxer&>();
+  Buffer* elementaryVideo = nullptr;
+  {
+    py::gil_scoped_release gil_release;
+    elementaryVideo = demuxer.DemuxSinglePacketBuffer(false);
+  }
+
+  if (!elementaryVideo) {
+    return py::array_t<uint8_t>({0});
+  }
+
+  py::array_t<uint8_t> packet(
+      {(py::ssize_t)elementaryVideo->GetRawMemSize()},
+      {(py::ssize_t)sizeof(uint8_t)}, elementaryVideo->GetDataAs<uint8_t>(),
+      self);
+  py::detail::array_proxy(packet.ptr())->flags &=
+      ~py::detail::npy_api::NPY_ARRAY_WRITEABLE_;
+  return packet;
+}
+
 void PyFFmpegDemuxer::GetLastPacketData(PacketData& pkt_data)
 {
   auto pkt_data_buf = (Buffer*)upDemuxer->GetOutput(3U);
@@ -167,14 +302,18 @@ bool PyFFmpegDemuxer::Seek(SeekContext& ctx, py::array_t<uint8_t>& packet)
 {
   Buffer* elementaryVideo = nullptr;
   auto pSeekCtxBuf = shared_ptr<Buffer>(Buffer::MakeOwnMem(sizeof(ctx), &ctx));
-  do {
-    upDemuxer->SetInput((Token*)pSeekCtxBuf.get(), 1U);
-    if (TASK_EXEC_FAIL == upDemuxer->Execute()) {
-      upDemuxer->ClearInputs();
-      return false;
-    }
-    elementaryVideo = (Buffer*)upDemuxer->GetOutput(0U);
-  } while (!elementaryVideo);
+  {
+    // Seeking doesn't touch Python objects, let other threads run;
+    py::gil_scoped_release gil_release;
+    do {
+      upDemuxer->SetInput((Token*)pSeekCtxBuf.get(), 1U);
+      if (TASK_EXEC_FAIL == upDemuxer->Execute()) {
+        upDemuxer->ClearInputs();
+        return false;
+      }
+      elementaryVideo = (Buffer*)upDemuxer->GetOutput(0U);
+    } while (!elementaryVideo);
+  }
 
   packet.resize({elementaryVideo->GetRawMemSize()}, false);
   memcpy(packet.mutable_data(), elementaryVideo->GetDataAs<void>(),
@@ -191,6 +330,34 @@ bool PyFFmpegDemuxer::Seek(SeekContext& ctx, py::array_t<uint8_t>& packet)
   return true;
 }
 
+bool PyFFmpegDemuxer::BuildIndex()
+{
+  py::gil_scoped_release gil_release;
+  return upDemuxer->BuildIndex();
+}
+
+bool PyFFmpegDemuxer::SaveIndex(const string& path) const
+{
+  return upDemuxer->SaveIndex(path);
+}
+
+bool PyFFmpegDemuxer::LoadIndex(const string& path)
+{
+  py::gil_scoped_release gil_release;
+  return upDemuxer->LoadIndex(path);
+}
+
+py::array_t<PacketIndexEntry> PyFFmpegDemuxer::GetIndex() const
+{
+  auto& index = upDemuxer->GetIndex();
+  py::array_t<PacketIndexEntry> entries({index.size()});
+  if (!index.empty()) {
+    memcpy(entries.mutable_data(), index.data(),
+           index.size() * sizeof(PacketIndexEntry));
+  }
+  return entries;
+}
+
 void Init_PyFFMpegDemuxer(py::module& m)
 {
   py::class_<PyFFmpegDemuxer, shared_ptr<PyFFmpegDemuxer>>(m, "PyFFmpegDemuxer")
@@ -201,15 +368,19 @@ void Init_PyFFMpegDemuxer(py::module& m)
           [](shared_ptr<PyFFmpegDemuxer> self, py::array_t<uint8_t>& packet) {
             return self->DemuxSinglePacket(packet, nullptr);
           },
-          py::arg("packet"), py::call_guard<py::gil_scoped_release>())
+          py::arg("packet"))
       .def(
           "DemuxSinglePacket",
           [](shared_ptr<PyFFmpegDemuxer> self, py::array_t<uint8_t>& packet,
              py::array_t<uint8_t>& sei) {
             return self->DemuxSinglePacket(packet, &sei);
           },
-          py::arg("packet"), py::arg("sei"),
-          py::call_guard<py::gil_scoped_release>())
+          py::arg("packet"), py::arg("sei"))
+      .def("DemuxSinglePacketInto", &PyFFmpegDemuxer::DemuxSinglePacketInto,
+           py::arg("packet").noconvert(true))
+      .def("DemuxSinglePacketView", &DemuxSinglePacketView)
+      .def("DemuxPackets", &PyFFmpegDemuxer::DemuxPackets,
+           py::arg("num_packets"))
       .def("Width", &PyFFmpegDemuxer::Width)
       .def("Height", &PyFFmpegDemuxer::Height)
       .def("Format", &PyFFmpegDemuxer::Format)
@@ -221,6 +392,10 @@ void Init_PyFFMpegDemuxer(py::module& m)
       .def("Codec", &PyFFmpegDemuxer::Codec)
       .def("LastPacketData", &PyFFmpegDemuxer::GetLastPacketData)
       .def("Seek", &PyFFmpegDemuxer::Seek)
+      .def("BuildIndex", &PyFFmpegDemuxer::BuildIndex)
+      .def("SaveIndex", &PyFFmpegDemuxer::SaveIndex, py::arg("path"))
+      .def("LoadIndex", &PyFFmpegDemuxer::LoadIndex, py::arg("path"))
+      .def("GetIndex", &PyFFmpegDemuxer::GetIndex)
       .def("ColorSpace", &PyFFmpegDemuxer::GetColorSpace)
       .def("ColorRange", &PyFFmpegDemuxer::GetColorRange);
 
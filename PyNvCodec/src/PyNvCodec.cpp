@@ -25,6 +25,7 @@ namespace py = pybind11;
 constexpr auto TASK_EXEC_SUCCESS = TaskExecStatus::TASK_EXEC_SUCCESS;
 constexpr auto TASK_EXEC_FAIL = TaskExecStatus::TASK_EXEC_FAIL;
 
+#ifndef TC_CPU_ONLY
 static auto ThrowOnCudaError = [](CUresult res, int lineNum = -1) {
   if (CUDA_SUCCESS != res) {
     stringstream ss;
@@ -223,6 +224,7 @@ auto CopySurface = [](shared_ptr<Surface> self, shared_ptr<Surface> other,
 
   return CopySurface_Ctx_Str(self, other, ctx, str);
 };
+#endif
 
 void Init_PyBufferUploader(py::module&);
 
@@ -242,6 +244,8 @@ void Init_PyFFMpegDemuxer(py::module&);
 
 void Init_PyNvDecoder(py::module&);
 
+void Init_PyNvPipelineDecoder(py::module&);
+
 void Init_PyNvEncoder(py::module&);
 
 PYBIND11_MODULE(PyNvCodec, m)
@@ -250,11 +254,22 @@ PYBIND11_MODULE(PyNvCodec, m)
 
   PYBIND11_NUMPY_DTYPE_EX(MotionVector, source, "source", w, "w", h, "h", src_x,
                           "src_x", src_y, "src_y", dst_x, "dst_x", dst_y,
-                          "dst_y", motion_x, "motion_x", motion_y, "motion_y",
-                          motion_scale, "motion_scale");
+                          "dst_y", flags, "flags", motion_x, "motion_x",
+                          motion_y, "motion_y", motion_scale, "motion_scale");
 
   py::class_<MotionVector>(m, "MotionVector");
 
+  PYBIND11_NUMPY_DTYPE_EX(DemuxedPacket, offset, "offset", size, "size", pts,
+                          "pts", dts, "dts", pos, "pos", duration, "duration",
+                          key, "key");
+
+  py::class_<DemuxedPacket>(m, "DemuxedPacket");
+
+  PYBIND11_NUMPY_DTYPE_EX(PacketIndexEntry, pts, "pts", dts, "dts", pos, "pos",
+                          key, "key");
+
+  py::class_<PacketIndexEntry>(m, "PacketIndexEntry");
+
   py::register_exception<HwResetException>(m, "HwResetException");
 
   py::register_exception<CuvidParserException>(m, "CuvidParserException");
@@ -321,7 +336,8 @@ PYBIND11_MODULE(PyNvCodec, m)
       .def_readwrite("dts", &PacketData::dts)
       .def_readwrite("pos", &PacketData::pos)
       .def_readwrite("bsl", &PacketData::bsl)
-      .def_readwrite("duration", &PacketData::duration);
+      .def_readwrite("duration", &PacketData::duration)
+      .def_readwrite("key", &PacketData::key);
 
   py::class_<ColorspaceConversionContext,
              shared_ptr<ColorspaceConversionContext>>(
@@ -332,6 +348,59 @@ PYBIND11_MODULE(PyNvCodec, m)
       .def_readwrite("color_space", &ColorspaceConversionContext::color_space)
       .def_readwrite("color_range", &ColorspaceConversionContext::color_range);
 
+  py::class_<BufferPoolStats>(m, "BufferPoolStats")
+      .def_readonly("acquires", &BufferPoolStats::acquires)
+      .def_readonly("hits", &BufferPoolStats::hits)
+      .def_readonly("system_allocs", &BufferPoolStats::system_allocs)
+      .def_readonly("system_frees", &BufferPoolStats::system_frees)
+      .def_readonly("bytes_in_use", &BufferPoolStats::bytes_in_use)
+      .def_readonly("bytes_cached", &BufferPoolStats::bytes_cached);
+
+  m.def("GetBufferPoolStats",
+        []() { return BufferPool::Instance().GetStats(); });
+
+  m.def(
+      "ConfigureBufferPool",
+      [](bool enabled, bool page_aligned, bool huge_pages,
+         size_t max_cached_bytes) {
+        BufferPool::Instance().Configure(enabled, page_aligned, huge_pages,
+                                         max_cached_bytes);
+      },
+      py::arg("enabled") = true, py::arg("page_aligned") = false,
+      py::arg("huge_pages") = false,
+      py::arg("max_cached_bytes") = BufferPool::default_max_cached_bytes);
+
+  m.def("TrimBufferPool", []() { BufferPool::Instance().Trim(); });
+
+  py::class_<AllocStats>(m, "AllocStats")
+      .def_readonly("name", &AllocStats::name)
+      .def_readonly("allocations", &AllocStats::allocations)
+      .def_readonly("deallocations", &AllocStats::deallocations)
+      .def_readonly("bytes_allocated", &AllocStats::bytes_allocated)
+      .def_readonly("live_bytes", &AllocStats::live_bytes)
+      .def_readonly("peak_bytes", &AllocStats::peak_bytes);
+
+  m.def("SetAllocTracking", &AllocTracker::SetEnabled, py::arg("enabled"));
+
+  m.def("IsAllocTrackingEnabled", &AllocTracker::IsEnabled);
+
+  m.def("GetTokenAllocStats", &AllocTracker::GetTokenStats);
+
+  m.def("GetTaskAllocStats", &AllocTracker::GetTaskStats);
+
+  m.def("ResetAllocStats", &AllocTracker::Reset);
+
+  Init_PyFFMpegDecoder(m);
+
+  Init_PyFFMpegDemuxer(m);
+
+#ifdef TC_CPU_ONLY
+  m.attr("CPU_ONLY") = py::bool_(true);
+
+  m.def("GetNumGpus", []() { return (size_t)0U; });
+#else
+  m.attr("CPU_ONLY") = py::bool_(false);
+
   py::class_<CudaBuffer, shared_ptr<CudaBuffer>>(m, "CudaBuffer")
       .def("GetRawMemSize", &CudaBuffer::GetRawMemSize)
       .def("GetNumElems", &CudaBuffer::GetNumElems)
@@ -471,12 +540,10 @@ PYBIND11_MODULE(PyNvCodec, m)
           py::return_value_policy::take_ownership,
           py::call_guard<py::gil_scoped_release>());
 
-  Init_PyFFMpegDecoder(m);
-
-  Init_PyFFMpegDemuxer(m);
-
   Init_PyNvDecoder(m);
 
+  Init_PyNvPipelineDecoder(m);
+
   Init_PyNvEncoder(m);
 
   Init_PyFrameUploader(m);
@@ -492,4 +559,5 @@ PYBIND11_MODULE(PyNvCodec, m)
   Init_PySurfaceResizer(m);
 
   m.def("GetNumGpus", &CudaResMgr::GetNumGpus);
+#endif
 }
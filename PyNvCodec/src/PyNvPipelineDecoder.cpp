@@ -0,0 +1,153 @@
+/*
+ * Copyright 2019 NVIDIA Corporation
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "PyNvCodec.hpp"
+
+using namespace std;
+using namespace VPF;
+
+namespace py = pybind11;
+
+/* Tasks overwrite their outputs on every run, so every token which goes
+ * downstream is a copy;
+ */
+static Token* CloneBuffer(Token* p_token, void* p_args)
+{
+  auto p_buffer = (Buffer*)p_token;
+  return Buffer::MakeOwnMem(p_buffer->GetRawMemSize(),
+                            p_buffer->GetRawMemPtr());
+}
+
+/* Surface::Clone() doesn't copy video memory, so new surface is made;
+ */
+Token* PyNvPipelineDecoder::CloneSurface(Token* p_token, void* p_args)
+{
+  auto p_surface = (Surface*)p_token;
+  auto p_clone_args = (SurfaceCloneArgs*)p_args;
+
+  auto p_copy = Surface::Make(p_surface->PixelFormat(), p_surface->Width(),
+                              p_surface->Height(), p_clone_args->ctx);
+  for (auto i = 0U; i < p_surface->NumPlanes(); i++) {
+    p_copy->GetSurfacePlane(i)->Import(*p_surface->GetSurfacePlane(i),
+                                       p_clone_args->ctx, p_clone_args->str);
+  }
+
+  return p_copy;
+}
+
+PyNvPipelineDecoder::PyNvPipelineDecoder(const string& pathToFile,
+                                         int gpuOrdinal, Pixel_Format outFormat,
+                                         uint32_t queueSize)
+{
+  if (gpuOrdinal < 0 || gpuOrdinal >= CudaResMgr::Instance().GetNumGpus()) {
+    gpuOrdinal = 0U;
+  }
+  cloneArgs.ctx = CudaResMgr::Instance().GetCtx(gpuOrdinal);
+  cloneArgs.str = CudaResMgr::Instance().GetStream(gpuOrdinal);
+
+  upDemuxer.reset(DemuxFrame::Make(pathToFile.c_str(), nullptr, 0U));
+
+  MuxingParams params;
+  upDemuxer->GetParams(params);
+  width = params.videoContext.width;
+  height = params.videoContext.height;
+  auto const decFormat = params.videoContext.format;
+  format = UNDEFINED == outFormat ? decFormat : outFormat;
+
+  upDecoder.reset(NvdecDecodeFrame::Make(cloneArgs.str, cloneArgs.ctx,
+                                         params.videoContext.codec,
+                                         poolFrameSize, width, height,
+                                         decFormat));
+
+  upDownloader.reset(CudaDownloadSurface::Make(cloneArgs.str, cloneArgs.ctx,
+                                               width, height, format));
+
+  upGraph.reset(new TaskGraph(queueSize));
+  auto const demux = upGraph->AddTask(upDemuxer.get());
+  auto const decode = upGraph->AddTask(upDecoder.get());
+  auto const download = upGraph->AddTask(upDownloader.get());
+
+  // Elementary video and packet data;
+  upGraph->Connect(demux, 0U, decode, 0U, CloneBuffer);
+  upGraph->Connect(demux, 3U, decode, 1U, CloneBuffer);
+
+  auto last_stage = decode;
+  if (format != decFormat) {
+    upConverter.reset(ConvertSurface::Make(width, height, decFormat, format,
+                                           cloneArgs.ctx, cloneArgs.str));
+    ColorspaceConversionContext cc_ctx(BT_601, MPEG);
+    upCtxBuffer.reset(Buffer::MakeOwnMem(sizeof(cc_ctx), &cc_ctx));
+
+    auto const convert = upGraph->AddTask(upConverter.get());
+    upGraph->SetConstInput(convert, upCtxBuffer.get(), 1U);
+    upGraph->Connect(decode, 0U, convert, 0U, CloneSurface, &cloneArgs);
+    last_stage = convert;
+  }
+
+  upGraph->Connect(last_stage, 0U, download, 0U, CloneSurface, &cloneArgs);
+  upGraph->AddOutput(download, 0U, CloneBuffer);
+  upGraph->Start();
+}
+
+uint32_t PyNvPipelineDecoder::Width() const { return width; }
+
+uint32_t PyNvPipelineDecoder::Height() const { return height; }
+
+Pixel_Format PyNvPipelineDecoder::GetPixelFormat() const { return format; }
+
+bool PyNvPipelineDecoder::DecodeSingleFrame(py::array_t<uint8_t>& frame)
+{
+  unique_ptr<Buffer> pRawFrame;
+  {
+    py::gil_scoped_release gil_release;
+    pRawFrame.reset((Buffer*)upGraph->Pop());
+  }
+
+  if (!pRawFrame) {
+    return false;
+  }
+
+  auto const downloadSize = pRawFrame->GetRawMemSize();
+  if (downloadSize != frame.size()) {
+    frame.resize({downloadSize}, false);
+  }
+
+  memcpy(frame.mutable_data(), pRawFrame->GetRawMemPtr(), downloadSize);
+  return true;
+}
+
+vector<TaskGraphStats> PyNvPipelineDecoder::GetStats() const
+{
+  return upGraph->GetStats();
+}
+
+void Init_PyNvPipelineDecoder(py::module& m)
+{
+  py::class_<TaskGraphStats>(m, "TaskGraphStats")
+      .def_readonly("name", &TaskGraphStats::name)
+      .def_readonly("executions", &TaskGraphStats::executions)
+      .def_readonly("busy_ns", &TaskGraphStats::busy_ns)
+      .def_readonly("queue_depth", &TaskGraphStats::queue_depth)
+      .def_readonly("max_queue_depth", &TaskGraphStats::max_queue_depth);
+
+  py::class_<PyNvPipelineDecoder>(m, "PyNvPipelineDecoder")
+      .def(py::init<const string&, int, Pixel_Format, uint32_t>(),
+           py::arg("input"), py::arg("gpu_id"),
+           py::arg("format") = UNDEFINED, py::arg("queue_size") = 4U)
+      .def("Width", &PyNvPipelineDecoder::Width)
+      .def("Height", &PyNvPipelineDecoder::Height)
+      .def("Format", &PyNvPipelineDecoder::GetPixelFormat)
+      .def("DecodeSingleFrame", &PyNvPipelineDecoder::DecodeSingleFrame,
+           py::arg("frame"))
+      .def("Stats", &PyNvPipelineDecoder::GetStats);
+}
@@ -34,6 +34,7 @@ PySurfaceConverter::PySurfaceConverter(uint32_t width, uint32_t height,
       width, height, inFormat, outFormat, CudaResMgr::Instance().GetCtx(gpuID),
       CudaResMgr::Instance().GetStream(gpuID)));
   upCtxBuffer.reset(Buffer::MakeOwnMem(sizeof(ColorspaceConversionContext)));
+  upCtxBuffer->Clear();
 }
 
 PySurfaceConverter::PySurfaceConverter(uint32_t width, uint32_t height,
@@ -45,6 +46,7 @@ PySurfaceConverter::PySurfaceConverter(uint32_t width, uint32_t height,
   upConverter.reset(
       ConvertSurface::Make(width, height, inFormat, outFormat, ctx, str));
   upCtxBuffer.reset(Buffer::MakeOwnMem(sizeof(ColorspaceConversionContext)));
+  upCtxBuffer->Clear();
 }
 
 shared_ptr<Surface>
@@ -9,8 +9,8 @@ pip install -r requirements.txt
 
 export CMAKE_INSTALL_PREFIX="$(pwd)/install"
 mkdir -p {install,build}
-mkdir -p benchmark-results/{csv,plot}/{fpt,cpu,mem,gpu,gpu_mem}
-mkdir benchmark-results/individual_summary
+mkdir -p benchmark-results/{csv,plot}/{fpt,cpu,mem,gpu,gpu_mem,delay,decode,convert,copy}
+mkdir -p benchmark-results/{individual_summary,metadata,startup,throughput,streams,sweep,zero_copy,batch,gil,demux,seek,motion_vectors,plot/sweep}
 cd build
 
 cmake .. \
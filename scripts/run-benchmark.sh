@@ -3,8 +3,9 @@ default_warmup_frames=20
 
 warmup_frames=$default_warmup_frames
 input_file=$default_input_file
+throughput=false
 
-while getopts ":bi:w:" flags; do
+while getopts ":bi:w:t" flags; do
   case "${flags}" in
   b)
     $(pwd)/scripts/build.sh
@@ -15,14 +16,18 @@ while getopts ":bi:w:" flags; do
   w)
     warmup_frames=${OPTARG}
     ;;
+  t)
+    throughput=true
+    ;;
   esac
 done
 
-echo "This program compares NVIDIA NVDEC, PyAV, and OpenCV performance on video decoding."
-echo "Usage: run-benchmark.sh -b -i \$path_to_input_file -w \$warmup_frames_count"
+echo "This program compares NVIDIA NVDEC, PyAV, OpenCV and VPF's FFmpeg software decoder performance on video decoding."
+echo "Usage: run-benchmark.sh -b -t -i \$path_to_input_file -w \$warmup_frames_count"
 echo "-b  Optional, build the project first or not, you only need to do this of you change the source code inside the container or you're running without container"
 echo "-i  Optional, defaults to $default_input_file"
 echo "-w  Optional, defaults to $default_warmup_frames"
+echo "-t  Optional, also run the throughput benchmark (whole file, no per-frame metrics)"
 echo ""
 
 echo "Benchmarking OpenCV..."
@@ -34,6 +39,17 @@ python3 ./install/bin/main.py pyav $input_file $warmup_frames
 echo "Benchmarking NVDEC..."
 python3 ./install/bin/main.py nvdec $input_file $warmup_frames
 
+echo "Benchmarking VPF FFmpeg..."
+python3 ./install/bin/main.py vpf-ffmpeg $input_file $warmup_frames
+
+if [ "$throughput" = true ]; then
+  # One process per tool so peak RSS isn't shared between tools
+  for tool in opencv pyav nvdec vpf-ffmpeg; do
+    echo "Benchmarking $tool throughput..."
+    python3 ./install/bin/main.py $tool $input_file --mode throughput
+  done
+fi
+
 python3 ./install/bin/aggregate_report.py
 
 echo ""
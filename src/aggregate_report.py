@@ -5,34 +5,43 @@ result_markdown_path = '{}/benchmark-results/report.md'.format(
     os.getcwd())
 result_md = open(result_markdown_path, 'w')
 
-results_table = {
-    "Frame Processing Time (ms)": [],
-    "CPU Utilization Across All Cores (%)": [],
-    "Memory Utilization (MB)": [],
-    "GPU Utilization (%)": [],
-    "GPU Memory Utilization (MB)": [],
+# Record key in the individual summaries -> report table title
+RECORD_TITLES = {
+    "fpt": "Frame Processing Time (ms)",
+    "cpu": "CPU Utilization Across All Cores (%)",
+    "mem": "Memory Utilization (MB)",
+    "gpu": "GPU Utilization (%)",
+    "gpu_mem": "GPU Memory Utilization (MB)",
+    # Only reported by tools that can tell packet-in from frame-out
+    "delay": "Decode Delay (ms)",
+    # Pipeline stages, their sum is the frame processing time
+    "decode": "Decode Stage (ms)",
+    "convert": "Colour Conversion Stage (ms)",
+    "copy": "Copy-out Stage (ms)",
 }
+results_table = {title: [] for title in RECORD_TITLES.values()}
 
 csv_files = os.listdir('benchmark-results/individual_summary')
 for file in csv_files:
     if file.endswith(".csv"):
         with open('benchmark-results/individual_summary/{}'.format(file), 'r') as csv_file:
             csv_reader = csv.reader(csv_file, delimiter=",")
-            result_table_keys = list(results_table.keys())
-            for i, row in enumerate(csv_reader):
-                results_table[result_table_keys[i]].append(
+            for key, *row in csv_reader:
+                results_table[RECORD_TITLES[key]].append(
                     [file.split(".")[0], *row])
 
 result_md.write("# Benchmark Report\n")
 result_md.write("<table>")
 result_md.write("""
 <tr>
-    <th colspan="8">Benchmark Results</th>
+    <th colspan="11">Benchmark Results</th>
 </tr>""")
 for key, value in results_table.items():
+    if len(value) == 0:
+        continue
     result_md.write("""
     <tr>
-        <td colspan="8"><strong>{}</strong></td>
+        <td colspan="11"><strong>{}</strong></td>
     </tr>
     <tr>
         <td>Tool</td>
@@ -43,6 +52,9 @@ for key, value in results_table.items():
         <td>Q2</td>
         <td>Q3</td>
         <td>Standard Deviation</td>
+        <td>P90</td>
+        <td>P99</td>
+        <td>P99.9</td>
     </tr>""".format(key))
     for row in value:
         result_md.write("""
@@ -55,47 +67,481 @@ for key, value in results_table.items():
         <td>{}</td>
         <td>{}</td>
         <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
     </tr>""".format(*row))
 
 result_md.write("\n</table>\n")
+
+throughput_dir = 'benchmark-results/throughput'
+throughput_files = sorted(os.listdir(throughput_dir)) if os.path.isdir(
+    throughput_dir) else []
+throughput_files = [file for file in throughput_files if file.endswith(".csv")]
+if len(throughput_files) > 0:
+    result_md.write("\n# Throughput\n")
+    result_md.write("<table>")
+    result_md.write("""
+    <tr>
+        <td>Tool</td>
+        <td>Frames</td>
+        <td>Seconds</td>
+        <td>FPS</td>
+        <td>CPU Seconds per Frame</td>
+        <td>Peak RSS (MB)</td>
+    </tr>""")
+    for file in throughput_files:
+        with open('{}/{}'.format(throughput_dir, file), 'r') as csv_file:
+            for row in csv.DictReader(csv_file, delimiter=","):
+                result_md.write("""
+    <tr>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+    </tr>""".format(file.split(".")[0], row["frames"], row["seconds"],
+                    row["fps"], row["cpu_s_per_frame"], row["peak_rss_mb"]))
+    result_md.write("\n</table>\n")
+
+sweep_dir = 'benchmark-results/sweep'
+sweep_files = sorted(os.listdir(sweep_dir)) if os.path.isdir(
+    sweep_dir) else []
+sweep_files = [file for file in sweep_files if file.endswith(".csv")]
+if len(sweep_files) > 0:
+    result_md.write("\n# Scaling\n")
+    result_md.write("Stream efficiency is aggregate FPS relative to linear "
+                    "scaling from the smallest stream count, thread speedup "
+                    "is FPS relative to the smallest decoder thread count.\n")
+
+    # Best thread speedup of every threading mode, single stream runs only
+    gains = {}
+    for file in sweep_files:
+        with open('{}/{}'.format(sweep_dir, file), 'r') as csv_file:
+            rows = list(csv.DictReader(csv_file, delimiter=","))
+        min_streams = min(int(row["streams"]) for row in rows)
+        for row in rows:
+            if int(row["streams"]) != min_streams:
+                continue
+            key = (row.get("resolution", "unknown"), file.rsplit("-", 1)[0],
+                   row.get("thread_type", "default"))
+            best = gains.get(key)
+            if best is None or float(row["thread_speedup"]) > float(best["thread_speedup"]):
+                gains[key] = row
+
+    result_md.write("\n## Threading Gains per Resolution\n")
+    result_md.write("<table>")
+    result_md.write("""
+    <tr>
+        <td>Resolution</td>
+        <td>Tool</td>
+        <td>Thread Type</td>
+        <td>Best Threads</td>
+        <td>FPS</td>
+        <td>Thread Speedup</td>
+    </tr>""")
+    for (resolution, tool_name, thread_type), row in sorted(gains.items()):
+        result_md.write("""
+    <tr>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+    </tr>""".format(resolution, tool_name, thread_type, row["threads"],
+                    row["fps"], row["thread_speedup"]))
+    result_md.write("\n</table>\n")
+for file in sweep_files:
+    tool_name = file.split(".")[0]
+    result_md.write("\n## {}\n".format(tool_name))
+    result_md.write("<table>")
+    result_md.write("""
+    <tr>
+        <td>Thread Type</td>
+        <td>Streams</td>
+        <td>Threads</td>
+        <td>Aggregate FPS</td>
+        <td>FPS per Stream</td>
+        <td>Worst Per-Stream P99 (ms)</td>
+        <td>CPU Cores Busy</td>
+        <td>Stream Efficiency</td>
+        <td>Thread Speedup</td>
+    </tr>""")
+    with open('{}/{}'.format(sweep_dir, file), 'r') as csv_file:
+        for row in csv.DictReader(csv_file, delimiter=","):
+            result_md.write("""
+    <tr>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+    </tr>""".format(row.get("thread_type", "default"), row["streams"],
+                    row["threads"], row["fps"],
+                    row["fps_per_stream"], row["p99_ms_max"],
+                    row["cpu_cores_busy"], row["stream_efficiency"],
+                    row["thread_speedup"]))
+    result_md.write("\n</table>\n")
+    result_md.write("""
+![](./plot/sweep/{0}-streams.png)
+![](./plot/sweep/{0}-threads.png)\n""".format(tool_name))
+
+
+# Plots of every tool that recorded the metric, as found on disk
+def write_plots(key: str, title: str):
+    plot_dir = 'benchmark-results/plot/{}'.format(key)
+    plot_files = sorted(os.listdir(plot_dir)) if os.path.isdir(
+        plot_dir) else []
+    plot_files = [file for file in plot_files if file.endswith(".png")]
+    if len(plot_files) == 0:
+        return
+    result_md.write("## {}\n".format(title))
+    for file in plot_files:
+        result_md.write("### {}\n![](./plot/{}/{})\n".format(
+            file.split(".")[0], key, file))
+    result_md.write("\n")
+
+
 result_md.write("\n# Plots\n")
-result_md.write("## Frame Processing Time")
-result_md.write("""
-### NVDEC
-![](./plot/fpt/nvdec.png)
-### PyAV
-![](./plot/fpt/pyav.png)
-### OpenCV
-![](./plot/fpt/opencv.png)\n\n""")
-result_md.write("## CPU Utilization")
-result_md.write("""
-### NVDEC
-![](./plot/cpu/nvdec.png)
-### PyAV
-![](./plot/cpu/pyav.png)
-### OpenCV
-![](./plot/cpu/opencv.png)\n\n""")
-result_md.write("## Memory Utilization")
-result_md.write("""
-### NVDEC
-![](./plot/mem/nvdec.png)
-### PyAV
-![](./plot/mem/pyav.png)
-### OpenCV
-![](./plot/mem/opencv.png)\n\n""")
-result_md.write("## GPU Utilization")
-result_md.write("""
-### NVDEC
-![](./plot/gpu/nvdec.png)
-### PyAV
-![](./plot/gpu/pyav.png)
-### OpenCV
-![](./plot/gpu/opencv.png)\n\n""")
-result_md.write("## GPU Memory Utilization")
-result_md.write("""
-### NVDEC
-![](./plot/gpu_mem/nvdec.png)
-### PyAV
-![](./plot/gpu_mem/pyav.png)
-### OpenCV
-![](./plot/gpu_mem/opencv.png)\n""")
+for key in ["fpt", "cpu", "mem", "gpu", "gpu_mem", "delay", "decode",
+            "convert", "copy"]:
+    write_plots(key, RECORD_TITLES[key].rsplit(" (", 1)[0])
+
+streams_dir = 'benchmark-results/streams'
+streams_files = sorted(os.listdir(streams_dir)) if os.path.isdir(
+    streams_dir) else []
+streams_files = [file for file in streams_files if file.endswith(".csv")]
+if len(streams_files) > 0:
+    result_md.write("\n# Concurrent Streams\n")
+    result_md.write("<table>")
+    result_md.write("""
+    <tr>
+        <td>Run</td>
+        <td>Streams</td>
+        <td>Aggregate FPS</td>
+        <td>FPS per Stream</td>
+        <td>Mean Per-Stream P99 (ms)</td>
+        <td>Worst Per-Stream P99 (ms)</td>
+        <td>CPU Cores Busy</td>
+    </tr>""")
+    for file in streams_files:
+        with open('{}/{}'.format(streams_dir, file), 'r') as csv_file:
+            for row in csv.DictReader(csv_file, delimiter=","):
+                result_md.write("""
+    <tr>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+    </tr>""".format(file.split(".")[0], row["streams"], row["fps"],
+                    row["fps_per_stream"], row["p99_ms_mean"],
+                    row["p99_ms_max"], row["cpu_cores_busy"]))
+    result_md.write("\n</table>\n")
+
+startup_dir = 'benchmark-results/startup'
+startup_files = sorted(os.listdir(startup_dir)) if os.path.isdir(
+    startup_dir) else []
+startup_files = [file for file in startup_files if file.endswith(".csv")]
+if len(startup_files) > 0:
+    result_md.write("\n# Startup\n")
+    result_md.write("Medians over fresh processes. Common import is what "
+                    "main.py loads for every tool, backend import is the "
+                    "decoder library of the tool itself.\n")
+    result_md.write("<table>")
+    result_md.write("""
+    <tr>
+        <td>Tool</td>
+        <td>Common Import (ms)</td>
+        <td>Backend Import (ms)</td>
+        <td>Init (ms)</td>
+        <td>First Frame (ms)</td>
+        <td>Total to First Frame (ms)</td>
+        <td>Process (ms)</td>
+    </tr>""")
+    for file in startup_files:
+        with open('{}/{}'.format(startup_dir, file), 'r') as csv_file:
+            for row in csv.DictReader(csv_file, delimiter=","):
+                result_md.write("""
+    <tr>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+    </tr>""".format(file.split(".")[0], row["common_import_ms"],
+                    row["backend_import_ms"], row["init_ms"],
+                    row["first_frame_ms"], row["first_frame_total_ms"],
+                    row["process_ms"]))
+    result_md.write("\n</table>\n")
+
+zero_copy_dir = 'benchmark-results/zero_copy'
+zero_copy_files = sorted(os.listdir(zero_copy_dir)) if os.path.isdir(
+    zero_copy_dir) else []
+zero_copy_files = [file for file in zero_copy_files if file.endswith(".csv")]
+if len(zero_copy_files) > 0:
+    result_md.write("\n# Zero-copy Frame Export\n")
+    result_md.write("Frames copied into a caller owned ndarray versus "
+                    "read-only views of decoder memory. Decode stage times "
+                    "include the copy-out when frames are copied.\n")
+    result_md.write("<table>")
+    result_md.write("""
+    <tr>
+        <td>Tool</td>
+        <td>Mode</td>
+        <td>FPS</td>
+        <td>CPU Seconds per Frame</td>
+        <td>Decode Stage Median (ms)</td>
+        <td>Decode Stage P99 (ms)</td>
+        <td>Speedup</td>
+    </tr>""")
+    for file in zero_copy_files:
+        with open('{}/{}'.format(zero_copy_dir, file), 'r') as csv_file:
+            for row in csv.DictReader(csv_file, delimiter=","):
+                result_md.write("""
+    <tr>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+    </tr>""".format(file.split(".")[0],
+                    "zero-copy" if row["zero_copy"] == "1" else "copy",
+                    row["fps"], row["cpu_s_per_frame"], row["decode_ms_q2"],
+                    row["decode_ms_p99"], row["speedup"]))
+    result_md.write("\n</table>\n")
+
+batch_dir = 'benchmark-results/batch'
+batch_files = sorted(os.listdir(batch_dir)) if os.path.isdir(
+    batch_dir) else []
+batch_files = [file for file in batch_files if file.endswith(".csv")]
+if len(batch_files) > 0:
+    result_md.write("\n# Batched Decoding\n")
+    result_md.write("Whole file decoded N frames per call into one "
+                    "preallocated array. Speedup is FPS relative to the "
+                    "smallest batch size.\n")
+for file in batch_files:
+    result_md.write("\n## {}\n".format(file.split(".")[0]))
+    result_md.write("<table>")
+    result_md.write("""
+    <tr>
+        <td>Batch Size</td>
+        <td>Calls</td>
+        <td>FPS</td>
+        <td>Call Median (ms)</td>
+        <td>Call P99 (ms)</td>
+        <td>Per Frame (ms)</td>
+        <td>Speedup</td>
+    </tr>""")
+    with open('{}/{}'.format(batch_dir, file), 'r') as csv_file:
+        for row in csv.DictReader(csv_file, delimiter=","):
+            result_md.write("""
+    <tr>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+    </tr>""".format(row["batch_size"], row["calls"], row["fps"],
+                    row["call_ms_q2"], row["call_ms_p99"], row["frame_ms"],
+                    row["speedup"]))
+    result_md.write("\n</table>\n")
+
+gil_dir = 'benchmark-results/gil'
+gil_files = sorted(os.listdir(gil_dir)) if os.path.isdir(gil_dir) else []
+gil_files = [file for file in gil_files if file.endswith(".csv")]
+if len(gil_files) > 0:
+    result_md.write("\n# Python Thread Scaling\n")
+    result_md.write("One copy of the file decoded per Python thread versus "
+                    "per process. Thread vs process close to 1.0 means the "
+                    "decoder releases the GIL.\n")
+    result_md.write("<table>")
+    result_md.write("""
+    <tr>
+        <td>Tool</td>
+        <td>Threads</td>
+        <td>Thread FPS</td>
+        <td>Process FPS</td>
+        <td>Thread Efficiency</td>
+        <td>Thread vs Process</td>
+    </tr>""")
+    for file in gil_files:
+        with open('{}/{}'.format(gil_dir, file), 'r') as csv_file:
+            for row in csv.DictReader(csv_file, delimiter=","):
+                result_md.write("""
+    <tr>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+    </tr>""".format(file.split(".")[0], row["threads"], row["thread_fps"],
+                    row["process_fps"], row["thread_efficiency"],
+                    row["thread_vs_process"]))
+    result_md.write("\n</table>\n")
+
+demux_dir = 'benchmark-results/demux'
+demux_files = sorted(os.listdir(demux_dir)) if os.path.isdir(demux_dir) else []
+demux_files = [file for file in demux_files if file.endswith(".csv")]
+if len(demux_files) > 0:
+    result_md.write("\n# Demuxing\n")
+    result_md.write("Video packets read without decoding. VPF includes the "
+                    "Annex-B filter for MP4 H.264/HEVC, PyAV_AnnexB adds the "
+                    "same filter to plain PyAV demuxing. Buffer moves count "
+                    "how often packet data landed at a new address, steady "
+                    "state is allocation-free when it stays small.\n")
+    result_md.write("<table>")
+    result_md.write("""
+    <tr>
+        <td>Demuxer</td>
+        <td>Packets</td>
+        <td>Packets/s</td>
+        <td>MB/s</td>
+        <td>Packet Avg (ms)</td>
+        <td>Packet Median (ms)</td>
+        <td>Packet P99 (ms)</td>
+        <td>Buffer Moves</td>
+    </tr>""")
+    for file in demux_files:
+        with open('{}/{}'.format(demux_dir, file), 'r') as csv_file:
+            for row in csv.DictReader(csv_file, delimiter=","):
+                result_md.write("""
+    <tr>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+    </tr>""".format(file.split(".")[0], row["packets"], row["packets_per_s"],
+                    row["mb_per_s"], row["packet_ms_avg"],
+                    row["packet_ms_q2"], row["packet_ms_p99"],
+                    row["buffer_moves"]))
+    result_md.write("\n</table>\n")
+
+seek_dir = 'benchmark-results/seek'
+seek_files = sorted(os.listdir(seek_dir)) if os.path.isdir(seek_dir) else []
+seek_files = [file for file in seek_files if file.endswith(".csv")]
+if len(seek_files) > 0:
+    result_md.write("\n# Random Access\n")
+    result_md.write("Seeks to random frames, each followed by demuxing up to "
+                    "the frame. Frames per seek is what a decoder would have "
+                    "to decode.\n")
+    result_md.write("<table>")
+    result_md.write("""
+    <tr>
+        <td>Demuxer</td>
+        <td>Mode</td>
+        <td>Seeks/s</td>
+        <td>Seek Median (ms)</td>
+        <td>Seek P99 (ms)</td>
+        <td>Frames per Seek</td>
+        <td>Misses</td>
+        <td>Index Time (s)</td>
+    </tr>""")
+    for file in seek_files:
+        with open('{}/{}'.format(seek_dir, file), 'r') as csv_file:
+            for row in csv.DictReader(csv_file, delimiter=","):
+                result_md.write("""
+    <tr>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+    </tr>""".format(file.split(".")[0], row["mode"], row["seeks_per_s"],
+                    row["seek_ms_q2"], row["seek_ms_p99"],
+                    row["frames_per_seek"], row["misses"], row["index_s"]))
+    result_md.write("\n</table>\n")
+
+mv_dir = 'benchmark-results/motion_vectors'
+mv_files = sorted(os.listdir(mv_dir)) if os.path.isdir(mv_dir) else []
+mv_files = [file for file in mv_files if file.endswith(".csv")]
+if len(mv_files) > 0:
+    result_md.write("\n# Motion Vector Extraction\n")
+    result_md.write("Frames decoded with motion vector export on. Extraction "
+                    "times cover handing the vectors of a frame out as a "
+                    "NumPy array, decoding excluded.\n")
+    result_md.write("<table>")
+    result_md.write("""
+    <tr>
+        <td>Extractor</td>
+        <td>FPS</td>
+        <td>Vectors per Frame</td>
+        <td>Vectors/s</td>
+        <td>Extract Avg (ms)</td>
+        <td>Extract Median (ms)</td>
+        <td>Extract P99 (ms)</td>
+    </tr>""")
+    for file in mv_files:
+        with open('{}/{}'.format(mv_dir, file), 'r') as csv_file:
+            for row in csv.DictReader(csv_file, delimiter=","):
+                result_md.write("""
+    <tr>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+    </tr>""".format(file.split(".")[0], row["fps"], row["vectors_per_frame"],
+                    row["vectors_per_s"], row["extract_ms_avg"],
+                    row["extract_ms_q2"], row["extract_ms_p99"]))
+    result_md.write("\n</table>\n")
+
+metadata_dir = 'benchmark-results/metadata'
+metadata_files = sorted(os.listdir(metadata_dir)) if os.path.isdir(
+    metadata_dir) else []
+alloc_rows = []
+for file in metadata_files:
+    if not file.endswith(".csv"):
+        continue
+    with open('{}/{}'.format(metadata_dir, file), 'r') as csv_file:
+        metadata = {row[0]: row[1] for row in csv.reader(csv_file) if row}
+    if "native_allocs_per_frame" in metadata:
+        alloc_rows.append((file.split(".")[0], metadata))
+if len(alloc_rows) > 0:
+    result_md.write("\n# Native Allocations\n")
+    result_md.write("Buffers and surfaces allocated by PyNvCodec while "
+                    "decoding, counted by its allocation tracker. Peak is "
+                    "the sum of per-type peaks.\n")
+    result_md.write("<table>")
+    result_md.write("""
+    <tr>
+        <td>Run</td>
+        <td>Allocations</td>
+        <td>Allocations per Frame</td>
+        <td>Peak (MB)</td>
+    </tr>""")
+    for name, metadata in alloc_rows:
+        result_md.write("""
+    <tr>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+        <td>{}</td>
+    </tr>""".format(name, metadata["native_allocs"],
+                    metadata["native_allocs_per_frame"],
+                    metadata["native_peak_mb"]))
+    result_md.write("\n</table>\n")
@@ -0,0 +1,37 @@
+import importlib
+
+# Tool name on the command line -> (module, tool class, name used in result
+# files). Modules are only imported when their tool is used, so a missing
+# decoder library (e.g. PyNvCodec on CPU-only hosts) only breaks its own tool.
+BACKENDS = {
+    "opencv": ("tool_opencv", "OpenCV", "OpenCV"),
+    "pyav": ("tool_pyav", "PyAV", "PyAV"),
+    "nvdec": ("tool_nvdec", "NVDec", "NVDEC"),
+    "nvdec-pipeline": ("tool_nvdec", "NVDecPipeline", "NVDEC_Pipeline"),
+    "vpf-ffmpeg": ("tool_vpf_ffmpeg", "VpfFfmpeg", "VPF_FFmpeg"),
+}
+
+
+def load_backend(tool_name: str) -> "tuple[type, str]":
+    """Import the backend of ``tool_name``.
+
+    Returns (tool class, result name). Raises ImportError when the decoder
+    library of the backend isn't available.
+    """
+    module_name, class_name, result_name = BACKENDS[tool_name]
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name), result_name
+
+
+# Backends of tool_names that can be imported here, the others are reported
+# and skipped
+def load_available_backends(tool_names: "list[str]") -> "dict[str, tuple[type, str]]":
+    backends = {}
+    for tool_name in tool_names:
+        try:
+            backends[tool_name] = load_backend(tool_name)
+        except ImportError as e:
+            print("Skipping {}, backend unavailable: {}".format(
+                tool_name, getattr(e, 'message', str(e))))
+
+    return backends
@@ -0,0 +1,110 @@
+import argparse
+import csv
+import time
+import numpy as np
+import setproctitle
+from backends import BACKENDS, load_available_backends
+from main import PROCESS_NAME
+from metrics import FakeGpuProbe
+from summary import summarize
+from sweep import parse_int_list
+from utils import ns_to_ms
+
+# Columns of benchmark-results/batch/<tool>.csv, one row per batch size
+FIELDS = ["batch_size", "frames", "calls", "seconds", "fps", "call_ms_q2",
+          "call_ms_p99", "frame_ms", "speedup"]
+
+
+def run_batch(tool_class, file_to_decode: str, batch_size: int,
+              tool_options: dict = None) -> "dict[str, float]":
+    """Decode the whole file ``batch_size`` frames per call.
+
+    Every call fills the same preallocated array, so the per-call cost is
+    what's left once allocation is taken out of the loop.
+    """
+    if not tool_class.supports_batch:
+        raise ValueError("{} doesn't support batched decoding".format(
+            tool_class.__name__))
+
+    tool = tool_class(file_to_decode, False, PROCESS_NAME,
+                      gpu_probe=FakeGpuProbe(), **(tool_options or {}))
+    batch = np.empty((batch_size, *tool.frame_shape()), dtype=np.uint8)
+
+    call_ns = []
+    frames = 0
+    start_counter = end_counter = time.perf_counter_ns()
+    while True:
+        call_start = time.perf_counter_ns()
+        decoded = tool.decode_batch(batch)
+        call_end = time.perf_counter_ns()
+        # Empty call only finds EOF after a full last batch, don't count it
+        if decoded == 0:
+            break
+        call_ns.append(call_end - call_start)
+        end_counter = call_end
+        frames += decoded
+        if decoded < batch_size:
+            break
+
+    seconds = (end_counter - start_counter) / 1_000_000_000
+    calls = summarize(ns_to_ms(np.array(call_ns)))
+    return {
+        "batch_size": batch_size,
+        "frames": frames,
+        "calls": len(call_ns),
+        "seconds": seconds,
+        "fps": frames / seconds if seconds > 0 else 0,
+        "call_ms_q2": calls["q2"],
+        "call_ms_p99": calls["p99"],
+        "frame_ms": seconds * 1000 / frames if frames > 0 else 0,
+    }
+
+
+# FPS relative to the smallest batch size
+def add_speedup(rows: "list[dict]"):
+    base_fps = rows[0]["fps"]
+    for row in rows:
+        row["speedup"] = row["fps"] / base_fps if base_fps > 0 else 0
+
+
+def batch_to_csv(file_name: str, rows: "list[dict]"):
+    with open('benchmark-results/batch/{}.csv'.format(file_name), 'w') as csv_file:
+        csv_writer = csv.DictWriter(csv_file, fieldnames=FIELDS)
+        csv_writer.writeheader()
+        for row in rows:
+            csv_writer.writerow({key: round(row[key], 4) for key in FIELDS})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure per-call overhead amortisation of batched "
+        "decoding")
+    parser.add_argument("tool", choices=["all", *BACKENDS.keys()],
+                        help="tool to benchmark, tools without batched "
+                        "decoding are skipped")
+    parser.add_argument("file", help="input file")
+    parser.add_argument("--batch-sizes", type=parse_int_list,
+                        default="1,8,32,128",
+                        help="comma separated frames per call")
+    args = parser.parse_args()
+
+    setproctitle.setproctitle(PROCESS_NAME)
+
+    tools_to_run = list(BACKENDS.keys()) if args.tool == "all" else [args.tool]
+    backends = load_available_backends(tools_to_run)
+    for tool_class, result_name in backends.values():
+        if not tool_class.supports_batch:
+            print("Skipping {}, batched decoding not supported".format(
+                result_name))
+            continue
+
+        rows = []
+        for batch_size in args.batch_sizes:
+            rows.append(run_batch(tool_class, args.file, batch_size))
+            print("{} batch={}: {:.2f} FPS, {:.3f} ms per frame".format(
+                result_name, batch_size, rows[-1]["fps"],
+                rows[-1]["frame_ms"]))
+        add_speedup(rows)
+        batch_to_csv(result_name, rows)
+
+    exit(0)
@@ -0,0 +1,258 @@
+import argparse
+from array import array
+import csv
+import time
+import numpy as np
+import setproctitle
+from main import PROCESS_NAME
+from summary import summarize
+from utils import b_to_mb, ns_to_ms
+
+# Columns of benchmark-results/demux/<demuxer>.csv
+FIELDS = ["packets", "bytes", "seconds", "packets_per_s", "mb_per_s",
+          "packet_ms_avg", "packet_ms_q2", "packet_ms_p99", "buffer_moves"]
+
+
+class BufferMoves:
+    """Counts how often packet data shows up at a new address.
+
+    Every move is a (re)allocation somewhere, so an allocation-free demux
+    loop only moves while the buffer grows to fit the largest packet.
+    Allocators reuse freed blocks, so for demuxers that allocate every
+    packet this is a lower bound.
+    """
+
+    def __init__(self) -> None:
+        self.address = None
+        self.moves = 0
+
+    def update(self, data: np.ndarray):
+        address = data.__array_interface__["data"][0]
+        if address != self.address:
+            self.address = address
+            self.moves += 1
+
+
+def demux_vpf(file_to_decode: str, packet_ns: array) -> "tuple[int, int, int]":
+    # DemuxSinglePacket applies the Annex-B filter to MP4 H.264/HEVC itself
+    import PyNvCodec as nvc
+    demuxer = nvc.PyFFmpegDemuxer(file_to_decode)
+    packet = np.ndarray(shape=(0), dtype=np.uint8)
+
+    packets, total_bytes, buffer = 0, 0, BufferMoves()
+    while True:
+        start_counter = time.perf_counter_ns()
+        if not demuxer.DemuxSinglePacket(packet):
+            break
+        end_counter = time.perf_counter_ns()
+
+        packet_ns.append(end_counter - start_counter)
+        packets += 1
+        total_bytes += packet.size
+        buffer.update(packet)
+
+    return packets, total_bytes, buffer.moves
+
+
+# Packet copied into a buffer that only grows
+def demux_vpf_into(file_to_decode: str, packet_ns: array) -> "tuple[int, int, int]":
+    import PyNvCodec as nvc
+    demuxer = nvc.PyFFmpegDemuxer(file_to_decode)
+    packet = np.ndarray(shape=(0), dtype=np.uint8)
+
+    packets, total_bytes, buffer = 0, 0, BufferMoves()
+    while True:
+        start_counter = time.perf_counter_ns()
+        packet_size = demuxer.DemuxSinglePacketInto(packet)
+        end_counter = time.perf_counter_ns()
+        if packet_size == 0:
+            break
+
+        packet_ns.append(end_counter - start_counter)
+        packets += 1
+        total_bytes += packet_size
+        buffer.update(packet)
+
+    return packets, total_bytes, buffer.moves
+
+
+# Read-only view of the demuxer's own packet buffer, valid until next call
+def demux_vpf_view(file_to_decode: str, packet_ns: array) -> "tuple[int, int, int]":
+    import PyNvCodec as nvc
+    demuxer = nvc.PyFFmpegDemuxer(file_to_decode)
+
+    packets, total_bytes, buffer = 0, 0, BufferMoves()
+    while True:
+        start_counter = time.perf_counter_ns()
+        packet = demuxer.DemuxSinglePacketView()
+        end_counter = time.perf_counter_ns()
+        if packet.size == 0:
+            break
+
+        packet_ns.append(end_counter - start_counter)
+        packets += 1
+        total_bytes += packet.size
+        buffer.update(packet)
+
+    return packets, total_bytes, buffer.moves
+
+
+# Packets returned per DemuxPackets() call
+PACKETS_PER_CALL = 64
+
+
+# Many packets per call, packed into one array. Call time is split evenly
+# across the packets it returned.
+def demux_vpf_batch(file_to_decode: str, packet_ns: array) -> "tuple[int, int, int]":
+    import PyNvCodec as nvc
+    demuxer = nvc.PyFFmpegDemuxer(file_to_decode)
+
+    packets, total_bytes, buffer = 0, 0, BufferMoves()
+    while True:
+        start_counter = time.perf_counter_ns()
+        data, table = demuxer.DemuxPackets(PACKETS_PER_CALL)
+        end_counter = time.perf_counter_ns()
+        if table.size == 0:
+            break
+
+        share_ns = (end_counter - start_counter) // table.size
+        packet_ns.extend([share_ns] * table.size)
+        packets += table.size
+        total_bytes += data.size
+        buffer.update(data)
+
+    return packets, total_bytes, buffer.moves
+
+
+def demux_pyav(file_to_decode: str, packet_ns: array) -> "tuple[int, int, int]":
+    import av
+    av_input = av.open(file_to_decode)
+    demuxed = av_input.demux(video=0)
+
+    packets, total_bytes, buffer = 0, 0, BufferMoves()
+    while True:
+        start_counter = time.perf_counter_ns()
+        packet = next(demuxed, None)
+        end_counter = time.perf_counter_ns()
+        if packet is None:
+            break
+        # Empty packet at the end only tells decoders to flush
+        if packet.size == 0:
+            continue
+
+        packet_ns.append(end_counter - start_counter)
+        packets += 1
+        total_bytes += packet.size
+        buffer.update(np.frombuffer(packet, dtype=np.uint8))
+
+    av_input.close()
+    return packets, total_bytes, buffer.moves
+
+
+# PyAV demux plus the same Annex-B conversion PyFFmpegDemuxer does, so the
+# filter cost can be told apart from container parsing
+def demux_pyav_annexb(file_to_decode: str, packet_ns: array) -> "tuple[int, int, int]":
+    import av
+    from av.bitstream import BitStreamFilterContext
+    av_input = av.open(file_to_decode)
+    stream = av_input.streams.video[0]
+    bsf_name = {"h264": "h264_mp4toannexb", "hevc": "hevc_mp4toannexb"}.get(
+        stream.codec_context.name, "null")
+    bsf = BitStreamFilterContext(bsf_name, stream)
+    demuxed = av_input.demux(stream)
+
+    packets, total_bytes, buffer = 0, 0, BufferMoves()
+    while True:
+        start_counter = time.perf_counter_ns()
+        packet = next(demuxed, None)
+        filtered = bsf.filter(packet if packet is not None and packet.size > 0
+                              else None)
+        end_counter = time.perf_counter_ns()
+
+        for filtered_packet in filtered:
+            packet_ns.append(end_counter - start_counter)
+            packets += 1
+            total_bytes += filtered_packet.size
+            buffer.update(np.frombuffer(filtered_packet, dtype=np.uint8))
+        if packet is None:
+            break
+
+    av_input.close()
+    return packets, total_bytes, buffer.moves
+
+
+# Demuxer name on the command line -> (demux function, name used in result
+# files)
+DEMUXERS = {
+    "vpf": (demux_vpf, "VPF"),
+    "vpf-into": (demux_vpf_into, "VPF_Into"),
+    "vpf-view": (demux_vpf_view, "VPF_View"),
+    "vpf-batch": (demux_vpf_batch, "VPF_Batch"),
+    "pyav": (demux_pyav, "PyAV"),
+    "pyav-annexb": (demux_pyav_annexb, "PyAV_AnnexB"),
+}
+
+
+def run_demux(demux_function, file_to_decode: str) -> "dict[str, float]":
+    """Read every video packet of the file without decoding it.
+
+    Returns packets/s, bytes/s, per-packet latency and how often packet
+    data moved to a new address. Every call that returns a packet is timed
+    on its own.
+    """
+    packet_ns = array('q')
+    start_counter = time.perf_counter_ns()
+    packets, total_bytes, buffer_moves = demux_function(file_to_decode,
+                                                        packet_ns)
+    end_counter = time.perf_counter_ns()
+
+    seconds = (end_counter - start_counter) / 1_000_000_000
+    latency = summarize(ns_to_ms(np.frombuffer(packet_ns, dtype=np.int64)))
+    return {
+        "packets": packets,
+        "bytes": total_bytes,
+        "seconds": seconds,
+        "packets_per_s": packets / seconds if seconds > 0 else 0,
+        "mb_per_s": b_to_mb(total_bytes) / seconds if seconds > 0 else 0,
+        "packet_ms_avg": latency["avg"],
+        "packet_ms_q2": latency["q2"],
+        "packet_ms_p99": latency["p99"],
+        "buffer_moves": buffer_moves,
+    }
+
+
+def demux_to_csv(file_name: str, result: "dict[str, float]"):
+    with open('benchmark-results/demux/{}.csv'.format(file_name), 'w') as csv_file:
+        csv_writer = csv.DictWriter(csv_file, fieldnames=FIELDS)
+        csv_writer.writeheader()
+        csv_writer.writerow({key: round(result[key], 4) for key in FIELDS})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark demuxing alone, without decoding")
+    parser.add_argument("demuxer", choices=["all", *DEMUXERS.keys()],
+                        help="demuxer to benchmark")
+    parser.add_argument("file", help="input file")
+    args = parser.parse_args()
+
+    setproctitle.setproctitle(PROCESS_NAME)
+
+    demuxers_to_run = list(DEMUXERS.keys()) if args.demuxer == "all" \
+        else [args.demuxer]
+    for demuxer in demuxers_to_run:
+        demux_function, result_name = DEMUXERS[demuxer]
+        try:
+            result = run_demux(demux_function, args.file)
+        except ImportError as e:
+            print("Skipping {}, demuxer unavailable: {}".format(
+                demuxer, getattr(e, 'message', str(e))))
+            continue
+
+        demux_to_csv(result_name, result)
+        print("{}: {:.0f} packets/s, {:.2f} MB/s, {:.3f} ms per packet, "
+              "{} buffer moves".format(
+                  result_name, result["packets_per_s"], result["mb_per_s"],
+                  result["packet_ms_avg"], result["buffer_moves"]))
+
+    exit(0)
@@ -0,0 +1,88 @@
+import argparse
+import numpy as np
+import setproctitle
+from backends import BACKENDS, load_available_backends
+from main import PROCESS_NAME
+from metrics import FakeGpuProbe
+
+# Tool -> tool whose frame count it has to match
+PAIRED_TOOLS = {"nvdec-pipeline": "nvdec"}
+
+
+# Number of video packets in the container, which is the number of frames
+# a decoder has to output. Container metadata is often missing or wrong, so
+# packets are counted, with PyAV or else with the PyNvCodec demuxer.
+def container_frame_count(file_to_decode: str) -> int:
+    try:
+        import av
+    except ImportError:
+        return demuxer_frame_count(file_to_decode)
+
+    av_input = av.open(file_to_decode)
+    frames = sum(1 for packet in av_input.demux(video=0) if packet.size > 0)
+    av_input.close()
+    return frames
+
+
+def demuxer_frame_count(file_to_decode: str) -> int:
+    import PyNvCodec as nvc
+    demuxer = nvc.PyFFmpegDemuxer(file_to_decode)
+    packet = np.ndarray(shape=(0), dtype=np.uint8)
+
+    frames = 0
+    while demuxer.DemuxSinglePacket(packet):
+        if packet.size > 0:
+            frames += 1
+    return frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check that every tool outputs as many frames as the "
+        "container holds, flushed frames included")
+    parser.add_argument("tool", choices=["all", *BACKENDS.keys()],
+                        help="tool to check")
+    parser.add_argument("file", help="input file")
+    args = parser.parse_args()
+
+    setproctitle.setproctitle(PROCESS_NAME)
+
+    expected = container_frame_count(args.file)
+    print("Container: {} frames".format(expected))
+
+    tools_to_run = list(BACKENDS.keys()) if args.tool == "all" else [args.tool]
+    backends = load_available_backends(tools_to_run)
+    # Nothing checked is a failure, not a pass
+    if len(backends) == 0:
+        exit(1)
+
+    failed = False
+    counts = {}
+    for tool_name, (tool_class, result_name) in backends.items():
+        try:
+            tool = tool_class(args.file, False, PROCESS_NAME,
+                              gpu_probe=FakeGpuProbe())
+            frames = tool.decode_all()
+        except Exception as e:
+            failed = True
+            print("{}: ERROR, {}".format(
+                result_name, getattr(e, 'message', str(e))))
+            continue
+
+        counts[tool_name] = frames
+        if frames != expected:
+            failed = True
+        print("{}: {} frames, {}".format(
+            result_name, frames, "OK" if frames == expected else "MISMATCH"))
+
+    # Pipelined decoder must output exactly what the one-thread one does,
+    # even when both miss the container count
+    for tool_name, reference_name in PAIRED_TOOLS.items():
+        if tool_name in counts and reference_name in counts:
+            same = counts[tool_name] == counts[reference_name]
+            if not same:
+                failed = True
+            print("{} vs {}: {}".format(tool_name, reference_name,
+                                        "OK" if same else "MISMATCH"))
+
+    exit(1 if failed else 0)
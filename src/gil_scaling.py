@@ -0,0 +1,79 @@
+import argparse
+import csv
+import setproctitle
+from backends import BACKENDS, load_available_backends
+from main import PROCESS_NAME
+from streams import run_streams
+from sweep import parse_int_list
+
+# Columns of benchmark-results/gil/<tool>.csv, one row per thread count
+FIELDS = ["threads", "thread_fps", "process_fps", "thread_efficiency",
+          "thread_vs_process"]
+
+
+def run_gil_scaling(tool_class, file_to_decode: str, threads: "list[int]",
+                    warmup_frames=0) -> "list[dict]":
+    """Decode one copy of the file per Python thread, then per process.
+
+    thread_efficiency is thread FPS relative to linear scaling from the
+    smallest thread count. Processes never share a GIL, so
+    thread_vs_process close to 1.0 means the decoder doesn't hold it while
+    decoding.
+    """
+    rows = []
+    for thread_count in threads:
+        row = {"threads": thread_count}
+        for executor in ("thread", "process"):
+            result = run_streams(tool_class, file_to_decode, thread_count,
+                                 warmup_frames, executor, PROCESS_NAME)
+            row["{}_fps".format(executor)] = result["fps"]
+        rows.append(row)
+
+    base_threads, base_fps = rows[0]["threads"], rows[0]["thread_fps"]
+    for row in rows:
+        scale = row["threads"] / base_threads
+        row["thread_efficiency"] = row["thread_fps"] / \
+            (scale * base_fps) if base_fps > 0 else 0
+        row["thread_vs_process"] = row["thread_fps"] / \
+            row["process_fps"] if row["process_fps"] > 0 else 0
+
+    return rows
+
+
+def gil_scaling_to_csv(file_name: str, rows: "list[dict]"):
+    with open('benchmark-results/gil/{}.csv'.format(file_name), 'w') as csv_file:
+        csv_writer = csv.DictWriter(csv_file, fieldnames=FIELDS)
+        csv_writer.writeheader()
+        for row in rows:
+            csv_writer.writerow({key: round(row[key], 4) for key in FIELDS})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check that decoding from several Python threads scales "
+        "like decoding from several processes")
+    parser.add_argument("tool", choices=["all", *BACKENDS.keys()],
+                        help="tool to benchmark")
+    parser.add_argument("file", help="input file")
+    parser.add_argument("warmup", type=int, nargs="?", default=0,
+                        help="number of warm up frames excluded from latency "
+                        "statistics")
+    parser.add_argument("--threads", type=parse_int_list, default="1,2,4,8",
+                        help="comma separated Python thread counts")
+    args = parser.parse_args()
+
+    setproctitle.setproctitle(PROCESS_NAME)
+
+    tools_to_run = list(BACKENDS.keys()) if args.tool == "all" else [args.tool]
+    backends = load_available_backends(tools_to_run)
+    for tool_class, result_name in backends.values():
+        rows = run_gil_scaling(tool_class, args.file, args.threads,
+                               args.warmup)
+        gil_scaling_to_csv(result_name, rows)
+        for row in rows:
+            print("{} threads={}: {:.2f} FPS, efficiency {:.2f}, "
+                  "{:.2f}x of processes".format(
+                      result_name, row["threads"], row["thread_fps"],
+                      row["thread_efficiency"], row["thread_vs_process"]))
+
+    exit(0)
@@ -1,61 +1,181 @@
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import multiprocessing
 import time
-import sys
 import setproctitle
-from tools import PyAV, OpenCV, NVDec
+from backends import BACKENDS, load_available_backends
+from native_stats import native_stats_metadata, start_native_stats, \
+    stop_native_stats
+from streams import EXECUTORS, run_streams, streams_to_csv
+from tools import OUTPUT_FORMATS, metadata_to_csv
 
 PROCESS_NAME = "videc-benchmark"
+# Throughput runs happen in a child process, see run_throughput()
+THROUGHPUT_PROCESS_NAME = PROCESS_NAME + "-throughput"
+
+# libavcodec threading modes accepted by --thread-type
+THREAD_TYPES = ["none", "frame", "slice", "auto"]
+
+
+# Decoder threading and zero-copy options are only passed to tools that
+# support them
+def get_tool_options(tool_class, threads=0, thread_type: str = None,
+                     output_format="native", zero_copy=False) -> dict:
+    tool_options = {"output_format": output_format}
+    if tool_class.supports_threads:
+        tool_options.update(threads=threads, thread_type=thread_type)
+    if tool_class.supports_zero_copy:
+        tool_options.update(zero_copy=zero_copy)
+
+    return tool_options
+
+
+# PyNvCodec allocation and buffer pool counters are only taken when asked
+# for, tracking adds a lock to every native allocation. They cover the whole
+# run, decoder setup included.
+def run_latency(tool_class, result_name: str, file_to_decode: str,
+                warmup_frames: int, tool_options: dict, native_stats=False,
+                streaming_summary=False):
+    native_stats = native_stats and tool_class.supports_native_stats
+    pool_baseline = start_native_stats() if native_stats else None
+    tool = tool_class(file_to_decode, True, PROCESS_NAME, **tool_options)
+    if streaming_summary:
+        tool.stream_records()
+    frames = tool.decode(warmup_iteration=warmup_frames)
+    if native_stats:
+        tool.metadata.update(native_stats_metadata(
+            stop_native_stats(pool_baseline), frames))
+    tool.metadata_to_csv(tool.name)
+    summary = tool.summarize_records()
+    tool.summary_to_csv(result_name, summary)
+
+
+# Runs in a child process, so it must stay a module-level function
+def _run_throughput(tool_class, result_name: str, file_to_decode: str,
+                    tool_options: dict, native_stats=False):
+    # Tools find the process they measure by name, this one and not the
+    # parent must match
+    setproctitle.setproctitle(THROUGHPUT_PROCESS_NAME)
+    native_stats = native_stats and tool_class.supports_native_stats
+    pool_baseline = start_native_stats() if native_stats else None
+    tool = tool_class(file_to_decode, False, THROUGHPUT_PROCESS_NAME,
+                      **tool_options)
+    result = tool.throughput()
+    if native_stats:
+        tool.metadata.update(native_stats_metadata(
+            stop_native_stats(pool_baseline), result["frames"]))
+    tool.throughput_to_csv(result_name, result)
+    tool.metadata_to_csv("{}-throughput".format(result_name))
+    print("{}: {:.2f} FPS, {:.2f} ms CPU per frame, {:.2f} MB peak RSS".format(
+        result_name, result["fps"], result["cpu_s_per_frame"] * 1000,
+        result["peak_rss_mb"]))
+
+
+# Peak RSS is the high-water mark of the whole process, so every tool runs
+# in a fresh child to get a peak of its own. Forked children would inherit
+# the parent's CUDA state and spawned ones its peak RSS, forkserver children
+# start from a clean process.
+def run_throughput(tool_class, result_name: str, file_to_decode: str,
+                   tool_options: dict, native_stats=False):
+    with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("forkserver")) as pool:
+        pool.submit(_run_throughput, tool_class, result_name, file_to_decode,
+                    tool_options, native_stats).result()
+
+
+def run_concurrent(tool_class, result_name: str, file_to_decode: str,
+                   warmup_frames: int, streams: int, executor: str,
+                   tool_options: dict, native_stats=False):
+    result = run_streams(tool_class, file_to_decode, streams,
+                         warmup_frames, executor, PROCESS_NAME, tool_options,
+                         native_stats)
+    file_name = "{}-{}-{}".format(result_name, executor, streams)
+    streams_to_csv(file_name, result)
+    if native_stats and tool_class.supports_native_stats:
+        metadata_to_csv(file_name, result["metadata"])
+    print("{} x{} ({}): {:.2f} FPS, p99 {:.2f} ms (worst stream {:.2f} ms), "
+          "{:.2f} cores busy".format(
+              result_name, streams, executor, result["fps"],
+              result["p99_ms_mean"], result["p99_ms_max"],
+              result["cpu_cores_busy"]))
 
 
 if __name__ == "__main__":
-    if(len(sys.argv) < 4):
-        print("Provide tool to use, input file, and warm up frames")
-        exit(1)
+    parser = argparse.ArgumentParser(
+        description="Benchmark video decoding of NVDEC, PyAV and OpenCV")
+    parser.add_argument("tool", choices=["all", *BACKENDS.keys()],
+                        help="tool to benchmark")
+    parser.add_argument("file", help="input file")
+    parser.add_argument("warmup", type=int, nargs="?", default=0,
+                        help="number of warm up frames excluded from latency "
+                        "statistics")
+    parser.add_argument("--mode", choices=["latency", "throughput"],
+                        default="latency",
+                        help="latency measures every frame, throughput decodes "
+                        "the whole file without per-frame instrumentation")
+    parser.add_argument("--streams", type=int, default=1,
+                        help="decode N copies of the file concurrently, one "
+                        "decoder instance each")
+    parser.add_argument("--executor", choices=EXECUTORS.keys(),
+                        default="thread",
+                        help="pool used to drive concurrent streams")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="decoder thread count, 0 for library default "
+                        "(PyAV and VPF FFmpeg only)")
+    parser.add_argument("--thread-type", choices=THREAD_TYPES, default=None,
+                        help="libavcodec threading mode (PyAV and VPF FFmpeg "
+                        "only)")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS,
+                        default="native",
+                        help="pixel format frames are converted to before "
+                        "being copied out as ndarrays")
+    parser.add_argument("--zero-copy", action="store_true",
+                        help="hand frames out as read-only views of decoder "
+                        "memory instead of copies (VPF FFmpeg only)")
+    parser.add_argument("--streaming-summary", action="store_true",
+                        help="summarize latency records while decoding "
+                        "instead of keeping every frame, for runs too long "
+                        "to hold in memory (quantiles are estimated to 1%%, "
+                        "no per-frame CSVs or plots)")
+    parser.add_argument("--native-stats", action="store_true",
+                        help="count PyNvCodec native allocations and buffer "
+                        "pool use over the run and write them to the "
+                        "metadata (PyNvCodec tools only, adds a lock to "
+                        "every native allocation)")
+    args = parser.parse_args()
+    # Concurrent streams are always measured per frame, see streams.py
+    if args.streams > 1 and args.mode == "throughput":
+        parser.error("--streams can't be combined with --mode throughput")
+    if args.streaming_summary and (args.streams > 1 or
+                                   args.mode == "throughput"):
+        parser.error("--streaming-summary only applies to single stream "
+                     "latency runs")
 
-    tool_to_run = sys.argv[1]
-    file_to_decode = sys.argv[2]
-    warmup_frames = int(sys.argv[3])
     setproctitle.setproctitle(PROCESS_NAME)
 
-    if tool_to_run == "all":
-        opencv = OpenCV(file_to_decode, True, PROCESS_NAME)
-        opencv.decode(warmup_iteration=warmup_frames)
-        opencv_summary = opencv.summarize_records()
-        opencv.summary_to_csv("OpenCV", opencv_summary)
-
-        time.sleep(5)
-
-        pyav = PyAV(file_to_decode, True, PROCESS_NAME)
-        pyav.decode(warmup_iteration=warmup_frames)
-        pyav_summary = pyav.summarize_records()
-        pyav.summary_to_csv("PyAV", pyav_summary)
-
-        time.sleep(5)
-
-        nvdec = NVDec(file_to_decode, True, PROCESS_NAME)
-        nvdec.decode(warmup_iteration=warmup_frames)
-        nvdec_summary = nvdec.summarize_records()
-        nvdec.summary_to_csv("NVDEC", nvdec_summary)
-
-    elif tool_to_run == "pyav":
-        pyav = PyAV(file_to_decode, True, PROCESS_NAME)
-        pyav.decode(warmup_iteration=warmup_frames)
-        pyav_summary = pyav.summarize_records()
-        pyav.summary_to_csv("PyAV", pyav_summary)
-
-    elif tool_to_run == "opencv":
-        opencv = OpenCV(file_to_decode, True, PROCESS_NAME)
-        opencv.decode(warmup_iteration=warmup_frames)
-        opencv_summary = opencv.summarize_records()
-        opencv.summary_to_csv("OpenCV", opencv_summary)
-
-    elif tool_to_run == "nvdec":
-        nvdec = NVDec(file_to_decode, True, PROCESS_NAME)
-        nvdec.decode(warmup_iteration=warmup_frames)
-        nvdec_summary = nvdec.summarize_records()
-        nvdec.summary_to_csv("NVDEC", nvdec_summary)
-
-    else:
-        print("Can only run the following tools: all, nvdec, pyav, opencv")
+    tools_to_run = list(BACKENDS.keys()) if args.tool == "all" else [args.tool]
+    backends = load_available_backends(tools_to_run)
+    if len(backends) == 0:
         exit(1)
 
+    for i, (tool_class, result_name) in enumerate(backends.values()):
+        if i > 0:
+            time.sleep(5)
+
+        tool_options = get_tool_options(
+            tool_class, args.threads, args.thread_type, args.output_format,
+            args.zero_copy)
+        if args.streams > 1:
+            run_concurrent(tool_class, result_name, args.file, args.warmup,
+                           args.streams, args.executor, tool_options,
+                           args.native_stats)
+        elif args.mode == "throughput":
+            run_throughput(tool_class, result_name, args.file, tool_options,
+                           args.native_stats)
+        else:
+            run_latency(tool_class, result_name, args.file, args.warmup,
+                        tool_options, args.native_stats,
+                        args.streaming_summary)
+
     exit(0)
@@ -0,0 +1,136 @@
+from abc import abstractmethod
+import re
+import threading
+import time
+import numpy as np
+import psutil
+from utils import b_to_mb
+
+
+class GpuProbe:
+    # Returns (GPU utilization in %, GPU memory used by the benchmark in MB)
+    @abstractmethod
+    def sample(self) -> "tuple[float, float]":
+        pass
+
+
+class GpustatProbe(GpuProbe):
+    def __init__(self, process_name="python3") -> None:
+        import gpustat
+        self._gpustat = gpustat
+        self.process_name = re.compile(process_name)
+        # Fail early (e.g. no NVML on this machine) instead of in the sampler
+        self._gpustat.core.GPUStatCollection.new_query()
+
+    def sample(self) -> "tuple[float, float]":
+        gpu = self._gpustat.core.GPUStatCollection.new_query()
+        gpu_mem = sum(process["gpu_memory_usage"] for process in gpu[0].processes
+                      if self.process_name.match(process["command"]))
+        return gpu[0].utilization, gpu_mem
+
+
+class FakeGpuProbe(GpuProbe):
+    # Stands in for a real GPU on machines without NVML
+    def __init__(self, utilization=0.0, memory=0.0) -> None:
+        self.utilization = utilization
+        self.memory = memory
+
+    def sample(self) -> "tuple[float, float]":
+        return self.utilization, self.memory
+
+
+def make_gpu_probe(process_name="python3") -> GpuProbe:
+    try:
+        return GpustatProbe(process_name)
+    except Exception as e:
+        print("GPU metrics unavailable, using fake probe: {}".format(
+            getattr(e, 'message', str(e))))
+        return FakeGpuProbe()
+
+
+class MetricsSampler:
+    """Samples CPU, memory and GPU metrics on a background thread.
+
+    Every sample is stamped with ``time.perf_counter_ns`` so it can be joined
+    with per-frame timestamps taken by the decode loop afterwards.
+    """
+
+    def __init__(self, psutil_handle: psutil.Process, gpu_probe: GpuProbe,
+                 interval=0.05) -> None:
+        self._psutil_handle = psutil_handle
+        self.gpu_probe = gpu_probe
+        self.interval = interval
+        self.samples: "list[tuple[int, float, float, float, float]]" = []
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def start(self):
+        self.samples = []
+        self._stop_event.clear()
+        # First call of cpu_percent() always returns 0, prime it
+        psutil.cpu_percent()
+        self._take_sample()
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._take_sample()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self._take_sample()
+
+    def _take_sample(self):
+        gpu_util, gpu_mem = self.gpu_probe.sample()
+        self.samples.append((
+            time.perf_counter_ns(),
+            psutil.cpu_percent(),
+            b_to_mb(self._psutil_handle.memory_info().rss),
+            gpu_util,
+            gpu_mem,
+        ))
+
+    # Drop samples that frames finishing after timestamp_ns can't be matched
+    # with, the latest one before it is kept. Keeps long streaming runs flat.
+    def discard_before(self, timestamp_ns: int):
+        stale = 0
+        for sample in self.samples:
+            if sample[0] > timestamp_ns:
+                break
+            stale += 1
+        del self.samples[:max(stale - 1, 0)]
+
+    # Match each frame with the latest sample taken before it finished
+    def join(self, frame_timestamps_ns) -> "dict[str, np.ndarray]":
+        frame_timestamps_ns = np.asarray(frame_timestamps_ns, dtype=np.int64)
+        if len(self.samples) == 0:
+            empty = np.zeros(len(frame_timestamps_ns))
+            return {"cpu": empty, "mem": empty, "gpu": empty, "gpu_mem": empty}
+
+        sample_timestamps = np.array(
+            [sample[0] for sample in self.samples], dtype=np.int64)
+        samples = np.array([sample[1:] for sample in self.samples])
+        idx = np.searchsorted(sample_timestamps,
+                              frame_timestamps_ns, side="right") - 1
+        idx = np.clip(idx, 0, len(samples) - 1)
+
+        return {
+            "cpu": samples[idx, 0],
+            "mem": samples[idx, 1],
+            "gpu": samples[idx, 2],
+            "gpu_mem": samples[idx, 3],
+        }
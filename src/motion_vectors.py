@@ -0,0 +1,152 @@
+import argparse
+from array import array
+import csv
+import time
+import numpy as np
+import setproctitle
+from main import PROCESS_NAME
+from summary import summarize
+from utils import ns_to_ms
+
+# Columns of benchmark-results/motion_vectors/<extractor>.csv
+FIELDS = ["frames", "vectors", "seconds", "fps", "vectors_per_frame",
+          "vectors_per_s", "extract_ms_avg", "extract_ms_q2",
+          "extract_ms_p99"]
+
+# Makes libavcodec attach motion vectors to every decoded frame
+EXPORT_MVS_OPTIONS = {"flags2": "+export_mvs"}
+
+
+# Vectors copied into a new structured array in one memcpy
+def extract_vpf(file_to_decode: str, extract_ns: array) -> "tuple[int, int]":
+    import PyNvCodec as nvc
+    decoder = nvc.PyFfmpegDecoder(file_to_decode, EXPORT_MVS_OPTIONS)
+    frame = np.ndarray(shape=(0), dtype=np.uint8)
+
+    frames, vectors = 0, 0
+    while decoder.DecodeSingleFrame(frame):
+        start_counter = time.perf_counter_ns()
+        motion_vectors = decoder.GetMotionVectors()
+        end_counter = time.perf_counter_ns()
+
+        extract_ns.append(end_counter - start_counter)
+        frames += 1
+        vectors += motion_vectors.size
+
+    return frames, vectors
+
+
+# Read-only view of the decoder's side data, valid until next decode call
+def extract_vpf_view(file_to_decode: str, extract_ns: array) -> "tuple[int, int]":
+    import PyNvCodec as nvc
+    decoder = nvc.PyFfmpegDecoder(file_to_decode, EXPORT_MVS_OPTIONS)
+    frame = np.ndarray(shape=(0), dtype=np.uint8)
+
+    frames, vectors = 0, 0
+    while decoder.DecodeSingleFrame(frame):
+        start_counter = time.perf_counter_ns()
+        motion_vectors = decoder.GetMotionVectorsView()
+        end_counter = time.perf_counter_ns()
+
+        extract_ns.append(end_counter - start_counter)
+        frames += 1
+        vectors += motion_vectors.size
+
+    return frames, vectors
+
+
+def extract_pyav(file_to_decode: str, extract_ns: array) -> "tuple[int, int]":
+    import av
+    av_input = av.open(file_to_decode)
+    stream = av_input.streams.video[0]
+    stream.codec_context.options = EXPORT_MVS_OPTIONS
+
+    frames, vectors = 0, 0
+    for frame in av_input.decode(stream):
+        start_counter = time.perf_counter_ns()
+        side_data = frame.side_data.get("MOTION_VECTORS")
+        motion_vectors = side_data.to_ndarray() if side_data is not None \
+            else np.ndarray(shape=(0), dtype=np.uint8)
+        end_counter = time.perf_counter_ns()
+
+        extract_ns.append(end_counter - start_counter)
+        frames += 1
+        vectors += motion_vectors.size
+
+    av_input.close()
+    return frames, vectors
+
+
+# Extractor name on the command line -> (extract function, name used in
+# result files)
+EXTRACTORS = {
+    "vpf": (extract_vpf, "VPF"),
+    "vpf-view": (extract_vpf_view, "VPF_View"),
+    "pyav": (extract_pyav, "PyAV"),
+}
+
+
+def run_motion_vectors(extract_function,
+                       file_to_decode: str) -> "dict[str, float]":
+    """Decode every frame with motion vector export on and hand the vectors
+    out as a NumPy array.
+
+    Only the hand-out is timed per frame, vectors_per_s is the extraction
+    rate alone. FPS includes decoding.
+    """
+    extract_ns = array('q')
+    start_counter = time.perf_counter_ns()
+    frames, vectors = extract_function(file_to_decode, extract_ns)
+    end_counter = time.perf_counter_ns()
+
+    seconds = (end_counter - start_counter) / 1_000_000_000
+    extract_s = sum(extract_ns) / 1_000_000_000
+    latency = summarize(ns_to_ms(np.frombuffer(extract_ns, dtype=np.int64)))
+    return {
+        "frames": frames,
+        "vectors": vectors,
+        "seconds": seconds,
+        "fps": frames / seconds if seconds > 0 else 0,
+        "vectors_per_frame": vectors / frames if frames > 0 else 0,
+        "vectors_per_s": vectors / extract_s if extract_s > 0 else 0,
+        "extract_ms_avg": latency["avg"],
+        "extract_ms_q2": latency["q2"],
+        "extract_ms_p99": latency["p99"],
+    }
+
+
+def motion_vectors_to_csv(file_name: str, result: "dict[str, float]"):
+    with open('benchmark-results/motion_vectors/{}.csv'.format(file_name), 'w') as csv_file:
+        csv_writer = csv.DictWriter(csv_file, fieldnames=FIELDS)
+        csv_writer.writeheader()
+        csv_writer.writerow({key: round(result[key], 4) for key in FIELDS})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark motion vector extraction")
+    parser.add_argument("extractor", choices=["all", *EXTRACTORS.keys()],
+                        help="extractor to benchmark")
+    parser.add_argument("file", help="input file")
+    args = parser.parse_args()
+
+    setproctitle.setproctitle(PROCESS_NAME)
+
+    extractors_to_run = list(EXTRACTORS.keys()) if args.extractor == "all" \
+        else [args.extractor]
+    for extractor in extractors_to_run:
+        extract_function, result_name = EXTRACTORS[extractor]
+        try:
+            result = run_motion_vectors(extract_function, args.file)
+        except ImportError as e:
+            print("Skipping {}, extractor unavailable: {}".format(
+                extractor, getattr(e, 'message', str(e))))
+            continue
+
+        motion_vectors_to_csv(result_name, result)
+        print("{}: {:.0f} vectors per frame, {:.0f} vectors/s, {:.3f} ms "
+              "per frame".format(
+                  result_name, result["vectors_per_frame"],
+                  result["vectors_per_s"], result["extract_ms_avg"]))
+
+    exit(0)
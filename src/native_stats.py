@@ -0,0 +1,66 @@
+from utils import b_to_mb
+
+# Buffer pool counters reported per run, the rest are totals since start
+POOL_COUNTERS = ("acquires", "hits", "system_allocs")
+
+
+# PyNvCodec keeps one allocation tracker and one buffer pool per process, so
+# counters are taken once per run by the driver, around all the decoders of
+# the run, never by the decoders themselves.
+def start_native_stats() -> "dict[str, int]":
+    """Turn allocation tracking on and zero its counters.
+
+    Returns buffer pool counters at this point, pass them to
+    stop_native_stats(). Tracking takes a lock on every native allocation,
+    so it's off unless a run asks for it.
+    """
+    import PyNvCodec as nvc
+    nvc.SetAllocTracking(True)
+    nvc.ResetAllocStats()
+    pool = nvc.GetBufferPoolStats()
+    return {key: getattr(pool, key) for key in POOL_COUNTERS}
+
+
+def stop_native_stats(pool_baseline: "dict[str, int]") -> "dict[str, int]":
+    """Take counters since start_native_stats() and turn tracking off."""
+    import PyNvCodec as nvc
+    token_stats = nvc.GetTokenAllocStats()
+    task_stats = nvc.GetTaskAllocStats()
+    nvc.SetAllocTracking(False)
+    pool = nvc.GetBufferPoolStats()
+
+    stats = {
+        "native_allocs": sum(stats.allocations for stats in token_stats),
+        # Peaks of different token types needn't coincide, so this is an
+        # upper bound
+        "native_peak_bytes": sum(stats.peak_bytes for stats in token_stats),
+        "buffer_pool_bytes_cached": pool.bytes_cached,
+    }
+    for key in POOL_COUNTERS:
+        stats["buffer_pool_" + key] = getattr(pool, key) - pool_baseline[key]
+    for stats_of_task in task_stats:
+        stats["{}_native_allocs".format(stats_of_task.name)] = \
+            stats_of_task.allocations
+
+    return stats
+
+
+# Counters of runs in separate processes add up
+def merge_native_stats(stats_list: "list[dict[str, int]]") -> "dict[str, int]":
+    merged = {}
+    for stats in stats_list:
+        for key, value in stats.items():
+            merged[key] = merged.get(key, 0) + value
+
+    return merged
+
+
+def native_stats_metadata(stats: "dict[str, int]",
+                          frames: int) -> "dict[str, float]":
+    metadata = {key: value for key, value in stats.items()
+                if key != "native_peak_bytes"}
+    metadata["native_allocs_per_frame"] = round(
+        stats["native_allocs"] / frames, 4) if frames > 0 else 0
+    metadata["native_peak_mb"] = round(
+        b_to_mb(stats["native_peak_bytes"]), 2)
+    return metadata
@@ -0,0 +1,128 @@
+import argparse
+import csv
+import random
+import time
+import numpy as np
+import setproctitle
+from main import PROCESS_NAME
+from summary import summarize
+from utils import ns_to_ms
+
+# Columns of benchmark-results/seek/VPF.csv, one row per mode
+FIELDS = ["mode", "seeks", "seconds", "seeks_per_s", "seek_ms_q2",
+          "seek_ms_p99", "frames_per_seek", "misses", "index_s"]
+
+# Sidecar index file next to the input unless --index is given
+INDEX_SUFFIX = ".vpfidx"
+
+
+def open_demuxer(file_to_decode: str, index_path: str = None):
+    """Open the demuxer, with a packet index when ``index_path`` is set.
+
+    The index is loaded from the sidecar if it's there and matches the
+    input, otherwise it's built and saved. Returns the demuxer and the time
+    spent getting the index.
+    """
+    import PyNvCodec as nvc
+    demuxer = nvc.PyFFmpegDemuxer(file_to_decode)
+    if index_path is None:
+        return demuxer, 0.0
+
+    start_counter = time.perf_counter_ns()
+    if not demuxer.LoadIndex(index_path):
+        if not demuxer.BuildIndex():
+            raise RuntimeError("Can't index {}".format(file_to_decode))
+        demuxer.SaveIndex(index_path)
+    end_counter = time.perf_counter_ns()
+    return demuxer, (end_counter - start_counter) / 1_000_000_000
+
+
+def run_seeks(demuxer, index: np.ndarray, frames: "list[int]") -> "dict[str, float]":
+    """Seek to every frame in ``frames`` and read up to its packet.
+
+    Each seek goes to the previous key frame, like a decoder would, then
+    demuxes forward to the requested frame. Packets read per seek is the
+    number of frames a decoder has to decode. Seeks that land past the
+    frame count as misses.
+    """
+    import PyNvCodec as nvc
+    # Frame number -> position in decode order
+    frame_order = np.argsort(index["pts"], kind="stable")
+    packet = np.ndarray(shape=(0), dtype=np.uint8)
+    packet_data = nvc.PacketData()
+
+    seek_ns = []
+    packets_read, misses = 0, 0
+    for frame in frames:
+        target = index[frame_order[frame]]
+        start_counter = time.perf_counter_ns()
+        seek_ctx = nvc.SeekContext(frame, nvc.SeekMode.PREV_KEY_FRAME)
+        found = demuxer.Seek(seek_ctx, packet)
+        packets_read += 1
+        demuxer.LastPacketData(packet_data)
+        while found and packet_data.dts < target["dts"]:
+            found = demuxer.DemuxSinglePacket(packet)
+            packets_read += 1
+            demuxer.LastPacketData(packet_data)
+        end_counter = time.perf_counter_ns()
+
+        seek_ns.append(end_counter - start_counter)
+        if not found or packet_data.dts != target["dts"]:
+            misses += 1
+
+    seconds = sum(seek_ns) / 1_000_000_000
+    seeks = summarize(ns_to_ms(np.array(seek_ns)))
+    return {
+        "seeks": len(frames),
+        "seconds": seconds,
+        "seeks_per_s": len(frames) / seconds if seconds > 0 else 0,
+        "seek_ms_q2": seeks["q2"],
+        "seek_ms_p99": seeks["p99"],
+        "frames_per_seek": packets_read / len(frames) if frames else 0,
+        "misses": misses,
+    }
+
+
+def seek_to_csv(file_name: str, rows: "list[dict]"):
+    with open('benchmark-results/seek/{}.csv'.format(file_name), 'w') as csv_file:
+        csv_writer = csv.DictWriter(csv_file, fieldnames=FIELDS)
+        csv_writer.writeheader()
+        for row in rows:
+            csv_writer.writerow({key: row[key] if key == "mode"
+                                 else round(row[key], 4) for key in FIELDS})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark random frame access with PyFFmpegDemuxer, "
+        "with and without a packet index")
+    parser.add_argument("file", help="input file")
+    parser.add_argument("--seeks", type=int, default=200,
+                        help="number of random frames to seek to")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for the random frame numbers")
+    parser.add_argument("--index", default=None,
+                        help="sidecar index file, defaults to the input path "
+                        "plus {}".format(INDEX_SUFFIX))
+    args = parser.parse_args()
+
+    setproctitle.setproctitle(PROCESS_NAME)
+
+    index_path = args.index or args.file + INDEX_SUFFIX
+    indexed, index_s = open_demuxer(args.file, index_path)
+    index = indexed.GetIndex()
+    generator = random.Random(args.seed)
+    frames = [generator.randrange(index.size) for _ in range(args.seeks)]
+
+    rows = []
+    for mode, demuxer, mode_index_s in (
+            ("scan", open_demuxer(args.file)[0], 0.0),
+            ("index", indexed, index_s)):
+        rows.append({"mode": mode, "index_s": mode_index_s,
+                     **run_seeks(demuxer, index, frames)})
+        print("{}: {:.2f} seeks/s, {:.2f} frames per seek, {} misses".format(
+            mode, rows[-1]["seeks_per_s"], rows[-1]["frames_per_seek"],
+            rows[-1]["misses"]))
+    seek_to_csv("VPF", rows)
+
+    exit(0)
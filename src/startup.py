@@ -0,0 +1,106 @@
+import argparse
+import csv
+import json
+from statistics import median
+import subprocess
+import sys
+import time
+import setproctitle
+from backends import BACKENDS, load_backend
+
+# Columns of benchmark-results/startup/<tool>.csv, medians over all runs
+FIELDS = ["runs", "common_import_ms", "backend_import_ms", "init_ms",
+          "first_frame_ms", "first_frame_total_ms", "process_ms"]
+
+
+# Runs in a fresh interpreter so nothing is imported or cached yet. Only
+# light modules are imported at the top of this file, the common import is
+# everything main.py loads before picking a backend.
+def measure_child(tool_name: str, file_to_decode: str) -> "dict[str, float]":
+    start_counter = time.perf_counter_ns()
+    from main import PROCESS_NAME
+    setproctitle.setproctitle(PROCESS_NAME)
+    common_counter = time.perf_counter_ns()
+    tool_class, _ = load_backend(tool_name)
+    import_counter = time.perf_counter_ns()
+    tool = tool_class(file_to_decode, False, PROCESS_NAME)
+    init_counter = time.perf_counter_ns()
+    if not tool.decode_first_frame():
+        raise RuntimeError("No frame decoded from {}".format(file_to_decode))
+    end_counter = time.perf_counter_ns()
+
+    return {
+        "common_import_ms": (common_counter - start_counter) / 1_000_000,
+        "backend_import_ms": (import_counter - common_counter) / 1_000_000,
+        "init_ms": (init_counter - import_counter) / 1_000_000,
+        "first_frame_ms": (end_counter - init_counter) / 1_000_000,
+        "first_frame_total_ms": (end_counter - start_counter) / 1_000_000,
+    }
+
+
+def measure_startup(tool_name: str, file_to_decode: str,
+                    runs=5) -> "dict[str, float]":
+    """Time import, tool construction and first frame of ``tool_name``.
+
+    Every run is a new Python process. process_ms also covers interpreter
+    startup and teardown, as seen from the parent.
+    """
+    results = []
+    for _ in range(runs):
+        start_counter = time.perf_counter_ns()
+        child = subprocess.run(
+            [sys.executable, __file__, tool_name, file_to_decode, "--child"],
+            check=True, capture_output=True, text=True)
+        end_counter = time.perf_counter_ns()
+
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        result["process_ms"] = (end_counter - start_counter) / 1_000_000
+        results.append(result)
+
+    summary = {key: median(result[key] for result in results)
+               for key in FIELDS[1:]}
+    return {"runs": runs, **summary}
+
+
+def startup_to_csv(file_name: str, result: "dict[str, float]"):
+    with open('benchmark-results/startup/{}.csv'.format(file_name), 'w') as csv_file:
+        csv_writer = csv.writer(csv_file, delimiter=',',
+                                quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        csv_writer.writerow(FIELDS)
+        csv_writer.writerow([round(result[key], 2) for key in FIELDS])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure import and first frame latency of every tool")
+    parser.add_argument("tool", choices=["all", *BACKENDS.keys()],
+                        help="tool to benchmark")
+    parser.add_argument("file", help="input file")
+    parser.add_argument("--runs", type=int, default=5,
+                        help="fresh processes per tool, medians are reported")
+    parser.add_argument("--child", action="store_true",
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_child(args.tool, args.file)))
+        exit(0)
+
+    tools_to_run = list(BACKENDS.keys()) if args.tool == "all" else [args.tool]
+    for tool_to_run in tools_to_run:
+        result_name = BACKENDS[tool_to_run][2]
+        try:
+            result = measure_startup(tool_to_run, args.file, args.runs)
+        except subprocess.CalledProcessError as e:
+            print("Skipping {}, startup failed: {}".format(
+                tool_to_run, e.stderr.strip().splitlines()[-1] if e.stderr else e))
+            continue
+
+        startup_to_csv(result_name, result)
+        print("{}: {:.2f} ms to first frame ({:.2f} ms importing), "
+              "{:.2f} ms process".format(
+                  result_name, result["first_frame_total_ms"],
+                  result["common_import_ms"] + result["backend_import_ms"],
+                  result["process_ms"]))
+
+    exit(0)
@@ -0,0 +1,102 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import csv
+import time
+import numpy as np
+import psutil
+from metrics import FakeGpuProbe
+from native_stats import merge_native_stats, native_stats_metadata, \
+    start_native_stats, stop_native_stats
+from summary import summarize
+from utils import ns_to_ms
+
+EXECUTORS = {
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+}
+
+
+# Runs in a pool worker, so it must stay a module-level function
+def _decode_stream(tool_class, file_to_decode: str, warmup_frames: int,
+                   process_name: str, tool_options: dict, native_stats=False):
+    # Pool processes run one stream at a time, so each one can take the
+    # counters of its own process
+    pool_baseline = start_native_stats() if native_stats else None
+    # Streams share one machine, per-stream GPU queries would only add noise
+    tool = tool_class(file_to_decode, False, process_name,
+                      gpu_probe=FakeGpuProbe(), **tool_options)
+    start_counter = time.perf_counter_ns()
+    frames = tool.decode_frames(warmup_frames)
+    end_counter = time.perf_counter_ns()
+    stats = stop_native_stats(pool_baseline) if native_stats else None
+
+    return frames, start_counter, end_counter, tool.records.fpt_ns(), \
+        tool.metadata, stats
+
+
+def run_streams(tool_class, file_to_decode: str, streams: int, warmup_frames=0,
+                executor="thread", process_name="python3",
+                tool_options: dict = None,
+                native_stats=False) -> "dict[str, float]":
+    """Decode ``streams`` copies of the file concurrently.
+
+    Every stream gets its own decoder instance, built with
+    ``tool_options`` as extra constructor arguments. Returns aggregate FPS,
+    per-stream p99 frame latency and how many CPU cores were kept busy.
+    With native_stats, PyNvCodec allocation and buffer pool counters of all
+    streams are added to the returned metadata.
+    """
+    tool_options = tool_options or {}
+    native_stats = native_stats and tool_class.supports_native_stats
+    # Threads share the process-wide counters, so they're taken once around
+    # all of them
+    per_process = native_stats and executor == "process"
+    pool_baseline = start_native_stats() \
+        if native_stats and not per_process else None
+
+    psutil.cpu_percent(percpu=True)
+    with EXECUTORS[executor](max_workers=streams) as pool:
+        futures = [pool.submit(_decode_stream, tool_class, file_to_decode,
+                               warmup_frames, process_name, tool_options,
+                               per_process)
+                   for _ in range(streams)]
+        results = [future.result() for future in futures]
+    cpu_per_core = psutil.cpu_percent(percpu=True)
+
+    frames = sum(result[0] for result in results)
+    # All streams are configured alike, keep the first one's settings
+    metadata = dict(results[0][4])
+    if per_process:
+        metadata.update(native_stats_metadata(
+            merge_native_stats([result[5] for result in results]), frames))
+    elif native_stats:
+        metadata.update(native_stats_metadata(
+            stop_native_stats(pool_baseline), frames))
+    # perf_counter_ns is system-wide monotonic, so it's comparable between
+    # worker processes too
+    seconds = (max(result[2] for result in results) -
+               min(result[1] for result in results)) / 1_000_000_000
+    p99 = np.array([summarize(ns_to_ms(result[3]))["p99"]
+                    for result in results])
+
+    return {
+        "streams": streams,
+        "frames": frames,
+        "seconds": seconds,
+        "fps": frames / seconds if seconds > 0 else 0,
+        "fps_per_stream": frames / seconds / streams if seconds > 0 else 0,
+        "p99_ms_mean": float(p99.mean()),
+        "p99_ms_max": float(p99.max()),
+        "cpu_percent": sum(cpu_per_core) / len(cpu_per_core),
+        "cpu_cores_busy": sum(cpu_per_core) / 100,
+        "metadata": metadata,
+    }
+
+
+def streams_to_csv(file_name: str, result: "dict[str, float]"):
+    with open('benchmark-results/streams/{}.csv'.format(file_name), 'w') as csv_file:
+        csv_writer = csv.writer(csv_file, delimiter=',',
+                                quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        values = {key: value for key, value in result.items()
+                  if key != "metadata"}
+        csv_writer.writerow(values.keys())
+        csv_writer.writerow([round(v, 4) for v in values.values()])
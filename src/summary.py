@@ -0,0 +1,113 @@
+import math
+import numpy as np
+
+# Percentiles reported for every metric, in report column order
+PERCENTILES = {"q1": 25, "q2": 50, "q3": 75, "p90": 90, "p99": 99, "p999": 99.9}
+
+
+def _empty_summary() -> "dict[str, float]":
+    return {"avg": 0, "min": 0, "max": 0, "q1": 0, "q2": 0, "q3": 0,
+            "stdev": 0, "p90": 0, "p99": 0, "p999": 0}
+
+
+def summarize(values) -> "dict[str, float]":
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return _empty_summary()
+
+    # min, max and every percentile come out of a single partition
+    quantiles = np.percentile(values, [0, 100, *PERCENTILES.values()])
+    result = {
+        "avg": float(values.mean()),
+        "min": float(quantiles[0]),
+        "max": float(quantiles[1]),
+        "stdev": float(values.std(ddof=1)) if values.size > 1 else 0.0,
+    }
+    for key, quantile in zip(PERCENTILES, quantiles[2:]):
+        result[key] = float(quantile)
+
+    return _ordered(result)
+
+
+def _ordered(result: "dict[str, float]") -> "dict[str, float]":
+    return {key: result[key] for key in _empty_summary()}
+
+
+class StreamingSummary:
+    """Constant-memory summary for arbitrarily long series.
+
+    Values are counted in logarithmic buckets (HDR-histogram / DDSketch
+    style), so every quantile is within ``relative_error`` of the exact
+    one while memory only grows with the dynamic range of the data.
+    Mean and standard deviation are exact.
+    """
+
+    def __init__(self, relative_error=0.01, min_value=1e-3) -> None:
+        self.relative_error = relative_error
+        self.min_value = min_value
+        self._gamma = (1 + relative_error) / (1 - relative_error)
+        self._log_gamma = math.log(self._gamma)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._below_min = 0
+
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return
+
+        # Merge chunk moments (Chan et al.) to keep the variance stable
+        chunk_count = values.size
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        total = self.count + chunk_count
+        delta = chunk_mean - self._mean
+        self._mean += delta * chunk_count / total
+        self._m2 += chunk_m2 + delta ** 2 * self.count * chunk_count / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        small = values < self.min_value
+        self._below_min += int(small.sum())
+        buckets = np.ceil(np.log(values[~small] / self.min_value) /
+                          self._log_gamma).astype(np.int64)
+        counts = np.bincount(buckets)
+        if counts.size > self._counts.size:
+            self._counts = np.pad(self._counts,
+                                  (0, counts.size - self._counts.size))
+        self._counts[:counts.size] += counts
+
+    def quantile(self, percent: float) -> float:
+        if self.count == 0:
+            return 0.0
+
+        rank = percent / 100 * (self.count - 1)
+        if rank < self._below_min:
+            return self.min
+
+        bucket = int(np.searchsorted(np.cumsum(self._counts),
+                                     rank - self._below_min, side="right"))
+        # Midpoint of the bucket, which bounds the relative error
+        value = self.min_value * 2 * self._gamma ** bucket / (self._gamma + 1)
+        return min(max(value, self.min), self.max)
+
+    def summary(self) -> "dict[str, float]":
+        if self.count == 0:
+            return _empty_summary()
+
+        result = {
+            "avg": self._mean,
+            "min": self.min,
+            "max": self.max,
+            "stdev": math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0,
+        }
+        for key, percent in PERCENTILES.items():
+            result[key] = self.quantile(percent)
+
+        return _ordered(result)
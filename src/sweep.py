@@ -0,0 +1,166 @@
+import argparse
+import csv
+import setproctitle
+from backends import BACKENDS, load_available_backends
+from main import PROCESS_NAME, THREAD_TYPES
+from streams import EXECUTORS, run_streams
+from utils import plot_curves_to_image
+
+# Columns of benchmark-results/sweep/<tool>-<resolution>.csv
+FIELDS = ["resolution", "thread_type", "streams", "threads", "frames",
+          "seconds", "fps", "fps_per_stream", "p99_ms_mean", "p99_ms_max",
+          "cpu_cores_busy", "stream_efficiency", "thread_speedup"]
+
+
+def parse_int_list(value: str) -> "list[int]":
+    return sorted({int(item) for item in value.split(",")})
+
+
+def parse_thread_types(value: str) -> "list[str]":
+    thread_types = [item.strip().lower() for item in value.split(",")]
+    for thread_type in thread_types:
+        if thread_type not in THREAD_TYPES:
+            raise argparse.ArgumentTypeError(
+                "invalid thread type {}, choose from {}".format(
+                    thread_type, ", ".join(THREAD_TYPES)))
+
+    return thread_types
+
+
+def run_sweep(tool_class, file_to_decode: str, streams: "list[int]",
+              threads: "list[int]", warmup_frames=0, executor="thread",
+              thread_types: "list[str]" = None) -> "list[dict]":
+    # threads=0 and thread_type=None mean library default, used for tools
+    # that can't set them
+    if not tool_class.supports_threads:
+        threads = [0]
+        thread_types = [None]
+    thread_types = thread_types or [None]
+
+    points = []
+    for thread_type in thread_types:
+        for thread_count in threads:
+            tool_options = {}
+            if thread_count > 0:
+                tool_options["threads"] = thread_count
+            if thread_type is not None:
+                tool_options["thread_type"] = thread_type
+
+            for stream_count in streams:
+                point = run_streams(tool_class, file_to_decode, stream_count,
+                                    warmup_frames, executor, PROCESS_NAME,
+                                    tool_options)
+                point["threads"] = thread_count
+                point["thread_type"] = point["metadata"].get(
+                    "thread_type", thread_type or "default")
+                point["resolution"] = point["metadata"].get(
+                    "resolution", "unknown")
+                print("{} {} streams={} threads={} thread_type={}: "
+                      "{:.2f} FPS".format(
+                          tool_class.name, point["resolution"], stream_count,
+                          thread_count, point["thread_type"], point["fps"]))
+                points.append(point)
+
+    add_scaling_metrics(points)
+    return points
+
+
+def add_scaling_metrics(points: "list[dict]"):
+    """Add parallel efficiency numbers to every sweep point.
+
+    stream_efficiency is aggregate FPS divided by (streams x FPS of the
+    smallest stream count) at the same thread count and type, 1.0 being
+    perfectly linear scaling. thread_speedup is FPS relative to the smallest
+    thread count at the same stream count and thread type.
+    """
+    min_streams = min(point["streams"] for point in points)
+    min_threads = min(point["threads"] for point in points)
+    fps = {(point["thread_type"], point["streams"], point["threads"]):
+           point["fps"] for point in points}
+
+    for point in points:
+        base_fps = fps[(point["thread_type"], min_streams, point["threads"])]
+        scale = point["streams"] / min_streams
+        point["stream_efficiency"] = point["fps"] / \
+            (scale * base_fps) if base_fps > 0 else 0
+
+        base_fps = fps[(point["thread_type"], point["streams"], min_threads)]
+        point["thread_speedup"] = point["fps"] / \
+            base_fps if base_fps > 0 else 0
+
+
+def sweep_to_csv(file_name: str, points: "list[dict]"):
+    with open('benchmark-results/sweep/{}.csv'.format(file_name), 'w') as csv_file:
+        csv_writer = csv.DictWriter(csv_file, fieldnames=FIELDS,
+                                    extrasaction="ignore")
+        csv_writer.writeheader()
+        for point in points:
+            csv_writer.writerow({key: point[key] if isinstance(point[key], str)
+                                 else round(point[key], 4) for key in FIELDS})
+
+
+def plot_sweep(file_name: str, points: "list[dict]"):
+    streams_curves, threads_curves = {}, {}
+    for point in points:
+        x, y = streams_curves.setdefault(
+            "{} {} threads".format(point["thread_type"], point["threads"]),
+            ([], []))
+        x.append(point["streams"])
+        y.append(point["fps"])
+
+        x, y = threads_curves.setdefault(
+            "{} {} streams".format(point["thread_type"], point["streams"]),
+            ([], []))
+        x.append(point["threads"])
+        y.append(point["fps"])
+
+    plot_curves_to_image(
+        streams_curves, 'benchmark-results/plot/sweep/{}-streams.png'.format(file_name),
+        "Streams", "Aggregate FPS")
+    plot_curves_to_image(
+        threads_curves, 'benchmark-results/plot/sweep/{}-threads.png'.format(file_name),
+        "Decoder threads", "Aggregate FPS")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sweep stream and decoder thread counts and record "
+        "scaling curves")
+    parser.add_argument("tool", choices=["all", *BACKENDS.keys()],
+                        help="tool to benchmark")
+    parser.add_argument("file", help="input file")
+    parser.add_argument("warmup", type=int, nargs="?", default=0,
+                        help="number of warm up frames excluded from latency "
+                        "statistics")
+    parser.add_argument("--streams", type=parse_int_list, default="1,2,4,8",
+                        help="comma separated stream counts")
+    parser.add_argument("--threads", type=parse_int_list, default="1,2,4",
+                        help="comma separated decoder thread counts, ignored "
+                        "by tools without thread control")
+    parser.add_argument("--thread-types", type=parse_thread_types,
+                        default="slice,frame",
+                        help="comma separated libavcodec threading modes ({}), "
+                        "ignored by tools without thread control".format(
+                            ", ".join(THREAD_TYPES)))
+    parser.add_argument("--executor", choices=EXECUTORS.keys(),
+                        default="thread",
+                        help="pool used to drive concurrent streams")
+    args = parser.parse_args()
+
+    setproctitle.setproctitle(PROCESS_NAME)
+
+    tools_to_run = list(BACKENDS.keys()) if args.tool == "all" else [args.tool]
+    backends = load_available_backends(tools_to_run)
+    if len(backends) == 0:
+        exit(1)
+
+    for tool_class, result_name in backends.values():
+        points = run_sweep(tool_class, args.file, args.streams, args.threads,
+                           args.warmup, args.executor, args.thread_types)
+        # One result per tool and resolution so sweeps over several inputs
+        # can be compared side by side
+        file_name = "{}-{}".format(result_name, points[0]["resolution"])
+        sweep_to_csv(file_name, points)
+        plot_sweep(file_name, points)
+
+    exit(0)
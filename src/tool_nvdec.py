@@ -0,0 +1,201 @@
+from enum import Enum
+import time
+import numpy as np
+import PyNvCodec as nvc
+from metrics import GpuProbe
+from tools import _Tool
+
+# PyNvCodec built with TC_CPU_ONLY has no NVDEC, treat it like a missing
+# library so "all" skips this tool
+if getattr(nvc, "CPU_ONLY", False):
+    raise ImportError("PyNvCodec was built without CUDA")
+
+
+class DecodeStatus(Enum):
+    # Decoding error.
+    DEC_ERR = 0,
+    # Frame was submitted to decoder.
+    # No frames are ready for display yet.
+    DEC_SUBM = 1,
+    # Frame was submitted to decoder.
+    # There's a frame ready for display.
+    DEC_READY = 2
+
+
+class NVDec(_Tool):
+    name = "nvdec"
+    supports_native_stats = True
+
+    # Converter output for every non-native output format
+    PIXEL_FORMATS = {
+        "rgb24": nvc.PixelFormat.RGB,
+        "bgr24": nvc.PixelFormat.BGR,
+    }
+
+    def __init__(self, file_to_decode: str, with_plot=False, process_name="python3",
+                 sample_interval=0.05, gpu_probe: GpuProbe = None,
+                 output_format="native") -> None:
+        super().__init__(file_to_decode, with_plot, process_name,
+                         sample_interval, gpu_probe, output_format)
+        self.gpu_id = 0
+        self.nv_dec = nvc.PyNvDecoder(file_to_decode, self.gpu_id)
+        width, height = self.nv_dec.Width(), self.nv_dec.Height()
+
+        # Colour conversion runs on the GPU, before the download
+        pixel_format = self.nv_dec.Format()
+        self.nv_cvt = None
+        if output_format != "native":
+            self.nv_cvt = nvc.PySurfaceConverter(
+                width, height, pixel_format, self.PIXEL_FORMATS[output_format],
+                self.gpu_id)
+            pixel_format = self.PIXEL_FORMATS[output_format]
+            self.cc_ctx = nvc.ColorspaceConversionContext(
+                nvc.ColorSpace.BT_601, nvc.ColorRange.MPEG)
+        self.nv_dwn = nvc.PySurfaceDownloader(
+            width, height, pixel_format, self.gpu_id)
+
+        # Numpy array to store decoded frames pixels
+        self.frame = np.ndarray(shape=(0), dtype=np.uint8)
+        # Encoded packet data
+        self.packet_data = nvc.PacketData()
+
+    # Decode single video frame into a GPU surface, None on EOF or error
+    def decode_surface(self):
+        try:
+            surface = self.nv_dec.DecodeSingleSurface(self.packet_data)
+            # Nvdec is sync in this mode so if surface is empty it means
+            # EOF or error.
+            if not surface.Empty():
+                return surface
+
+        except Exception as e:
+            print(getattr(e, 'message', str(e)))
+
+        return None
+
+    def convert_surface(self, surface):
+        if self.nv_cvt is None:
+            return surface
+        return self.nv_cvt.Execute(surface, self.cc_ctx)
+
+    def download_surface(self, surface) -> bool:
+        return self.nv_dwn.DownloadSingleSurface(surface, self.frame)
+
+    # Decode single video frame
+    def decode_frame(self) -> DecodeStatus:
+        surface = self.decode_surface()
+        if surface is None:
+            return DecodeStatus.DEC_ERR
+
+        if not self.download_surface(self.convert_surface(surface)):
+            return DecodeStatus.DEC_ERR
+
+        return DecodeStatus.DEC_READY
+
+    # Decode all available video frames
+    def decode_frames(self, warmup_iteration=0) -> int:
+        iteration_count = 1
+        records = self.records
+
+        # Main decoding cycle
+        while True:
+            start_counter = time.perf_counter_ns()
+            surface = self.decode_surface()
+            if surface is None:
+                break
+            decode_counter = time.perf_counter_ns()
+            surface = self.convert_surface(surface)
+            convert_counter = time.perf_counter_ns()
+            if not self.download_surface(surface):
+                break
+            end_counter = time.perf_counter_ns()
+
+            if iteration_count > warmup_iteration:
+                records.add_frame(start_counter, end_counter)
+                records.add_stages(decode_counter - start_counter,
+                                   convert_counter - decode_counter,
+                                   end_counter - convert_counter)
+
+            iteration_count += 1
+
+        return iteration_count - 1
+
+    def decode_first_frame(self) -> bool:
+        return self.decode_frame() != DecodeStatus.DEC_ERR
+
+    def decode_all(self) -> int:
+        frames = 0
+        while self.decode_frame() != DecodeStatus.DEC_ERR:
+            frames += 1
+
+        return frames
+
+
+class NVDecPipeline(_Tool):
+    """Same decode -> convert -> download chain as NVDec, but every stage
+    runs on its own native thread (``PyNvPipelineDecoder``) with bounded
+    queues of ``queue_size`` frames between them.
+
+    Stages overlap, so frame time approaches the slowest stage instead of
+    the sum of all of them. Stage times can't be told apart per frame, so
+    busy time and highest queue depth of every stage go to the metadata.
+    """
+    name = "nvdec_pipeline"
+    supports_native_stats = True
+
+    def __init__(self, file_to_decode: str, with_plot=False, process_name="python3",
+                 sample_interval=0.05, gpu_probe: GpuProbe = None,
+                 output_format="native", queue_size=4) -> None:
+        super().__init__(file_to_decode, with_plot, process_name,
+                         sample_interval, gpu_probe, output_format)
+        self.gpu_id = 0
+        pixel_format = NVDec.PIXEL_FORMATS.get(
+            output_format, nvc.PixelFormat.UNDEFINED)
+        self.nv_dec = nvc.PyNvPipelineDecoder(
+            file_to_decode, self.gpu_id, pixel_format, queue_size)
+        self.metadata["queue_size"] = queue_size
+
+        # Numpy array to store decoded frames pixels
+        self.frame = np.ndarray(shape=(0), dtype=np.uint8)
+
+    def decode_frame(self) -> bool:
+        try:
+            return self.nv_dec.DecodeSingleFrame(self.frame)
+        except Exception as e:
+            print(getattr(e, 'message', str(e)))
+
+        return False
+
+    def record_stage_stats(self):
+        for stage in self.nv_dec.Stats():
+            self.metadata["{}_busy_ms".format(stage.name)] = round(
+                stage.busy_ns / 1_000_000, 2)
+            self.metadata["{}_max_queue".format(stage.name)] = \
+                stage.max_queue_depth
+
+    def decode_frames(self, warmup_iteration=0) -> int:
+        iteration_count = 1
+        records = self.records
+        while True:
+            start_counter = time.perf_counter_ns()
+            if not self.decode_frame():
+                break
+            end_counter = time.perf_counter_ns()
+
+            if iteration_count > warmup_iteration:
+                records.add_frame(start_counter, end_counter)
+
+            iteration_count += 1
+
+        self.record_stage_stats()
+        return iteration_count - 1
+
+    def decode_first_frame(self) -> bool:
+        return self.decode_frame()
+
+    def decode_all(self) -> int:
+        frames = 0
+        while self.decode_frame():
+            frames += 1
+
+        return frames
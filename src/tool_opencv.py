@@ -0,0 +1,64 @@
+import time
+import cv2
+import numpy as np
+from metrics import GpuProbe
+from tools import _Tool
+
+
+class OpenCV(_Tool):
+    name = "opencv"
+
+    def __init__(self, file_to_decode: str, with_plot=False, process_name="python3",
+                 sample_interval=0.05, gpu_probe: GpuProbe = None,
+                 output_format="native") -> None:
+        super().__init__(file_to_decode, with_plot, process_name,
+                         sample_interval, gpu_probe, output_format)
+
+    # retrieve() converts to BGR and materializes the ndarray in one call,
+    # so OpenCV's conversion stage includes the copy and "native" is BGR
+    def _retrieve(self, video) -> np.ndarray:
+        _, frame = video.retrieve()
+        if self.output_format == "rgb24":
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return frame
+
+    def decode_frames(self, warmup_iteration=0) -> int:
+        video = cv2.VideoCapture(self.file_to_decode)
+        iteration_count = 1
+        records = self.records
+        while video.isOpened():
+            start_counter = time.perf_counter_ns()
+            if not video.grab():
+                break
+            decode_counter = time.perf_counter_ns()
+            self._retrieve(video)
+            end_counter = time.perf_counter_ns()
+
+            if iteration_count > warmup_iteration:
+                records.add_frame(start_counter, end_counter)
+                records.add_stages(decode_counter - start_counter,
+                                   end_counter - decode_counter, 0)
+
+            iteration_count += 1
+
+        video.release()
+        return iteration_count - 1
+
+    def decode_first_frame(self) -> bool:
+        video = cv2.VideoCapture(self.file_to_decode)
+        decoded = video.grab()
+        if decoded:
+            self._retrieve(video)
+
+        video.release()
+        return decoded
+
+    def decode_all(self) -> int:
+        video = cv2.VideoCapture(self.file_to_decode)
+        frames = 0
+        while video.grab():
+            self._retrieve(video)
+            frames += 1
+
+        video.release()
+        return frames
@@ -0,0 +1,140 @@
+import time
+import av
+import numpy as np
+from metrics import GpuProbe
+from tools import _Tool
+
+
+class PyAV(_Tool):
+    name = "pyav"
+    supports_threads = True
+    supports_batch = True
+
+    # threads=0 and thread_type=None keep libavcodec's defaults.
+    # thread_type is one of "none", "frame", "slice" or "auto".
+    def __init__(self, file_to_decode: str, with_plot=False, process_name="python3",
+                 sample_interval=0.05, gpu_probe: GpuProbe = None,
+                 output_format="native", threads=0,
+                 thread_type: str = None) -> None:
+        super().__init__(file_to_decode, with_plot, process_name,
+                         sample_interval, gpu_probe, output_format)
+        self.threads = threads
+        self.thread_type = thread_type
+        # Input and decoded frame iterator kept open between batches
+        self._batch_input = None
+        self._batch_frames = None
+
+    def _open(self):
+        av_input = av.open(self.file_to_decode)
+        stream = av_input.streams.video[0]
+        if self.threads > 0:
+            stream.thread_count = self.threads
+        if self.thread_type is not None:
+            stream.thread_type = self.thread_type.upper()
+
+        self.metadata["thread_type"] = getattr(
+            stream.thread_type, "name", str(stream.thread_type))
+        self.metadata["thread_count"] = stream.thread_count
+        self.metadata["resolution"] = "{}x{}".format(
+            stream.codec_context.width, stream.codec_context.height)
+        return av_input
+
+    # Convert with swscale (a new VideoFrame), then copy the planes out
+    def _to_output(self, frame) -> np.ndarray:
+        if self.output_format != "native":
+            frame = frame.reformat(format=self.output_format)
+        return frame.to_ndarray()
+
+    # Records one entry per decoded frame rather than per packet. A decode
+    # call's time is split between the frames it returns, packets that
+    # return nothing are charged to the next frame out.
+    def decode_frames(self, warmup_iteration=0) -> int:
+        av_input = self._open()
+        frame_count = 1
+        records = self.records
+        # Packet-in time of the packets still buffered in the decoder, by pts
+        packet_in_ns = {}
+        pending_ns = 0
+        # demux() ends with an empty packet, decoding it drains the frames
+        # the decoder still holds
+        for packet in av_input.demux(video=0):
+            start_counter = time.perf_counter_ns()
+            if packet.pts is not None:
+                packet_in_ns[packet.pts] = start_counter
+            frames = packet.decode()
+            end_counter = time.perf_counter_ns()
+
+            pending_ns += end_counter - start_counter
+            if len(frames) == 0:
+                continue
+
+            share_ns = pending_ns // len(frames)
+            pending_ns = 0
+            for frame in frames:
+                packet_in = packet_in_ns.pop(frame.pts, start_counter)
+                convert_counter = time.perf_counter_ns()
+                if self.output_format != "native":
+                    frame = frame.reformat(format=self.output_format)
+                copy_counter = time.perf_counter_ns()
+                frame.to_ndarray()
+                out_counter = time.perf_counter_ns()
+
+                if frame_count > warmup_iteration:
+                    records.add_frame(convert_counter - share_ns, out_counter,
+                                      end_counter - packet_in)
+                    records.add_stages(share_ns,
+                                       copy_counter - convert_counter,
+                                       out_counter - copy_counter)
+
+                frame_count += 1
+
+        av_input.close()
+        return frame_count - 1
+
+    def decode_first_frame(self) -> bool:
+        av_input = self._open()
+        frame = next(av_input.decode(video=0), None)
+        if frame is not None:
+            self._to_output(frame)
+
+        av_input.close()
+        return frame is not None
+
+    def decode_all(self) -> int:
+        av_input = self._open()
+        frames = 0
+        for frame in av_input.decode(video=0):
+            self._to_output(frame)
+            frames += 1
+
+        av_input.close()
+        return frames
+
+    def frame_shape(self) -> "tuple[int, ...]":
+        av_input = av.open(self.file_to_decode)
+        codec_context = av_input.streams.video[0].codec_context
+        width, height = codec_context.width, codec_context.height
+        av_input.close()
+
+        if self.output_format == "native":
+            # to_ndarray() of yuv420p stacks the chroma planes under luma
+            return (height * 3 // 2, width)
+        return (height, width, 3)
+
+    # PyAV has no batch call, frames are decoded one by one into the batch.
+    # The input stays open until the last frame was decoded.
+    def decode_batch(self, batch: np.ndarray) -> int:
+        if self._batch_frames is None:
+            self._batch_input = self._open()
+            self._batch_frames = self._batch_input.decode(video=0)
+
+        decoded = 0
+        for frame in self._batch_frames:
+            batch[decoded] = self._to_output(frame)
+            decoded += 1
+            if decoded == len(batch):
+                return decoded
+
+        self._batch_input.close()
+        self._batch_input, self._batch_frames = None, None
+        return decoded
@@ -0,0 +1,122 @@
+import time
+import numpy as np
+import PyNvCodec as nvc
+from metrics import GpuProbe
+from tools import _Tool
+
+
+class VpfFfmpeg(_Tool):
+    """VPF's libavcodec software decoder (``PyFfmpegDecoder``), runs
+    without a GPU.
+
+    Frames come out as planar YUV, DecodeSingleFrame copies them into the
+    output ndarray itself so the copy-out is part of the decode stage.
+    With zero_copy=True frames are read-only views of the decoder's buffer
+    instead, only valid until the next decode call. Batches are decoded by
+    DecodeBatch in one call with the GIL released, native output only.
+    """
+    name = "vpf_ffmpeg"
+    supports_threads = True
+    supports_zero_copy = True
+    supports_batch = True
+    supports_native_stats = True
+
+    # threads=0 and thread_type=None keep libavcodec's defaults (a single
+    # thread). thread_type is one of "none", "frame", "slice" or "auto".
+    def __init__(self, file_to_decode: str, with_plot=False, process_name="python3",
+                 sample_interval=0.05, gpu_probe: GpuProbe = None,
+                 output_format="native", threads=0, thread_type: str = None,
+                 zero_copy=False) -> None:
+        super().__init__(file_to_decode, with_plot, process_name,
+                         sample_interval, gpu_probe, output_format)
+        self.zero_copy = zero_copy
+        self.metadata["zero_copy"] = zero_copy
+
+        # Passed to the codec context through the ffmpeg_options map
+        ffmpeg_options = {}
+        if threads > 0:
+            ffmpeg_options["threads"] = str(threads)
+        if thread_type is not None:
+            ffmpeg_options["thread_type"] = thread_type
+        self.metadata["thread_count"] = threads
+        self.metadata["thread_type"] = thread_type or "default"
+        self.ffmpeg_dec = nvc.PyFfmpegDecoder(file_to_decode, ffmpeg_options)
+        self.width = self.ffmpeg_dec.Width()
+        self.height = self.ffmpeg_dec.Height()
+        self.metadata["resolution"] = "{}x{}".format(self.width, self.height)
+
+        self.cvt_code = None
+        if output_format != "native":
+            import cv2
+            self._cv2 = cv2
+            self.cvt_code = {"rgb24": cv2.COLOR_YUV2RGB_I420,
+                             "bgr24": cv2.COLOR_YUV2BGR_I420}[output_format]
+
+        # Numpy array to store decoded frames pixels
+        self.frame = np.ndarray(shape=(0), dtype=np.uint8)
+
+    def _convert(self, frame: np.ndarray) -> np.ndarray:
+        if self.cvt_code is None:
+            return frame
+
+        if frame.size != self.width * self.height * 3 // 2:
+            raise ValueError("Only yuv420p frames can be converted to {}".format(
+                self.output_format))
+        return self._cv2.cvtColor(
+            frame.reshape(self.height * 3 // 2, self.width), self.cvt_code)
+
+    def decode_frame(self) -> bool:
+        try:
+            if self.zero_copy:
+                self.frame = self.ffmpeg_dec.DecodeSingleFrameView()
+                return self.frame.size > 0
+            return self.ffmpeg_dec.DecodeSingleFrame(self.frame)
+        except Exception as e:
+            print(getattr(e, 'message', str(e)))
+
+        return False
+
+    def decode_frames(self, warmup_iteration=0) -> int:
+        iteration_count = 1
+        records = self.records
+        while True:
+            start_counter = time.perf_counter_ns()
+            if not self.decode_frame():
+                break
+            decode_counter = time.perf_counter_ns()
+            self._convert(self.frame)
+            end_counter = time.perf_counter_ns()
+
+            if iteration_count > warmup_iteration:
+                records.add_frame(start_counter, end_counter)
+                records.add_stages(decode_counter - start_counter,
+                                   end_counter - decode_counter, 0)
+
+            iteration_count += 1
+
+        return iteration_count - 1
+
+    def decode_first_frame(self) -> bool:
+        if not self.decode_frame():
+            return False
+
+        self._convert(self.frame)
+        return True
+
+    def decode_all(self) -> int:
+        frames = 0
+        while self.decode_frame():
+            self._convert(self.frame)
+            frames += 1
+
+        return frames
+
+    def frame_shape(self) -> "tuple[int, ...]":
+        if self.output_format != "native":
+            raise ValueError("Batched decoding only supports native output")
+
+        # yuv420p, the chroma planes follow the luma rows
+        return (self.height * 3 // 2, self.width)
+
+    def decode_batch(self, batch: np.ndarray) -> int:
+        return self.ffmpeg_dec.DecodeBatch(batch)
@@ -1,30 +1,57 @@
 from abc import abstractmethod
 import csv
-from enum import Enum
 import re
-from statistics import stdev
+import resource
 import time
-import cv2
-import gpustat
-from numpy import percentile
 import psutil
-from utils import IterationResult, avg, b_to_mb, plot_list_to_image, s_to_ms
-import av
+from metrics import GpuProbe, MetricsSampler, make_gpu_probe
+from summary import summarize
+from utils import RecordStore, b_to_mb, plot_list_to_image
 import numpy as np
-import PyNvCodec as nvc
+
+# Output formats every tool can hand frames out in. "native" skips colour
+# conversion and copies out whatever the decoder produced.
+OUTPUT_FORMATS = ("native", "rgb24", "bgr24")
+
+
+def metadata_to_csv(file_name: str, metadata: dict):
+    with open('benchmark-results/metadata/{}.csv'.format(file_name), 'w') as csv_file:
+        csv_writer = csv.writer(csv_file, delimiter=',',
+                                quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        for key, value in metadata.items():
+            csv_writer.writerow([key, value])
 
 
 class _Tool:
-    def __init__(self, file_to_decode: str, with_plot=False, process_name="python3") -> None:
+    # Used in result file names
+    name = "tool"
+    # Whether the decoder thread count can be configured
+    supports_threads = False
+    # Whether frames can be handed out as views of decoder memory
+    supports_zero_copy = False
+    # Whether several frames can be decoded into one array per call. Tools
+    # setting it implement frame_shape(), the shape of one output frame, and
+    # decode_batch(batch), which decodes up to len(batch) frames into the
+    # preallocated array of shape (n, *frame_shape()) and returns how many
+    # it decoded, fewer than len(batch) only at the end of the stream.
+    supports_batch = False
+    # Whether the tool decodes with PyNvCodec, whose native allocations and
+    # buffer pool can be counted (see native_stats.py)
+    supports_native_stats = False
+
+    def __init__(self, file_to_decode: str, with_plot=False, process_name="python3",
+                 sample_interval=0.05, gpu_probe: GpuProbe = None,
+                 output_format="native") -> None:
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError("Unsupported output format {}".format(output_format))
+
         self.file_to_decode = file_to_decode
         self.with_plot = with_plot
-        self.records: IterationResult = {
-            "fpt": [],
-            "cpu": [],
-            "mem": [],
-            "gpu": [],
-            "gpu_mem": []
-        }
+        self.output_format = output_format
+        self.records = RecordStore()
+        # Per-run settings recorded next to the results
+        self.metadata = {"tool": self.name, "file": file_to_decode,
+                         "output_format": output_format}
 
         self.process_pid = 0
         self.process_name = re.compile(process_name)
@@ -35,6 +62,28 @@ class _Tool:
 
         self._psutil_handle = psutil.Process(self.process_pid)
 
+        if gpu_probe is None:
+            gpu_probe = make_gpu_probe(process_name)
+        self.sampler = MetricsSampler(
+            self._psutil_handle, gpu_probe, sample_interval)
+
+    # Summarize records chunk by chunk while decoding instead of keeping
+    # every frame, for runs too long to hold in memory. Quantiles become
+    # estimates, and per-frame CSVs and plots are skipped.
+    def stream_records(self, chunk_size=65536):
+        self.records = RecordStore(streaming=True, chunk_size=chunk_size,
+                                   sampler=self.sampler)
+
+    # Join per-frame timings with the metrics sampled in the background
+    def collect_records(self, first_frame=0):
+        if self.records.streaming:
+            # Earlier chunks were joined while decoding
+            self.records.flush()
+            return
+
+        end_ns = self.records.end_ns[first_frame:]
+        self.records.add_metrics(self.sampler.join(end_ns))
+
     def plot_all_metrics_to_png(self, file_name: str):
         for key, value in self.records.items():
             plot_list_to_image(
@@ -45,206 +94,86 @@ class _Tool:
         for key, value in self.records.items():
             with open("benchmark-results/csv/{}/{}.csv".format(key, file_name), 'w') as file_csv:
                 writer = csv.writer(file_csv)
-                writer.writerow(value)
+                writer.writerow(np.round(value, 2).tolist())
+
+    def metadata_to_csv(self, file_name: str):
+        metadata_to_csv(file_name, self.metadata)
 
     def summarize_records(self):
-        dict_result = {}
+        if self.records.streaming:
+            return self.records.streaming_summary()
 
-        for key, value in self.records.items():
-            sorted_value = sorted(value)
-            dict_result[key] = {
-                "avg": round(avg(sorted_value), 2) if len(value) != 0 else 0,
-                "min": round(min(sorted_value), 2) if len(value) != 0 else 0,
-                "max": round(max(sorted_value), 2) if len(value) != 0 else 0,
-                "q1": round(percentile(sorted_value, 25), 2) if len(value) != 0 else 0,
-                "q2": round(percentile(sorted_value, 50), 2) if len(value) != 0 else 0,
-                "q3": round(percentile(sorted_value, 75), 2) if len(value) != 0 else 0,
-                "stdev": round(stdev(sorted_value), 2) if len(value) != 0 else 0,
-            }
-
-        return dict_result
+        return {key: summarize(value) for key, value in self.records.items()}
 
     def summary_to_csv(self, file_name: str, dict_summary):
         with open('benchmark-results/individual_summary/{}.csv'.format(file_name), 'w') as csv_file:
             csv_writer = csv.writer(csv_file, delimiter=',',
                                     quotechar='"', quoting=csv.QUOTE_MINIMAL)
-            for _, value in dict_summary.items():
-                csv_writer.writerow([*value.values()])
-
-    @abstractmethod
-    def decode(self):
-        pass
-
-
-class PyAV(_Tool):
-    def __init__(self, file_to_decode: str, with_plot=False, process_name="python3") -> None:
-        super().__init__(file_to_decode, with_plot, process_name)
-
-    def decode(self, warmup_iteration=0):
-        av_input = av.open(self.file_to_decode)
-        iteration_count = 1
-        for packet in av_input.demux():
-            if packet.size == 0:
-                continue
-
-            gpu = gpustat.core.GPUStatCollection.new_query()
-            start_counter = time.perf_counter()
-            packet.decode()
-            end_counter = time.perf_counter()
-            gpu_processes = list(filter(lambda x: self.process_name.match(
-                x['command']), gpu[0].processes))
-
-            processing_time = round(s_to_ms(end_counter - start_counter), 2)
-            cpu_util = psutil.cpu_percent()
-            mem_util = round(b_to_mb(self._psutil_handle.memory_info().rss), 2)
-            gpu_util = gpu[0].utilization
-
-            if iteration_count > warmup_iteration:
-                if len(gpu_processes) > 0:
-                    for process in gpu_processes:
-                        self.records["gpu_mem"].append(
-                            process["gpu_memory_usage"])
-                else:
-                    self.records["gpu_mem"].append(0)
-
-                self.records["fpt"].append(processing_time)
-                self.records["cpu"].append(cpu_util)
-                self.records["mem"].append(mem_util)
-                self.records["gpu"].append(gpu_util)
-
-            iteration_count += 1
+            for key, value in dict_summary.items():
+                csv_writer.writerow([key, *[round(v, 2) for v in value.values()]])
+
+    # Decode the whole file as fast as possible, without any per-frame
+    # instrumentation, and report sustained decode rate
+    def throughput(self) -> "dict[str, float]":
+        cpu_start = self._psutil_handle.cpu_times()
+        start_counter = time.perf_counter_ns()
+        frames = self.decode_all()
+        end_counter = time.perf_counter_ns()
+        cpu_end = self._psutil_handle.cpu_times()
+
+        seconds = (end_counter - start_counter) / 1_000_000_000
+        cpu_seconds = (cpu_end.user - cpu_start.user) + \
+            (cpu_end.system - cpu_start.system)
+        # ru_maxrss is in kilobytes on Linux. It's the high-water mark of the
+        # whole process, main.py runs every tool in a fresh one.
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+        return {
+            "frames": frames,
+            "seconds": seconds,
+            "fps": frames / seconds if seconds > 0 else 0,
+            "cpu_s_per_frame": cpu_seconds / frames if frames > 0 else 0,
+            "peak_rss_mb": b_to_mb(peak_rss),
+        }
 
-        self.dump_all_records_to_csv(file_name="pyav")
+    def throughput_to_csv(self, file_name: str, result: "dict[str, float]"):
+        with open('benchmark-results/throughput/{}.csv'.format(file_name), 'w') as csv_file:
+            csv_writer = csv.writer(csv_file, delimiter=',',
+                                    quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            csv_writer.writerow(result.keys())
+            csv_writer.writerow([round(v, 4) for v in result.values()])
+
+    # Decode all frames with per-frame timing and metrics, then write
+    # records to CSV files (and plots). Metadata is left to the caller, which
+    # may add to it. Returns number of decoded frames, warmup included.
+    def decode(self, warmup_iteration=0) -> int:
+        first_frame = len(self.records)
+        with self.sampler:
+            frames = self.decode_frames(warmup_iteration)
+        self.collect_records(first_frame)
+        if self.records.streaming:
+            return frames
+
+        self.dump_all_records_to_csv(file_name=self.name)
 
         if self.with_plot:
-            self.plot_all_metrics_to_png(file_name='pyav')
-
-
-class OpenCV(_Tool):
-    def __init__(self, file_to_decode: str, with_plot=False, process_name="python3") -> None:
-        super().__init__(file_to_decode, with_plot, process_name)
-
-    def decode(self, warmup_iteration=0):
-        video = cv2.VideoCapture(self.file_to_decode)
-        iteration_count = 1
-        while video.isOpened():
-            gpu = gpustat.core.GPUStatCollection.new_query()
-            gpu_processes = list(filter(lambda x: self.process_name.match(
-                x['command']), gpu[0].processes))
-
-            start_counter = time.perf_counter()
-            ret, _ = video.read()
-            if not ret:
-                break
-            end_counter = time.perf_counter()
-
-            processing_time = round(s_to_ms(end_counter - start_counter), 2)
-            cpu_util = psutil.cpu_percent()
-            mem_util = round(b_to_mb(self._psutil_handle.memory_info().rss), 2)
-            gpu_util = gpu[0].utilization
-
-            if iteration_count > warmup_iteration:
-                if len(gpu_processes) > 0:
-                    for process in gpu_processes:
-                        self.records["gpu_mem"].append(
-                            process["gpu_memory_usage"])
-                else:
-                    self.records["gpu_mem"].append(0)
+            self.plot_all_metrics_to_png(file_name=self.name)
 
-                self.records["fpt"].append(processing_time)
-                self.records["cpu"].append(cpu_util)
-                self.records["mem"].append(mem_util)
-                self.records["gpu"].append(gpu_util)
+        return frames
 
-            iteration_count += 1
-
-        video.release()
-
-        self.dump_all_records_to_csv(file_name="opencv")
+    # Time every frame after the warmup ones into self.records.
+    # Returns number of decoded frames, warmup included.
+    @abstractmethod
+    def decode_frames(self, warmup_iteration=0) -> int:
+        pass
 
-        if self.with_plot:
-            self.plot_all_metrics_to_png(file_name='opencv')
-
-
-class DecodeStatus(Enum):
-    # Decoding error.
-    DEC_ERR = 0,
-    # Frame was submitted to decoder.
-    # No frames are ready for display yet.
-    DEC_SUBM = 1,
-    # Frame was submitted to decoder.
-    # There's a frame ready for display.
-    DEC_READY = 2
-
-
-class NVDec(_Tool):
-    def __init__(self, file_to_decode: str, with_plot=False, process_name="python3") -> None:
-        super().__init__(file_to_decode, with_plot, process_name)
-        self.nv_dec = nvc.PyNvDecoder(file_to_decode, 0)
-        self.gpu_id = 0
-        # Numpy array to store decoded frames pixels
-        self.frame_nv12 = np.ndarray(shape=(0), dtype=np.uint8)
-        # Encoded packet data
-        self.packet_data = nvc.PacketData()
-
-    # Decode single video frame
-    def decode_frame(self) -> DecodeStatus:
-        status = DecodeStatus.DEC_ERR
-
-        try:
-            frame_ready = False
-            frame_ready = self.nv_dec.DecodeSingleFrame(
-                self.frame_nv12, self.packet_data)
-
-            # Nvdec is sync in this mode so if frame isn't returned it means
-            # EOF or error.
-            if frame_ready:
-                status = DecodeStatus.DEC_READY
-            else:
-                return status
-
-        except Exception as e:
-            print(getattr(e, 'message', str(e)))
-
-        return status
-
-    # Decode all available video frames and write them to output file.
-    def decode(self, warmup_iteration=0) -> IterationResult:
-        iteration_count = 1
-
-        # Main decoding cycle
-        while True:
-
-            start_counter = time.perf_counter()
-            status = self.decode_frame()
-            if status == DecodeStatus.DEC_ERR:
-                break
-            end_counter = time.perf_counter()
-            gpu = gpustat.core.GPUStatCollection.new_query()
-            gpu_processes = list(filter(lambda x: self.process_name.match(
-                x['command']), gpu[0].processes))
-
-            processing_time = round(s_to_ms(end_counter - start_counter), 2)
-            cpu_util = psutil.cpu_percent()
-            mem_util = round(b_to_mb(self._psutil_handle.memory_info().rss), 2)
-            gpu_util = gpu[0].utilization
-
-            if iteration_count > warmup_iteration:
-                if len(gpu_processes) > 0:
-                    for process in gpu_processes:
-                        self.records["gpu_mem"].append(
-                            process["gpu_memory_usage"])
-                else:
-                    self.records["gpu_mem"].append(0)
-
-                self.records["fpt"].append(processing_time)
-                self.records["cpu"].append(cpu_util)
-                self.records["mem"].append(mem_util)
-                self.records["gpu"].append(gpu_util)
-
-            iteration_count += 1
-
-        self.dump_all_records_to_csv(file_name="nvdec")
+    # Returns number of decoded frames
+    @abstractmethod
+    def decode_all(self) -> int:
+        pass
 
-        if self.with_plot:
-            self.plot_all_metrics_to_png(file_name='nvdec')
+    # Decode and copy out the first frame only, used to measure startup
+    # latency. Returns whether a frame was decoded.
+    @abstractmethod
+    def decode_first_frame(self) -> bool:
+        pass
@@ -1,25 +1,153 @@
-import matplotlib.pyplot as plt
-from typing import TypedDict
+from array import array
 from statistics import median, stdev
+import numpy as np
 from numpy import percentile
-import matplotlib
-matplotlib.use("Agg")
+from summary import StreamingSummary
 
 
-class IterationResult(TypedDict):
-    fpt: "list[float]"
-    cpu: "list[float]"
-    mem: "list[float]"
-    gpu: "list[float]"
-    gpu_mem: "list[float]"
+class RecordStore:
+    """Compact per-frame record storage.
+
+    Frame timings are appended as raw ``perf_counter_ns`` values into
+    int64 ``array`` buffers, sampled metrics are kept as float64 NumPy
+    arrays. Nothing is rounded or converted until report time.
+
+    Tools that can match output frames to input packets also fill
+    ``delay_ns`` (packet-in to frame-out), which is then reported as the
+    "delay" record.
+
+    Tools that time their pipeline stages separately fill ``stage_ns``
+    with the per-frame duration of every stage in ``STAGES``.
+
+    With ``streaming=True`` every ``chunk_size`` frames the buffered records
+    are joined with the metrics ``sampler`` has taken so far, folded into a
+    ``StreamingSummary`` per record and dropped, so memory stays flat however
+    long the run is. Only summaries are left then, no per-frame series.
+    """
+
+    METRICS = ("cpu", "mem", "gpu", "gpu_mem")
+    # decode: compressed data in, decoded picture out
+    # convert: pixel format conversion to the requested output format
+    # copy: materializing the picture as a host ndarray
+    STAGES = ("decode", "convert", "copy")
+
+    def __init__(self, streaming=False, chunk_size=65536,
+                 sampler=None) -> None:
+        self.streaming = streaming
+        self.chunk_size = chunk_size
+        self.sampler = sampler
+        self.summaries: "dict[str, StreamingSummary]" = {}
+        # Frames already folded into the summaries
+        self.flushed = 0
+
+        self.start_ns = array('q')
+        self.end_ns = array('q')
+        self.delay_ns = array('q')
+        self.stage_ns: "dict[str, array]" = {
+            key: array('q') for key in self.STAGES}
+        self.metrics: "dict[str, np.ndarray]" = {
+            key: np.empty(0) for key in self.METRICS}
+
+    def __len__(self) -> int:
+        return self.flushed + len(self.end_ns)
+
+    # delay_ns is only given by tools that can tell packet-in time
+    def add_frame(self, start_ns: int, end_ns: int, delay_ns: int = None):
+        # Checked before appending, so the stages and delay of the previous
+        # frame end up in the same chunk
+        if self.streaming and len(self.end_ns) >= self.chunk_size:
+            self.flush()
+
+        self.start_ns.append(start_ns)
+        self.end_ns.append(end_ns)
+        if delay_ns is not None:
+            self.delay_ns.append(delay_ns)
+
+    def add_metrics(self, metrics: "dict[str, np.ndarray]"):
+        for key in self.METRICS:
+            self.metrics[key] = np.concatenate(
+                (self.metrics[key], np.asarray(metrics[key], dtype=np.float64)))
+
+    def add_stages(self, decode_ns: int, convert_ns: int, copy_ns: int):
+        self.stage_ns["decode"].append(decode_ns)
+        self.stage_ns["convert"].append(convert_ns)
+        self.stage_ns["copy"].append(copy_ns)
+
+    # Frame processing time in nanoseconds, zero-copy view over the buffers
+    def fpt_ns(self) -> np.ndarray:
+        return np.frombuffer(self.end_ns, dtype=np.int64) - \
+            np.frombuffer(self.start_ns, dtype=np.int64)
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        if key == "fpt":
+            return ns_to_ms(self.fpt_ns())
+        if key == "delay":
+            return ns_to_ms(np.frombuffer(self.delay_ns, dtype=np.int64))
+        if key in self.stage_ns:
+            return ns_to_ms(np.frombuffer(self.stage_ns[key], dtype=np.int64))
+        return self.metrics[key]
+
+    def keys(self):
+        keys = ("fpt", *self.METRICS)
+        if len(self.delay_ns) > 0:
+            keys += ("delay",)
+        if len(self.stage_ns["decode"]) > 0:
+            keys += self.STAGES
+        return keys
+
+    def items(self):
+        for key in self.keys():
+            yield key, self[key]
+
+    # Fold buffered records into the summaries and drop them
+    def flush(self):
+        if self.sampler is not None and len(self.end_ns) > 0:
+            self.add_metrics(self.sampler.join(self.end_ns))
+            self.sampler.discard_before(self.end_ns[-1])
+
+        for key, value in self.items():
+            self.summaries.setdefault(key, StreamingSummary()).add(value)
+
+        self.flushed += len(self.end_ns)
+        for buffer in (self.start_ns, self.end_ns, self.delay_ns,
+                       *self.stage_ns.values()):
+            del buffer[:]
+        self.metrics = {key: np.empty(0) for key in self.METRICS}
+
+    def streaming_summary(self) -> "dict[str, dict[str, float]]":
+        self.flush()
+        keys = ("fpt", *self.METRICS, "delay", *self.STAGES)
+        return {key: self.summaries[key].summary() for key in keys
+                if key in self.summaries}
+
+
+# matplotlib takes a while to import, only load it when plotting
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
 
 
 def plot_list_to_image(list: list, path: str):
+    plt = _pyplot()
     plt.plot(list)
     plt.savefig(path)
     plt.clf()
 
 
+# curves maps line label -> (x values, y values)
+def plot_curves_to_image(curves: dict, path: str, xlabel: str, ylabel: str):
+    plt = _pyplot()
+    for label, (x, y) in curves.items():
+        plt.plot(x, y, marker="o", label=label)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.legend()
+    plt.savefig(path)
+    plt.clf()
+
+
 def list_summary(input_list: "list[int]") -> "tuple[float, float, float]":
     average = sum(input_list) / len(input_list)
     minimum = min(input_list)
@@ -36,5 +164,9 @@ def s_to_ms(s):
     return s * 1000
 
 
+def ns_to_ms(ns):
+    return ns / 1_000_000
+
+
 def b_to_mb(b: int):
     return b / 1_000_000
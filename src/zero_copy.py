@@ -0,0 +1,80 @@
+import argparse
+import csv
+import setproctitle
+from backends import BACKENDS, load_available_backends
+from main import PROCESS_NAME
+from metrics import FakeGpuProbe
+from summary import summarize
+
+# Columns of benchmark-results/zero_copy/<tool>.csv, one row per mode
+FIELDS = ["zero_copy", "frames", "fps", "cpu_s_per_frame", "decode_ms_q2",
+          "decode_ms_p99", "speedup"]
+
+
+def run_zero_copy(tool_class, file_to_decode: str,
+                  warmup_frames=0) -> "list[dict]":
+    """Decode the file with frames copied out and as views.
+
+    Each mode gets a throughput run (whole file, no instrumentation) and a
+    latency run for the decode stage, which includes the copy-out when
+    frames are copied.
+    """
+    rows = []
+    for zero_copy in (False, True):
+        tool = tool_class(file_to_decode, False, PROCESS_NAME,
+                          gpu_probe=FakeGpuProbe(), zero_copy=zero_copy)
+        result = tool.throughput()
+
+        tool = tool_class(file_to_decode, False, PROCESS_NAME,
+                          gpu_probe=FakeGpuProbe(), zero_copy=zero_copy)
+        tool.decode_frames(warmup_frames)
+        decode = summarize(tool.records["decode"])
+
+        rows.append({
+            "zero_copy": int(zero_copy),
+            "frames": result["frames"],
+            "fps": result["fps"],
+            "cpu_s_per_frame": result["cpu_s_per_frame"],
+            "decode_ms_q2": decode["q2"],
+            "decode_ms_p99": decode["p99"],
+            "speedup": result["fps"] / rows[0]["fps"] if rows and rows[0]["fps"] > 0 else 1.0,
+        })
+
+    return rows
+
+
+def zero_copy_to_csv(file_name: str, rows: "list[dict]"):
+    with open('benchmark-results/zero_copy/{}.csv'.format(file_name), 'w') as csv_file:
+        csv_writer = csv.DictWriter(csv_file, fieldnames=FIELDS)
+        csv_writer.writeheader()
+        for row in rows:
+            csv_writer.writerow({key: round(row[key], 4) for key in FIELDS})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare copied and zero-copy frame export")
+    parser.add_argument("tool", choices=["all", *BACKENDS.keys()],
+                        help="tool to benchmark, tools without zero-copy "
+                        "support are skipped")
+    parser.add_argument("file", help="input file")
+    parser.add_argument("warmup", type=int, nargs="?", default=0,
+                        help="number of warm up frames excluded from latency "
+                        "statistics")
+    args = parser.parse_args()
+
+    setproctitle.setproctitle(PROCESS_NAME)
+
+    tools_to_run = list(BACKENDS.keys()) if args.tool == "all" else [args.tool]
+    backends = load_available_backends(tools_to_run)
+    for tool_class, result_name in backends.values():
+        if not tool_class.supports_zero_copy:
+            print("Skipping {}, zero-copy not supported".format(result_name))
+            continue
+
+        rows = run_zero_copy(tool_class, args.file, args.warmup)
+        zero_copy_to_csv(result_name, rows)
+        print("{}: {:.2f} FPS copied, {:.2f} FPS zero-copy ({:.2f}x)".format(
+            result_name, rows[0]["fps"], rows[1]["fps"], rows[1]["speedup"]))
+
+    exit(0)